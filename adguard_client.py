@@ -0,0 +1,2076 @@
+#!/usr/bin/env python3
+# ==================== ADGUARD VPN CLIENT ====================
+# Работа с adguardvpn-cli без GTK: запуск команд, разбор вывода, кэш локаций.
+# Используется окном GUI и режимом --headless (скрипты, cron).
+# БЛОК ИМПОРТОВ
+# asyncio импортируется в одном месте, AsyncioRuntime.loop, при первом запуске процесса или замере:
+# --cached и разбор аргументов за него не платят
+import sys
+import subprocess
+import threading
+import re
+import os
+import tempfile
+import time
+import queue
+import json
+import random
+import heapq
+import bisect
+import argparse
+import socket
+import struct
+from collections import namedtuple, deque
+
+# ==================== КОНФИГУРАЦИЯ ====================
+# Путь можно переопределить (например, на benchmarks/fake_adguardvpn_cli.py для замеров)
+ADGUARD_PATH = os.environ.get("ADGUARD_GUI_CLI_PATH", "/opt/adguardvpn_cli/adguardvpn-cli")
+ADGUARD_CONFIG_DIR = os.path.expanduser("~/.local/share/adguardvpn-cli")
+CLI_WORKERS = 4  # Размер общего пула потоков для команд adguardvpn-cli
+STREAM_DRAIN_TIMEOUT = 2.0  # Сколько дочитываем вывод после выхода процесса, если pipe держат его потомки (сек)
+# Команды только на чтение: одинаковые одновременные вызовы объединяются в один процесс
+READ_ONLY_COMMANDS = ("license", "status", "list-locations", "site-exclusions list", "check-update")
+# Собственные данные GUI храним рядом с конфигом adguardvpn-cli
+GUI_DATA_DIR = os.path.expanduser("~/.local/share/adguardvpn-gui")
+LOCATIONS_CACHE_FILE = os.path.join(GUI_DATA_DIR, "locations.json")
+# Сколько секунд снимок локаций считается свежим (после этого обновляем в фоне)
+LOCATIONS_CACHE_TTL = int(os.environ.get("ADGUARD_GUI_LOCATIONS_TTL", "3600"))
+FAST_LOCATIONS_COUNT = 15  # Сколько самых быстрых локаций показывать без поиска
+# Адреса для активного замера задержки: {"JP": "tcp://host:443", "DE": "udp://host:53", ...}
+PROBE_ENDPOINTS_FILE = os.path.join(GUI_DATA_DIR, "probe_endpoints.json")
+PROBE_SAMPLES = 3  # Замеров на адрес, берем медиану
+PROBE_TIMEOUT = 2.0  # Таймаут одного замера (сек)
+PROBE_CONCURRENCY = 16  # Сколько адресов замеряем одновременно
+PROBE_CACHE_TTL = 300  # Сколько секунд результат замера считается актуальным
+EXCLUSIONS_BATCH_SIZE = 50  # Доменов в одном вызове site-exclusions add/remove
+EXCLUSIONS_BATCH_PAUSE = 0.05  # Пауза между вызовами site-exclusions add/remove при синхронизации (сек)
+# TUN-интерфейс, который поднимает adguardvpn-cli при подключении
+VPN_TUN_INTERFACE = os.environ.get("ADGUARD_GUI_TUN_INTERFACE", "tun0")
+# Кэш команд только на чтение: TTL (сек) по подкоманде
+CACHE_ENABLED = os.environ.get("ADGUARD_GUI_CACHE", "1") == "1"
+CACHE_TTLS = {
+    "license": 300,
+    "status": 5,  # Состояние VPN меняется и снаружи: держим недолго
+    "list-locations": 600,
+    "site-exclusions list": 300,
+    "check-update": 3600,
+}
+# Какие записи кэша сбрасывает мутирующая команда (после ее завершения, успешного или нет)
+CACHE_INVALIDATION = {
+    "connect": ("status",),
+    "disconnect": ("status",),
+    "switch": ("status",),
+    "login": ("license", "status", "list-locations", "site-exclusions list"),
+    "logout": ("license", "status", "list-locations", "site-exclusions list"),
+    "site-exclusions add": ("site-exclusions list",),
+    "site-exclusions remove": ("site-exclusions list",),
+    "update": ("check-update", "license"),
+}
+# Метрики вызовов CLI в текстовом формате Prometheus (textfile collector node_exporter)
+METRICS_FILE = os.environ.get("ADGUARD_GUI_METRICS_FILE", os.path.join(GUI_DATA_DIR, "adguardvpn_cli.prom"))
+METRICS_INTERVAL = float(os.environ.get("ADGUARD_GUI_METRICS_INTERVAL", "15"))  # Период записи файла (сек)
+METRICS_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)  # Границы гистограммы длительности (сек)
+# Привилегированный помощник (adguard_helper.py): один ввод пароля sudo за сессию вместо sudo на каждую операцию
+HELPER_ENABLED = os.environ.get("ADGUARD_GUI_HELPER", "0") == "1"
+HELPER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "adguard_helper.py")
+# Сокет - в каталоге root (его создает сам помощник): в каталоге, доступном пользователю на запись,
+# файл можно подменить символической ссылкой между созданием сокета и chown от root
+HELPER_SOCKET_DIR = "/run/adguardvpn-gui"
+HELPER_SOCKET = os.path.join(HELPER_SOCKET_DIR, f"helper-{os.getuid()}.sock")
+SWITCH_TIMEOUT = 95  # Переключение локации: disconnect (до 30 с) + connect (до 60 с) и запас (сек)
+# Автопереключение при деградации туннеля (по умолчанию выключено)
+FAILOVER_ENABLED = os.environ.get("ADGUARD_GUI_FAILOVER", "0") == "1"
+FAILOVER_PROBE_TARGET = os.environ.get("ADGUARD_GUI_FAILOVER_PROBE", "tcp://1.1.1.1:443")  # Пустая строка - без замера
+FAILOVER_INTERVAL = float(os.environ.get("ADGUARD_GUI_FAILOVER_INTERVAL", "10"))  # Период проверки (сек)
+FAILOVER_RTT_LIMIT = float(os.environ.get("ADGUARD_GUI_FAILOVER_RTT_LIMIT", "1000"))  # Задержка выше - деградация (мс)
+FAILOVER_THRESHOLD = 3  # Неудачных проверок подряд до переключения
+FAILOVER_PROBE_TIMEOUT = 3.0  # Таймаут замера до FAILOVER_PROBE_TARGET (сек)
+FAILOVER_BACKOFF_INITIAL = 5.0  # Пауза после переключения, удваивается до FAILOVER_BACKOFF_MAX (сек)
+FAILOVER_BACKOFF_MAX = 300.0
+FAILOVER_FLAP_WINDOW = 600.0  # Окно подавления флаппинга (сек)
+FAILOVER_FLAP_LIMIT = 3  # Больше переключений за окно не делаем
+# Фоновая проверка обновлений; последний результат хранится на диске и показывается сразу при запуске
+UPDATE_CHECK_FILE = os.path.join(GUI_DATA_DIR, "update_check.json")
+UPDATE_CHECK_INTERVAL = float(os.environ.get("ADGUARD_GUI_UPDATE_INTERVAL", "21600"))  # Период (сек); 0 - выключено
+UPDATE_CHECK_JITTER = 0.2  # Случайный разброс периода (доля), чтобы проверки не совпадали по времени
+UPDATE_CHECK_IDLE_DELAY = 60.0  # Сколько ждем после запуска и повторяем, если приложение занято (сек)
+UPDATE_CHECK_RETRY = 900.0  # Повтор после неудачной проверки (сек)
+EXCLUSION_DOMAIN_RE = re.compile(r'^(\*\.)?[a-z0-9_-]+(\.[a-z0-9_-]+)*\.[a-z0-9-]{2,}$')
+
+# ==================== Начало ПУЛ КОМАНД ====================
+class SharedResult:
+    """Результат задачи пула, run_once или share для ждущих вызовов (без concurrent.futures)"""
+    __slots__ = ('_done', '_lock', '_callbacks', '_result', '_error')
+
+    def __init__(self):
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = []
+        self._result = None
+        self._error = None
+
+    def set(self, result=None, error=None):
+        with self._lock:
+            self._result = result
+            self._error = error
+            self._done.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback(result, error)
+
+    def add_done_callback(self, callback):
+        """callback(result, error) по завершении; если уже завершен - сразу"""
+        with self._lock:
+            if not self._done.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self._result, self._error)
+
+    def wait(self):
+        self._done.wait()
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
+class CommandExecutor:
+    """Общий пул потоков фиксированного размера с объединением одинаковых команд"""
+
+    def __init__(self, max_workers=CLI_WORKERS):
+        self.max_workers = max_workers
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._inflight = {}  # ключ команды -> SharedResult выполняющегося запуска
+        self._active = 0
+        self._coalesced = 0
+        self._started = False  # Потоки пула запускаются с первой задачей
+
+    def submit(self, func, *args):
+        """Поставить задачу в очередь пула, вернуть SharedResult"""
+        with self._lock:
+            if not self._started:
+                self._started = True
+                for i in range(self.max_workers):
+                    threading.Thread(target=self._worker, name=f"adguard-cli-{i}", daemon=True).start()
+        shared = SharedResult()
+        self._queue.put((shared, func, args))
+        return shared
+
+    def run_once(self, key, func, *args):
+        """Выполнить func в текущем потоке; одновременные вызовы с тем же ключом получают один результат.
+        Ключ задает и форму результата: у разных вызывающих свои префиксы ("cli:", "gui:")"""
+        with self._lock:
+            shared = self._inflight.get(key)
+            leader = shared is None
+            if leader:
+                shared = self._inflight[key] = SharedResult()
+            else:
+                self._coalesced += 1
+        
+        if not leader:
+            print(f"POOL: команда '{key}' уже выполняется, ждем общий результат")
+            return shared.wait()
+        
+        try:
+            result = func(*args)
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            shared.set(error=e)
+            raise
+        with self._lock:
+            self._inflight.pop(key, None)
+        shared.set(result)
+        return result
+
+    def share(self, key, start, callback):
+        """run_once без ожидания: start() запускает работу и возвращает Future; callback(result, error) получают
+        все вызовы с тем же ключом, в том числе присоединившиеся к run_once. Возвращает Future запуска
+        или None, если вызов присоединился к уже идущему"""
+        with self._lock:
+            shared = self._inflight.get(key)
+            leader = shared is None
+            if leader:
+                shared = self._inflight[key] = SharedResult()
+            else:
+                self._coalesced += 1
+        shared.add_done_callback(callback)
+        if not leader:
+            return None
+        
+        def finish(result, error):
+            with self._lock:
+                self._inflight.pop(key, None)
+            shared.set(result, error)
+        
+        def done(future):
+            try:
+                result, error = future.result(), None
+            except BaseException as e:  # В том числе отмена
+                result, error = None, e
+            finish(result, error)
+        
+        try:
+            future = start()
+        except Exception as e:
+            finish(None, e)
+            return None
+        future.add_done_callback(done)
+        return future
+
+    def stats(self):
+        """Глубина очереди, занятые потоки и выполняющиеся команды"""
+        with self._lock:
+            return {
+                'queue_depth': self._queue.qsize(),
+                'active_workers': self._active,
+                'inflight_commands': len(self._inflight),
+                'coalesced_total': self._coalesced,
+            }
+
+    def _worker(self):
+        while True:
+            shared, func, args = self._queue.get()
+            with self._lock:
+                self._active += 1
+            try:
+                shared.set(func(*args))
+            except BaseException as e:
+                print(f"POOL: ошибка в задаче {getattr(func, '__name__', func)}: {e}")
+                shared.set(error=e)
+            finally:
+                with self._lock:
+                    self._active -= 1
+# ==================== Конец ПУЛ КОМАНД ====================
+
+# ==================== Начало КЭШ КОМАНД ====================
+class CliCache:
+    """Результаты команд только на чтение с TTL по подкоманде; мутирующие команды сбрасывают зависящие записи"""
+
+    def __init__(self, ttls=CACHE_TTLS, invalidation=CACHE_INVALIDATION, metrics=None, clock=time.monotonic):
+        self.ttls = ttls
+        self.invalidation = invalidation
+        self.metrics = metrics
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._entries = {}  # команда -> (CompletedProcess, время записи)
+        self._generations = {}  # команда -> номер сброса: результат, начатый до сброса, не сохраняем
+        self._hits = {}
+        self._misses = {}
+
+    def get(self, command):
+        """Свежий результат или None (промах)"""
+        with self._lock:
+            entry = self._entries.get(command)
+            hit = entry is not None and self.clock() - entry[1] < self.ttls.get(command, 0)
+            counter = self._hits if hit else self._misses
+            counter[command] = counter.get(command, 0) + 1
+        if self.metrics is not None:
+            self.metrics.record_cache(command, hit)
+        return entry[0] if hit else None
+
+    def token(self, command):
+        """Отметка перед запуском команды; put() с устаревшей отметкой ничего не сохраняет"""
+        with self._lock:
+            return self._generations.get(command, 0)
+
+    def put(self, command, result, token):
+        if command not in self.ttls or result is None or result.returncode != 0:
+            return
+        with self._lock:
+            if self._generations.get(command, 0) == token:
+                self._entries[command] = (result, self.clock())
+
+    def invalidate(self, *commands):
+        with self._lock:
+            for command in commands:
+                self._entries.pop(command, None)
+                self._generations[command] = self._generations.get(command, 0) + 1
+
+    def invalidate_after(self, args):
+        """Сброс записей, на которые влияет завершившаяся команда (argv, как у транспорта)"""
+        affected = self.invalidation.get(cli_subcommand(args))
+        if affected:
+            self.invalidate(*affected)
+
+    def stats(self):
+        """Попадания, промахи и число записей по командам"""
+        with self._lock:
+            return {
+                'hits': sum(self._hits.values()),
+                'misses': sum(self._misses.values()),
+                'entries': len(self._entries),
+                'commands': {
+                    command: {'hits': self._hits.get(command, 0), 'misses': self._misses.get(command, 0)}
+                    for command in sorted(set(self._hits) | set(self._misses))
+                },
+            }
+# ==================== Конец КЭШ КОМАНД ====================
+
+# ==================== Начало АСИНХРОННЫЙ ТРАНСПОРТ ====================
+class AsyncioRuntime:
+    """Цикл asyncio для транспорта CLI и замеров задержки. asyncio импортируется только здесь и только при
+    первом обращении к loop: headless --cached и разбор аргументов за него не платят"""
+
+    def __init__(self, loop=None):
+        self._loop = loop  # Готовый цикл (в GUI - на главном контексте GLib); None - свой цикл в отдельном потоке
+        self._lock = threading.Lock()
+        self.asyncio = None  # Модуль asyncio, после первого обращения к loop
+
+    @property
+    def loop(self):
+        with self._lock:
+            if self.asyncio is None:
+                import asyncio
+                self.asyncio = asyncio
+                if self._loop is None:
+                    self._loop = asyncio.new_event_loop()
+                    threading.Thread(target=self._loop.run_forever, name="adguard-asyncio", daemon=True).start()
+                self._use_pidfd_watcher()
+            return self._loop
+
+    def _use_pidfd_watcher(self):
+        # До Python 3.12 asyncio по умолчанию ждет каждый подпроцесс в своем потоке; pidfd обходится без потоков
+        policy = self.asyncio.get_event_loop_policy()
+        if sys.version_info >= (3, 12) or not isinstance(policy, self.asyncio.DefaultEventLoopPolicy):
+            return
+        try:
+            os.close(os.pidfd_open(os.getpid()))
+        except (AttributeError, OSError):
+            return
+        watcher = self.asyncio.PidfdChildWatcher()
+        watcher.attach_loop(self._loop)
+        policy.set_child_watcher(watcher)
+
+    def submit(self, coroutine):
+        """Запуск корутины из любого потока: concurrent.futures.Future, cancel() отменяет задачу в цикле"""
+        loop = self.loop
+        return self.asyncio.run_coroutine_threadsafe(coroutine, loop)
+
+    def in_loop_thread(self):
+        """Вызов из потока цикла: ждать результат здесь нельзя - цикл встанет"""
+        if self.asyncio is None:
+            return False
+        try:
+            return self.asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            return False
+
+
+class _CliProcessProtocol:
+    """Протокол подпроцесса asyncio: stdout построчно в on_line; выход процесса отдельно от закрытия pipe"""
+
+    def __init__(self, loop, on_line):
+        self.on_line = on_line
+        self.exited = loop.create_future()
+        self.closed = loop.create_future()
+        self.stdout_lines = []
+        self.stderr = bytearray()
+        self.error = None  # Исключение из on_line: пробрасываем вызывающему после завершения
+        self._partial = b""
+
+    def connection_made(self, transport):
+        pass
+
+    def pipe_data_received(self, fd, data):
+        if fd == 2:
+            self.stderr += data
+            return
+        lines = (self._partial + data).split(b"\n")
+        self._partial = lines.pop()
+        for raw_line in lines:
+            self._add_line(raw_line + b"\n")
+
+    def _add_line(self, raw_line):
+        line = raw_line.decode(errors="replace")
+        self.stdout_lines.append(line)
+        if self.on_line and self.error is None:
+            try:
+                self.on_line(line)
+            except Exception as e:
+                self.error = e
+
+    def flush(self):
+        """Последняя строка без перевода строки"""
+        if self._partial:
+            self._add_line(self._partial)
+            self._partial = b""
+
+    def pipe_connection_lost(self, fd, exc):
+        pass
+
+    def process_exited(self):
+        if not self.exited.done():
+            self.exited.set_result(None)
+
+    def connection_lost(self, exc):
+        if not self.closed.done():
+            self.closed.set_result(None)
+
+
+class AsyncCliTransport:
+    """Запуск процессов через asyncio: все подпроцессы обслуживает один цикл событий, без потока на вызов"""
+
+    def __init__(self, runtime, dispatch=None, metrics=None, cache=None):
+        self.runtime = runtime
+        # dispatch(callback, result) переносит вызов callback в нужный поток (в GUI - GLib.idle_add)
+        self.dispatch = dispatch or (lambda callback, result: callback(result))
+        self.metrics = metrics
+        self.cache = cache  # Мутирующие команды сбрасывают записи кэша, через какой бы путь они ни шли
+
+    async def run(self, args, timeout=30, input_text=None, on_line=None):
+        """Корутина запуска процесса; строки stdout передаются в on_line по мере вывода"""
+        try:
+            return await self._run_recorded(args, timeout, input_text, on_line)
+        finally:
+            if self.cache is not None:
+                self.cache.invalidate_after(args)
+
+    async def _run_recorded(self, args, timeout, input_text, on_line):
+        if self.metrics is None:
+            return await self._run_process(args, timeout, input_text, on_line)
+        
+        started = time.monotonic()
+        try:
+            result = await self._run_process(args, timeout, input_text, on_line)
+        except subprocess.TimeoutExpired:
+            self.metrics.record(args, time.monotonic() - started, timed_out=True)
+            raise
+        except OSError:
+            self.metrics.record(args, time.monotonic() - started, returncode="error")
+            raise
+        self.metrics.record(
+            args, time.monotonic() - started, result.returncode,
+            len(result.stdout.encode()), len(result.stderr.encode())
+        )
+        return result
+
+    async def _run_process(self, args, timeout, input_text, on_line):
+        asyncio = self.runtime.asyncio
+        loop = asyncio.get_running_loop()
+        transport, protocol = await loop.subprocess_exec(
+            lambda: _CliProcessProtocol(loop, on_line), *args,
+            stdin=subprocess.PIPE if input_text is not None else subprocess.DEVNULL,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            cwd=os.path.expanduser("~")
+        )
+        try:
+            if input_text is not None:
+                stdin = transport.get_pipe_transport(0)
+                stdin.write(input_text.encode())
+                stdin.close()
+            try:
+                await asyncio.wait_for(asyncio.shield(protocol.exited), timeout)
+            except asyncio.TimeoutError:
+                raise subprocess.TimeoutExpired(args, timeout)
+            # Запущенные CLI программы (браузер при login) могут держать pipe открытыми: дочитываем недолго
+            try:
+                await asyncio.wait_for(asyncio.shield(protocol.closed), STREAM_DRAIN_TIMEOUT)
+            except asyncio.TimeoutError:
+                pass
+            protocol.flush()
+            returncode = transport.get_returncode()
+        finally:
+            # Таймаут и отмена вызывающей стороной: close() убивает еще работающий процесс
+            transport.close()
+        if protocol.error is not None:
+            raise protocol.error
+        return subprocess.CompletedProcess(
+            args, returncode, "".join(protocol.stdout_lines), protocol.stderr.decode(errors="replace")
+        )
+
+    def submit(self, args, timeout=30, input_text=None, on_line=None, callback=None):
+        """Запуск из любого потока без ожидания: Future, cancel() убивает процесс;
+        callback(CompletedProcess или исключение) вызывается через dispatch"""
+        future = self.runtime.submit(self.run(args, timeout, input_text, on_line))
+        if callback:
+            def done(f):
+                if not f.cancelled():
+                    self.dispatch(callback, f.result() if f.exception() is None else f.exception())
+            future.add_done_callback(done)
+        return future
+
+    def run_sync(self, args, timeout=30, input_text=None, on_line=None):
+        """Синхронная обертка для рабочих потоков (пул, фоновые проверки, headless)"""
+        if self.runtime.in_loop_thread():
+            raise RuntimeError("run_sync в потоке цикла asyncio остановил бы цикл: используйте submit()")
+        return self.submit(args, timeout, input_text, on_line).result()
+# ==================== Конец АСИНХРОННЫЙ ТРАНСПОРТ ====================
+
+# ==================== Начало МЕТРИКИ CLI ====================
+def cli_subcommand(args):
+    """Подкоманда adguardvpn-cli из argv (sudo и путь к CLI пропускаем): "status", "site-exclusions add", ..."""
+    for i, arg in enumerate(args):
+        if os.path.basename(arg) == os.path.basename(ADGUARD_PATH):
+            rest = [a for a in args[i + 1:i + 3] if not a.startswith("-")]
+            if rest[:1] == ["site-exclusions"]:
+                return " ".join(rest[:2])
+            return rest[0] if rest else "unknown"
+    return os.path.basename(args[0]) if args else "unknown"
+
+
+def prometheus_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class CliMetrics:
+    """Гистограммы длительности, коды возврата, таймауты и объем вывода по подкомандам CLI"""
+
+    def __init__(self, buckets=METRICS_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._commands = {}
+        self._cache = {}  # команда -> [попадания, промахи]
+        self.pool_stats = None  # CommandExecutor.stats: состояние пула на момент снимка
+        self.version = 0  # Растет с каждой записью: файл переписываем только при изменениях
+
+    def record(self, args, duration, returncode=None, stdout_bytes=0, stderr_bytes=0, timed_out=False):
+        command = cli_subcommand(args)
+        with self._lock:
+            entry = self._commands.get(command)
+            if entry is None:
+                entry = self._commands[command] = {
+                    'buckets': [0] * len(self.buckets), 'count': 0, 'sum': 0.0,
+                    'exit_codes': {}, 'timeouts': 0, 'stdout_bytes': 0, 'stderr_bytes': 0,
+                }
+            for i, bound in enumerate(self.buckets):
+                if duration <= bound:
+                    entry['buckets'][i] += 1
+            entry['count'] += 1
+            entry['sum'] += duration
+            if timed_out:
+                entry['timeouts'] += 1
+            else:
+                code = str(returncode)
+                entry['exit_codes'][code] = entry['exit_codes'].get(code, 0) + 1
+            entry['stdout_bytes'] += stdout_bytes
+            entry['stderr_bytes'] += stderr_bytes
+            self.version += 1
+
+    def record_cache(self, command, hit):
+        with self._lock:
+            counts = self._cache.setdefault(command, [0, 0])
+            counts[0 if hit else 1] += 1
+            self.version += 1
+
+    def render(self):
+        """Снимок метрик в текстовом формате Prometheus"""
+        with self._lock:
+            commands = {name: dict(entry, buckets=list(entry['buckets']), exit_codes=dict(entry['exit_codes']))
+                        for name, entry in self._commands.items()}
+            cache = {name: tuple(counts) for name, counts in self._cache.items()}
+        
+        lines = [
+            "# HELP adguardvpn_cli_duration_seconds Duration of adguardvpn-cli calls.",
+            "# TYPE adguardvpn_cli_duration_seconds histogram",
+        ]
+        for name, entry in sorted(commands.items()):
+            label = prometheus_label(name)
+            for bound, count in zip(self.buckets, entry['buckets']):
+                lines.append(f'adguardvpn_cli_duration_seconds_bucket{{command="{label}",le="{bound}"}} {count}')
+            lines.append(f'adguardvpn_cli_duration_seconds_bucket{{command="{label}",le="+Inf"}} {entry["count"]}')
+            lines.append(f'adguardvpn_cli_duration_seconds_sum{{command="{label}"}} {entry["sum"]:.6f}')
+            lines.append(f'adguardvpn_cli_duration_seconds_count{{command="{label}"}} {entry["count"]}')
+        
+        lines += [
+            "# HELP adguardvpn_cli_exit_total Completed adguardvpn-cli calls by exit code.",
+            "# TYPE adguardvpn_cli_exit_total counter",
+        ]
+        for name, entry in sorted(commands.items()):
+            for code, count in sorted(entry['exit_codes'].items()):
+                lines.append(f'adguardvpn_cli_exit_total{{command="{prometheus_label(name)}",code="{prometheus_label(code)}"}} {count}')
+        
+        lines += [
+            "# HELP adguardvpn_cli_timeouts_total adguardvpn-cli calls killed on timeout.",
+            "# TYPE adguardvpn_cli_timeouts_total counter",
+        ]
+        for name, entry in sorted(commands.items()):
+            lines.append(f'adguardvpn_cli_timeouts_total{{command="{prometheus_label(name)}"}} {entry["timeouts"]}')
+        
+        lines += [
+            "# HELP adguardvpn_cli_output_bytes_total Bytes written by adguardvpn-cli.",
+            "# TYPE adguardvpn_cli_output_bytes_total counter",
+        ]
+        for name, entry in sorted(commands.items()):
+            label = prometheus_label(name)
+            lines.append(f'adguardvpn_cli_output_bytes_total{{command="{label}",stream="stdout"}} {entry["stdout_bytes"]}')
+            lines.append(f'adguardvpn_cli_output_bytes_total{{command="{label}",stream="stderr"}} {entry["stderr_bytes"]}')
+        
+        lines += [
+            "# HELP adguardvpn_cli_cache_requests_total Read-only command lookups in the GUI cache.",
+            "# TYPE adguardvpn_cli_cache_requests_total counter",
+        ]
+        for name, (hits, misses) in sorted(cache.items()):
+            label = prometheus_label(name)
+            lines.append(f'adguardvpn_cli_cache_requests_total{{command="{label}",result="hit"}} {hits}')
+            lines.append(f'adguardvpn_cli_cache_requests_total{{command="{label}",result="miss"}} {misses}')
+        
+        if self.pool_stats is not None:
+            pool = self.pool_stats()
+            lines += [
+                "# HELP adguardvpn_gui_pool_queue_depth Tasks waiting for a CLI pool worker.",
+                "# TYPE adguardvpn_gui_pool_queue_depth gauge",
+                f"adguardvpn_gui_pool_queue_depth {pool['queue_depth']}",
+                "# HELP adguardvpn_gui_pool_active_workers CLI pool workers running a task.",
+                "# TYPE adguardvpn_gui_pool_active_workers gauge",
+                f"adguardvpn_gui_pool_active_workers {pool['active_workers']}",
+                "# HELP adguardvpn_gui_pool_inflight_commands Read-only commands currently running; duplicates wait for their result.",
+                "# TYPE adguardvpn_gui_pool_inflight_commands gauge",
+                f"adguardvpn_gui_pool_inflight_commands {pool['inflight_commands']}",
+                "# HELP adguardvpn_gui_pool_coalesced_total Read-only calls served by an already running command.",
+                "# TYPE adguardvpn_gui_pool_coalesced_total counter",
+                f"adguardvpn_gui_pool_coalesced_total {pool['coalesced_total']}",
+            ]
+        return "\n".join(lines) + "\n"
+
+    def write(self, path=METRICS_FILE):
+        """Атомарная запись: textfile collector не должен увидеть недописанный файл"""
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".metrics-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(self.render())
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+
+class MetricsExporter:
+    """Фоновая периодическая запись метрик в файл (только если были новые вызовы)"""
+
+    def __init__(self, metrics, path=METRICS_FILE, interval=METRICS_INTERVAL):
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self._written_version = -1
+        self._stop = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self._run, name="adguard-metrics", daemon=True).start()
+
+    def stop(self):
+        """Остановка с финальной записью"""
+        self._stop.set()
+        self.flush()
+
+    def flush(self):
+        version = self.metrics.version
+        if version == self._written_version:
+            return
+        try:
+            self.metrics.write(self.path)
+            self._written_version = version
+        except OSError as e:
+            print(f"Не удалось записать метрики в {self.path}: {e}")
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+# ==================== Конец МЕТРИКИ CLI ====================
+
+# ==================== Начало ЗАМЕР ЗАДЕРЖКИ ====================
+class _UdpProbeProtocol:
+    """Протокол датаграмм asyncio (без наследования - asyncio импортируется лениво): ждем первый ответ"""
+
+    def __init__(self, reply):
+        self.reply = reply
+
+    def connection_made(self, transport):
+        pass
+
+    def connection_lost(self, exc):
+        pass
+
+    def datagram_received(self, data, addr):
+        if not self.reply.done():
+            self.reply.set_result(data)
+
+    def error_received(self, exc):
+        if not self.reply.done():
+            self.reply.set_exception(exc)
+
+
+def median(values):
+    """Медиана непустого списка (statistics ради одной функции не импортируем)"""
+    ordered = sorted(values)
+    middle = len(ordered) // 2
+    return ordered[middle] if len(ordered) % 2 else (ordered[middle - 1] + ordered[middle]) / 2
+
+
+class LatencyProber:
+    """Параллельный замер RTT до адресов локаций на цикле AsyncioRuntime (None - свой цикл в отдельном потоке)"""
+
+    def __init__(self, runtime=None, samples=PROBE_SAMPLES, timeout=PROBE_TIMEOUT,
+                 concurrency=PROBE_CONCURRENCY, ttl=PROBE_CACHE_TTL):
+        self.runtime = runtime or AsyncioRuntime()
+        self.samples = samples
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.ttl = ttl
+        self._cache = {}  # адрес -> (rtt в мс или None, время замера)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def parse_target(target):
+        """'tcp://host:port', 'udp://host:port' или 'host:port' -> (протокол, хост, порт)"""
+        scheme, _, address = target.rpartition("://")
+        host, _, port = address.rpartition(":")
+        return (scheme or "tcp").lower(), host.strip("[]"), int(port)
+
+    async def _sample_tcp(self, host, port):
+        asyncio = self.runtime.asyncio
+        start = time.monotonic()
+        _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), self.timeout)
+        rtt = (time.monotonic() - start) * 1000
+        writer.close()
+        return rtt
+
+    async def _sample_udp(self, host, port):
+        asyncio = self.runtime.asyncio
+        loop = asyncio.get_running_loop()
+        reply = loop.create_future()
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: _UdpProbeProtocol(reply), remote_addr=(host, port)
+        )
+        try:
+            start = time.monotonic()
+            transport.sendto(b"adguard-gui-probe")
+            await asyncio.wait_for(reply, self.timeout)
+            return (time.monotonic() - start) * 1000
+        finally:
+            transport.close()
+
+    async def _measure(self, target, semaphore):
+        async with semaphore:
+            try:
+                protocol, host, port = self.parse_target(target)
+            except ValueError:
+                return None
+            sample = self._sample_udp if protocol == "udp" else self._sample_tcp
+            rtts = []
+            for _ in range(self.samples):
+                try:
+                    rtts.append(await sample(host, port))
+                except (OSError, self.runtime.asyncio.TimeoutError):
+                    continue
+            return median(rtts) if rtts else None
+
+    async def _probe(self, endpoints):
+        now = time.monotonic()
+        with self._lock:
+            stale = sorted({
+                target for target in endpoints.values()
+                if target not in self._cache or now - self._cache[target][1] >= self.ttl
+            })
+        
+        if stale:
+            asyncio = self.runtime.asyncio
+            semaphore = asyncio.Semaphore(self.concurrency)
+            measured = await asyncio.gather(*(self._measure(target, semaphore) for target in stale))
+            with self._lock:
+                for target, rtt in zip(stale, measured):
+                    self._cache[target] = (rtt, time.monotonic())
+        
+        with self._lock:
+            return {code: self._cache[target][0] for code, target in endpoints.items()}
+
+    def submit(self, endpoints):
+        """Замер без ожидания: Future с {код: rtt в мс или None}; свежие результаты берутся из кэша"""
+        return self.runtime.submit(self._probe(endpoints))
+
+    def probe(self, endpoints):
+        """Замер {код: адрес} -> {код: rtt в мс или None} с ожиданием (из рабочих потоков)"""
+        return self.submit(endpoints).result()
+
+
+def load_probe_endpoints():
+    """Адреса для замера задержки из PROBE_ENDPOINTS_FILE: {"код локации": "tcp://host:443"} (или udp://,
+    host:port). Пустой словарь, если файла нет или он некорректен: замер тогда выключен"""
+    try:
+        with open(PROBE_ENDPOINTS_FILE, encoding="utf-8") as f:
+            endpoints = json.load(f)
+        return {str(code): str(target) for code, target in endpoints.items()}
+    except (OSError, ValueError, AttributeError):
+        return {}
+# ==================== Конец ЗАМЕР ЗАДЕРЖКИ ====================
+
+# ==================== Начало ХРАНИЛИЩЕ ЛОКАЦИЙ ====================
+class Location:
+    """Компактная запись локации: без __dict__, строка для списка строится при отрисовке"""
+    __slots__ = ('code', 'name', 'ping', 'rtt')
+
+    def __init__(self, code, name, ping, rtt=None):
+        self.code = code
+        self.name = name
+        self.ping = ping
+        self.rtt = rtt  # Замеренная задержка (мс) или None
+
+    @property
+    def sort_ping(self):
+        """Замеренная задержка, если есть, иначе пинг из list-locations"""
+        return self.ping if self.rtt is None else self.rtt
+
+    @property
+    def display(self):
+        if self.rtt is None:
+            return f"{self.code} - {self.name} ({self.ping}ms)"
+        return f"{self.code} - {self.name} ({self.rtt}ms, замер)"
+
+    def with_rtt(self, rtt):
+        """Копия записи с замеренной задержкой"""
+        return Location(self.code, self.name, self.ping, rtt)
+
+    def __repr__(self):
+        return f"Location({self.code!r}, {self.name!r}, {self.ping!r}, {self.rtt!r})"
+
+
+class LocationStore:
+    """Локации с индексами по ISO-коду, словам и префиксу названия и top-K по пингу"""
+
+    def __init__(self, top_k=FAST_LOCATIONS_COUNT):
+        self.top_k_size = top_k
+        self.reset([])
+
+    def reset(self, locations):
+        """Заменяем содержимое хранилища"""
+        self.locations = []
+        self._by_code = {}  # ISO-код -> [индексы]
+        self._names = []  # отсортированные (название, индекс) для поиска по префиксу
+        self._words = []  # отсортированные (слово, индекс): страна и город по отдельности
+        self._top = []  # куча (-пинг, -индекс) из top_k лучших, в вершине худшая из них
+        self._index_sorted = True
+        self.add(locations)
+
+    def add(self, locations):
+        """Добавляем локации; индексы и top-K обновляются без пересортировки всего списка"""
+        first_index = len(self.locations)
+        self.locations.extend(locations)
+        
+        for index, location in enumerate(locations, first_index):
+            self._by_code.setdefault(location.code.upper(), []).append(index)
+            name = location.name.lower()
+            self._names.append((name, index))
+            self._words.extend((word, index) for word in set(name.split()))
+            
+            entry = (-location.sort_ping, -index)
+            if len(self._top) < self.top_k_size:
+                heapq.heappush(self._top, entry)
+            elif entry > self._top[0]:
+                heapq.heapreplace(self._top, entry)
+        
+        # Текстовые индексы досортируем при первом поиске, а не на каждую порцию
+        self._index_sorted = False
+        return range(first_index, len(self.locations))
+
+    def top_k_indices(self):
+        """Индексы самых быстрых локаций по возрастанию пинга"""
+        return [-neg_index for _, neg_index in sorted(self._top, reverse=True)]
+
+    def top_k(self):
+        """Самые быстрые локации по возрастанию пинга"""
+        return [self.locations[i] for i in self.top_k_indices()]
+
+    def by_code(self, code):
+        """Локации с указанным ISO-кодом"""
+        return [self.locations[i] for i in self._by_code.get(code.upper(), ())]
+
+    def search(self, query):
+        """Индексы локаций по ISO-коду или префиксу названия/слова; пустой запрос - top-K"""
+        query = query.strip().lower()
+        if not query:
+            return set(self.top_k_indices())
+        
+        if not self._index_sorted:
+            # Timsort сливает уже отсортированную часть с новыми записями почти за линейное время
+            self._names.sort()
+            self._words.sort()
+            self._index_sorted = True
+        
+        result = set(self._by_code.get(query.upper(), ()))
+        for index in (self._names, self._words):
+            pos = bisect.bisect_left(index, (query, -1))
+            while pos < len(index) and index[pos][0].startswith(query):
+                result.add(index[pos][1])
+                pos += 1
+        return result
+# ==================== Конец ХРАНИЛИЩЕ ЛОКАЦИЙ ====================
+
+# ==================== Начало КЭШ ЛОКАЦИЙ ====================
+def load_locations_cache():
+    """Читаем снимок локаций с диска, возвращаем (локации, время получения)"""
+    try:
+        with open(LOCATIONS_CACHE_FILE, encoding="utf-8") as f:
+            data = json.load(f)
+        locations = [Location(loc['code'], loc['name'], loc['ping']) for loc in data['locations']]
+        return locations, float(data['fetched_at'])
+    except (OSError, ValueError, KeyError, TypeError):
+        return [], 0.0
+
+def save_locations_cache(locations, fetched_at):
+    """Атомарно сохраняем снимок локаций на диск"""
+    data = {
+        'fetched_at': fetched_at,
+        'locations': [
+            {'code': loc.code, 'name': loc.name, 'ping': loc.ping}
+            for loc in locations
+        ]
+    }
+    try:
+        os.makedirs(GUI_DATA_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=GUI_DATA_DIR, prefix=".locations-")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, LOCATIONS_CACHE_FILE)
+    except OSError as e:
+        print(f"Не удалось сохранить кэш локаций: {e}")
+# ==================== Конец КЭШ ЛОКАЦИЙ ====================
+
+# ==================== Начало РАЗБОР ВЫВОДА CLI ====================
+# Все шаблоны компилируются один раз; каждый вывод разбирается за один проход регулярного выражения
+
+# CSI (цвета, очистка строки, курсор), OSC (заголовки, ссылки) и двухсимвольные последовательности ESC
+ANSI_ESCAPE_RE = re.compile(r'\x1b(?:\[[0-?]*[ -/]*[@-~]|\][^\x07\x1b]*(?:\x07|\x1b\\)|[0-Z\\-_])')
+LICENSE_RE = re.compile(
+    r'Logged in as (?P<email>.+)'
+    r'|You are using the (?P<subscription>.+) version'
+    r'|Up to (?P<devices>\d+) devices simultaneously'
+    r'|Your subscription will be renewed on (?P<renewal>.+)'
+)
+# Строка list-locations: код (буквы и цифры), название (страна и город - не меньше двух слов),
+# первый числовой столбец - пинг, остаток строки. Разделители ("-----", "=====") под код не подходят.
+# Название собирается по словам, а не посимвольно: так движок не перебирает каждую позицию строки
+LOCATION_RE = re.compile(
+    r'^[ \t]*(?P<code>\w+)[ \t]+(?P<name>\S+(?:[ \t]+\S+)+?)[ \t]+(?P<ping>\d+)(?![^ \t\r\n])(?P<rest>.*)$', re.M
+)
+STATUS_RE = re.compile(
+    r'(?P<connected>\bConnected to (?P<location>.+?)(?: in (?P<mode>\S+) mode)?(?:, running on (?P<interface>\S+))?[ \t\r]*$)'
+    r'|(?P<disconnected>\b(?i:disconnected)\b)',
+    re.M
+)
+# Доступное обновление - только по фразе CLI "new version ... available": в ошибках ("Failed to check for update") ее нет
+CHECK_UPDATE_RE = re.compile(
+    r'(?P<latest>You are using the latest version)|(?P<available>\bnew version\b[^\n]*\bavailable\b)', re.I
+)
+UPDATE_RESULT_RE = re.compile(r'(?P<latest>You are using the latest version)|(?P<updated>success|updated)', re.I)
+EXCLUSION_LINE_RE = re.compile(
+    r'^[ \t]*(?P<domain>(?:\*\.)?[a-z0-9_-]+(?:\.[a-z0-9_-]+)*\.[a-z0-9-]{2,})[ \t\r]*$', re.M
+)
+
+LicenseInfo = namedtuple("LicenseInfo", "email subscription devices renewal")
+VpnStatus = namedtuple("VpnStatus", "connected location mode interface")
+UpdateInfo = namedtuple("UpdateInfo", "status text")  # status: "latest" | "available" | "updated" | "unknown"
+
+
+def clean_ansi_codes(text):
+    """Очищает ANSI escape-последовательности из текста"""
+    return ANSI_ESCAPE_RE.sub('', text)
+
+
+def parse_license(output):
+    """Разбор вывода license"""
+    # Группы шаблона пронумерованы в порядке полей LicenseInfo
+    fields = [None] * len(LicenseInfo._fields)
+    for match in LICENSE_RE.finditer(clean_ansi_codes(output)):
+        index = match.lastindex - 1
+        if fields[index] is None:
+            fields[index] = match.group(match.lastindex).strip()
+    return LicenseInfo._make(fields)
+
+
+def parse_account_info(output):
+    """Информация об аккаунте словарем (только найденные поля)"""
+    return {key: value for key, value in zip(LicenseInfo._fields, parse_license(output)) if value is not None}
+
+
+def format_account_info(account_info):
+    """Форматируем информацию об аккаунте для простого отображения"""
+    if not account_info:
+        return "Информация об аккаунте не доступна"
+    
+    lines = []
+    
+    if 'email' in account_info:
+        lines.append(f"Аккаунт: {account_info['email']}")
+    
+    if 'subscription' in account_info:
+        sub_type = "PREMIUM" if account_info['subscription'].upper() == "PREMIUM" else account_info['subscription']
+        lines.append(f"Тариф: {sub_type}")
+    
+    if 'devices' in account_info:
+        lines.append(f"Устройств: {account_info['devices']} одновременно")
+    
+    if 'renewal' in account_info:
+        lines.append(f"Обновление: {account_info['renewal']}")
+    
+    return "\n".join(lines)
+
+
+def parse_location_line(line):
+    """Парсим одну строку list-locations, None для заголовков и нераспознанных строк"""
+    match = LOCATION_RE.match(clean_ansi_codes(line))
+    return location_from_fields(*match.groups()) if match else None
+
+
+def parse_locations(output):
+    """Парсим вывод команды list-locations"""
+    locations = []
+    for fields in LOCATION_RE.findall(clean_ansi_codes(output)):
+        location = location_from_fields(*fields)
+        if location is not None:
+            locations.append(location)
+    return locations
+
+
+def location_from_fields(code, name, ping, rest):
+    """Location из столбцов строки, None для заголовка таблицы и подсказки CLI"""
+    # Обычные проверки подстрок: дешевле, чем заглядывание вперед в шаблоне на каждой строке
+    line = f"{code} {name} {rest}"
+    if 'ISO' in line or 'COUNTRY' in line or 'PING' in line or 'adguardvpn-cli' in line:
+        return None
+    # Столбцы выровнены пробелами: в названии оставляем по одному пробелу между словами
+    if '  ' in name or '\t' in name:
+        name = ' '.join(name.split())
+    return Location(code, name, int(ping))
+
+
+def parse_exclusions(output):
+    """Домены из вывода site-exclusions list (заголовки и пояснения пропускаем)"""
+    return [match.group('domain') for match in EXCLUSION_LINE_RE.finditer(clean_ansi_codes(output).lower())]
+
+
+def parse_status(output):
+    """Разбор вывода status"""
+    match = STATUS_RE.search(clean_ansi_codes(output))
+    if match is None or match.lastgroup == 'disconnected':
+        return VpnStatus(False, None, None, None)
+    return VpnStatus(True, match.group('location'), match.group('mode'), match.group('interface'))
+
+
+def parse_vpn_status(output):
+    """Состояние VPN по выводу команды status"""
+    return "connected" if parse_status(output).connected else "disconnected"
+
+
+def status_from_result(result):
+    """"connected"/"disconnected" по результату status или None при ошибке команды"""
+    if result and result.returncode == 0:
+        return parse_vpn_status(result.stdout)
+    return None
+
+
+def exclusions_from_result(result):
+    """(result, отсортированные домены) по результату site-exclusions list; домены пустые при ошибке"""
+    if result and result.returncode == 0:
+        return result, sorted(set(parse_exclusions(result.stdout)))
+    return result, []
+
+
+def parse_check_update(output):
+    """Разбор вывода check-update"""
+    text = clean_ansi_codes(output).strip()
+    found = {match.lastgroup for match in CHECK_UPDATE_RE.finditer(text)}
+    status = "latest" if "latest" in found else "available" if "available" in found else "unknown"
+    return UpdateInfo(status, text)
+
+
+def check_update_succeeded(result, update):
+    """check-update завершился без ошибки и вывод однозначен: такой результат можно сохранять и показывать"""
+    return (
+        result is not None and result.returncode == 0
+        and update is not None and update.status in ("latest", "available")
+    )
+
+
+def parse_update_result(output):
+    """Разбор вывода update"""
+    text = clean_ansi_codes(output).strip()
+    found = {match.lastgroup for match in UPDATE_RESULT_RE.finditer(text)}
+    status = "latest" if "latest" in found else "updated" if "updated" in found else "unknown"
+    return UpdateInfo(status, text)
+# ==================== Конец РАЗБОР ВЫВОДА CLI ====================
+
+# ==================== Начало СОСТОЯНИЕ VPN ====================
+def probe_vpn_interface(name=VPN_TUN_INTERFACE):
+    """Подсказка о состоянии VPN по TUN-интерфейсу в sysfs, без запуска процессов. Только подсказка: tun0 может
+    принадлежать другому VPN, а в режиме SOCKS интерфейса нет вовсе - состояние подтверждает команда status"""
+    try:
+        with open(f"/sys/class/net/{name}/flags", encoding="ascii") as f:
+            flags = int(f.read().strip(), 16)
+    except (OSError, ValueError):
+        return "disconnected"
+    return "connected" if flags & 0x1 else "disconnected"  # IFF_UP
+# ==================== Конец СОСТОЯНИЕ VPN ====================
+
+# ==================== Начало ПРИВИЛЕГИРОВАННЫЙ ПОМОЩНИК ====================
+class HelperClient:
+    """Запросы к adguard_helper.py через Unix-сокет; OSError, если помощник недоступен"""
+
+    def __init__(self, path=HELPER_SOCKET):
+        self.path = path
+
+    def request(self, command, timeout=5, **params):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(self.path)
+            # Сокет лежит в каталоге root (HELPER_SOCKET_DIR). Проверка uid - на случай помощника, запущенного
+            # не от root, и устаревшего сокета или каталога, созданных с другими правами
+            _, uid, _ = struct.unpack("3i", sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i")))
+            if uid != 0:
+                raise OSError(f"помощник на {self.path} запущен не от root (uid {uid})")
+            sock.sendall(json.dumps(dict(params, command=command)).encode() + b"\n")
+            with sock.makefile("rb") as reply:
+                line = reply.readline()
+        if not line:
+            raise OSError("помощник закрыл соединение без ответа")
+        return json.loads(line)
+
+    def available(self):
+        try:
+            return bool(self.request("ping").get('pong'))
+        except (OSError, ValueError):
+            return False
+
+
+def helper_response_result(args, response, timeout):
+    """CompletedProcess из ответа помощника; таймаут CLI - subprocess.TimeoutExpired"""
+    if response.get('timeout'):
+        raise subprocess.TimeoutExpired(args, timeout)
+    if 'error' in response:
+        return subprocess.CompletedProcess(args, 1, "", response['error'])
+    return subprocess.CompletedProcess(args, response['returncode'], response['stdout'], response['stderr'])
+# ==================== Конец ПРИВИЛЕГИРОВАННЫЙ ПОМОЩНИК ====================
+
+# ==================== Начало КЛИЕНТ ====================
+class AdGuardClient:
+    """Команды adguardvpn-cli с разобранными результатами; log(text) получает журнал выполнения"""
+
+    def __init__(self, log=None, dispatch=None, loop=None):
+        self.log = log or (lambda text: None)
+        # dispatch(callback, result) - куда доставлять результаты submit_* (в GUI - GLib.idle_add)
+        self.dispatch = dispatch or (lambda callback, result: callback(result))
+        self.executor = CommandExecutor()
+        self.metrics = CliMetrics()
+        self.metrics.pool_stats = self.executor.stats
+        self.cache = CliCache(metrics=self.metrics) if CACHE_ENABLED else None
+        # loop - готовый цикл asyncio (GUI: на главном контексте GLib); без него свой поток при первом запуске
+        self.runtime = AsyncioRuntime(loop)
+        self.transport = AsyncCliTransport(self.runtime, self.dispatch, self.metrics, self.cache)
+        self.prober = LatencyProber(self.runtime)
+        self.helper = HelperClient() if HELPER_ENABLED else None
+        self.helper_active = False  # Помощник отвечал на последний запрос
+        # connect/disconnect/switch и check-update не выполняются одновременно; повторный вход нужен
+        # автопереключению: оно держит блокировку от последней проверки до switch()
+        self.vpn_lock = threading.RLock()
+        # Локация, к которой VPN должен быть подключен по воле пользователя: ставят только connect/switch,
+        # снимает disconnect. Автопереключение не поднимает туннель, который отключили намеренно
+        self.intended_location = None
+
+    def run_command_simple(self, command):
+        """Простое выполнение команды без sudo (для диагностики)"""
+        if command in READ_ONLY_COMMANDS:
+            result, _ = self.run_read(command)
+            return result
+        return self._run_cli(command)
+
+    def run_read(self, command, fresh=False):
+        """Команда только на чтение через кэш: (result, взят ли он из кэша); fresh=True - всегда новый запуск"""
+        if fresh and self.cache is not None:
+            self.cache.invalidate(command)
+        cached = self.cached_result(command)
+        if cached is not None:
+            return cached, True
+        # Одинаковые команды чтения, запущенные одновременно, выполняются одним процессом
+        return self.executor.run_once(f"cli:{command}", self._run_cached, command), False
+
+    def submit_read(self, command, callback, on_line=None, fresh=False):
+        """run_read без занятого потока: callback(result) через dispatch, result - CompletedProcess или None.
+        Возвращает Future запуска (cancel() убивает процесс) или None, если ответ взят из кэша или из уже
+        идущего запуска; тогда on_line не вызывается и весь вывод приходит в result"""
+        if fresh and self.cache is not None:
+            self.cache.invalidate(command)
+        cached = self.cached_result(command)
+        if cached is not None:
+            self.dispatch(callback, cached)
+            return None
+        
+        def done(result, error):
+            if error is not None:
+                self.log(f"ОШИБКА: {str(error)}")
+            self.dispatch(callback, result if error is None else None)
+        
+        return self.executor.share(f"cli:{command}", lambda: self._submit_cached(command, on_line), done)
+
+    def _submit_cached(self, command, on_line=None):
+        token = self.cache.token(command) if self.cache is not None else None
+        self.log(f"Выполнение команды: {ADGUARD_PATH} {command}")
+        future = self.transport.submit([ADGUARD_PATH] + command.split(), timeout=30, on_line=on_line)
+        
+        def done(f):
+            if f.cancelled() or f.exception() is not None:
+                return
+            self._log_result(f.result())
+            if self.cache is not None:
+                self.cache.put(command, f.result(), token)
+        
+        future.add_done_callback(done)
+        return future
+
+    def submit_command(self, command, callback, timeout=30, input_text=None, on_line=None):
+        """Команда без sudo и без ожидания: callback(result или исключение) через dispatch; Future можно отменить"""
+        self.log(f"Выполнение команды: {ADGUARD_PATH} {command}")
+        
+        def done(result):
+            if isinstance(result, Exception):
+                self.log(f"ОШИБКА: {str(result)}")
+            else:
+                self._log_result(result)
+            return callback(result)
+        
+        return self.transport.submit(
+            [ADGUARD_PATH] + command.split(), timeout, input_text, on_line, callback=done
+        )
+
+    def cached_result(self, command):
+        """Свежий результат команды чтения из кэша или None"""
+        if self.cache is None:
+            return None
+        result = self.cache.get(command)
+        if result is not None:
+            self.log(f"Из кэша: {ADGUARD_PATH} {command}")
+        return result
+
+    def _run_cached(self, command):
+        # Отметка берется до запуска: если за время выполнения команду сбросили, результат не сохранится
+        token = self.cache.token(command) if self.cache is not None else None
+        result = self._run_cli(command)
+        if self.cache is not None:
+            self.cache.put(command, result, token)
+        return result
+
+    def _run_cli(self, command):
+        """Запуск adguardvpn-cli с логированием результата"""
+        try:
+            self.log(f"Выполнение команды: {ADGUARD_PATH} {command}")
+            
+            result = self.transport.run_sync([ADGUARD_PATH] + command.split(), timeout=30)
+            self._log_result(result)
+            return result
+            
+        except Exception as e:
+            self.log(f"ОШИБКА: {str(e)}")
+            return None
+
+    def _log_result(self, result):
+        self.log(f"Код возврата: {result.returncode}")
+        if result.stdout:
+            self.log(f"STDOUT: {result.stdout[:500]}...")
+        if result.stderr:
+            self.log(f"STDERR: {result.stderr[:500]}...")
+
+    def run_command_streaming(self, command, on_line, timeout=30):
+        """Выполнение команды с построчной передачей stdout в on_line по мере вывода"""
+        cached = self.cached_result(command) if command in READ_ONLY_COMMANDS else None
+        if cached is not None:
+            for line in cached.stdout.splitlines():
+                on_line(line)
+            return cached
+        
+        token = self.cache.token(command) if self.cache is not None else None
+        try:
+            self.log(f"Выполнение команды: {ADGUARD_PATH} {command}")
+            
+            result = self.transport.run_sync(
+                [ADGUARD_PATH] + command.split(), timeout=timeout, on_line=on_line
+            )
+            if self.cache is not None:
+                self.cache.put(command, result, token)
+            
+            self.log(f"Код возврата: {result.returncode}")
+            if result.stderr:
+                self.log(f"STDERR: {result.stderr[:500]}...")
+            
+            return result
+            
+        except Exception as e:
+            self.log(f"ОШИБКА: {str(e)}")
+            return None
+
+    def run_as_root(self, argv, password=None, timeout=30):
+        """Процесс с правами root: пароль sudo через stdin, без пароля - sudo -n"""
+        if os.geteuid() == 0:
+            return self.transport.run_sync(argv, timeout=timeout)
+        if password is None:
+            # Без интерактивного ввода (cron): сработает только при NOPASSWD в sudoers
+            return self.transport.run_sync(["sudo", "-n"] + argv, timeout=timeout)
+        return self.transport.run_sync(["sudo", "-S"] + argv, timeout=timeout, input_text=f"{password}\n")
+
+    def run_privileged(self, args, password=None, timeout=30):
+        """adguardvpn-cli с правами root"""
+        return self.run_as_root([ADGUARD_PATH] + args, password, timeout)
+
+    def account_info(self):
+        """Информация об аккаунте или None, если вход не выполнен"""
+        result = self.run_command_simple("license")
+        if result and result.returncode == 0:
+            return parse_account_info(result.stdout)
+        return None
+
+    def status(self, fresh=False):
+        """"connected"/"disconnected" или None при ошибке команды; fresh=True - мимо кэша"""
+        result, _ = self.run_read("status", fresh)
+        return status_from_result(result)
+
+    def submit_status(self, callback, fresh=False):
+        """status() без ожидания: callback("connected"/"disconnected"/None) через dispatch"""
+        return self.submit_read("status", lambda result: callback(status_from_result(result)), fresh=fresh)
+
+    def list_locations(self, on_location=None, refresh=False):
+        """Локации из list-locations; on_location получает каждую сразу после разбора строки.
+        refresh=True - мимо кэша (пользователь явно обновляет список)"""
+        if refresh and self.cache is not None:
+            self.cache.invalidate("list-locations")
+        locations = []
+        
+        def on_line(line):
+            location = parse_location_line(line)
+            if location is None:
+                return
+            locations.append(location)
+            if on_location:
+                on_location(location)
+        
+        result = self.run_command_streaming("list-locations", on_line)
+        return result, locations
+
+    def start_helper(self, password=None):
+        """Запуск привилегированного помощника (пароль sudo нужен только здесь); True, если он отвечает"""
+        if self.helper is None:
+            return False
+        if self.helper_ready():
+            return True
+        args = [
+            sys.executable, HELPER_SCRIPT, "--cli", ADGUARD_PATH, "serve", "--socket", self.helper.path,
+            "--uid", str(os.getuid()), "--owner-pid", str(os.getpid())
+        ]
+        self.log("Запуск привилегированного помощника")
+        try:
+            result = self.run_as_root(args, password, timeout=30)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            self.log(f"Помощник не запущен: {e}")
+            return False
+        if result.returncode != 0:
+            self.log(f"Помощник не запущен: {(result.stderr or result.stdout).strip()}")
+            return False
+        return self.helper_ready()
+
+    def helper_ready(self):
+        self.helper_active = self.helper is not None and self.helper.available()
+        return self.helper_active
+
+    def stop_helper(self):
+        if self.helper is None or not self.helper_active:
+            return
+        self.helper_active = False
+        try:
+            self.helper.request("shutdown")
+        except (OSError, ValueError):
+            pass
+
+    def run_helper(self, command, timeout, **params):
+        """Команда через помощника: (CompletedProcess, ответ помощника); (None, None), если помощник недоступен"""
+        if self.helper is None or not (self.helper_active or self.helper_ready()):
+            return None, None
+        args = [ADGUARD_PATH, command]  # Для метрик и исключений: подкоманда та же, что и при запуске через sudo
+        started = time.monotonic()
+        try:
+            # Сам помощник ограничивает CLI тем же таймаутом: ждем ответа чуть дольше
+            response = self.helper.request(command, timeout=timeout + 5, **params)
+        except (OSError, ValueError) as e:
+            self.log(f"Помощник недоступен ({e}), выполняем через sudo")
+            self.helper_active = False
+            return None, None
+        finally:
+            # Транспорт сбрасывает кэш после своих запусков; запрос к помощнику идет мимо него
+            if self.cache is not None:
+                self.cache.invalidate_after(args)
+        try:
+            result = helper_response_result(args, response, timeout)
+        except subprocess.TimeoutExpired:
+            self.metrics.record(args, time.monotonic() - started, timed_out=True)
+            raise
+        self.metrics.record(
+            args, time.monotonic() - started, result.returncode,
+            len(result.stdout.encode()), len(result.stderr.encode())
+        )
+        return result, response
+
+    def connect(self, location, password=None):
+        """Подключение к локации (CompletedProcess; при таймауте - subprocess.TimeoutExpired)"""
+        with self.vpn_lock:
+            result, _ = self.run_helper("connect", 60, location=str(location))
+            if result is None:
+                result = self.run_privileged(["connect", "-l", str(location)], password, timeout=60)
+            if result.returncode == 0:
+                self.intended_location = str(location)
+            return result
+
+    def disconnect(self, password=None):
+        """Отключение VPN"""
+        with self.vpn_lock:
+            self.intended_location = None
+            result, _ = self.run_helper("disconnect", 30)
+            if result is not None:
+                return result
+            return self.run_privileged(["disconnect"], password, timeout=30)
+
+    def switch(self, location, password=None):
+        """Переход на другую локацию одной привилегированной операцией: (CompletedProcess, простой туннеля в сек или None)"""
+        with self.vpn_lock:
+            result, downtime = self._switch(str(location), password)
+            if result.returncode == 0:
+                self.intended_location = str(location)
+            return result, downtime
+
+    def _switch(self, location, password):
+        result, response = self.run_helper("switch", SWITCH_TIMEOUT, location=location)
+        if result is not None:
+            return result, response.get('downtime')
+        
+        # Помощник не запущен: тот же disconnect + connect в одном процессе под sudo
+        process = self.run_as_root(
+            [sys.executable, HELPER_SCRIPT, "--cli", ADGUARD_PATH, "switch", "--", location], password, timeout=SWITCH_TIMEOUT
+        )
+        try:
+            response = json.loads(process.stdout)
+        except ValueError:
+            # sudo не пустил или помощник завершился, не выдав ответа
+            return process, None
+        return helper_response_result([ADGUARD_PATH, "switch"], response, SWITCH_TIMEOUT), response.get('downtime')
+
+    def check_update(self, blocking=True, fresh=False):
+        """check-update не одновременно с connect/disconnect: (result, UpdateInfo или None при ошибке запуска).
+        None - blocking=False, а VPN сейчас подключается или отключается.
+        Результат нового запуска сохраняется на диск; результат из кэша - нет (время проверки было бы ложным)"""
+        if not self.vpn_lock.acquire(blocking):
+            return None
+        try:
+            result, cached = self.run_read("check-update", fresh)
+        finally:
+            self.vpn_lock.release()
+        if result is None:
+            return None, None
+        # Смотрим на вывод, а не на код возврата
+        update = parse_check_update(result.stdout)
+        if check_update_succeeded(result, update) and not cached:
+            save_update_check(update, time.time())
+        return result, update
+
+    def list_exclusions(self):
+        """(result, отсортированные домены); домены пустые при ошибке команды"""
+        return exclusions_from_result(self.run_command_simple("site-exclusions list"))
+
+    def submit_exclusions(self, callback):
+        """list_exclusions() без ожидания: callback(result, домены) через dispatch"""
+        return self.submit_read("site-exclusions list", lambda result: callback(*exclusions_from_result(result)))
+
+    def add_exclusion(self, site):
+        return self.run_command_simple(f"site-exclusions add {site}")
+
+    def remove_exclusion(self, site):
+        return self.run_command_simple(f"site-exclusions remove {site}")
+
+    def sync_exclusions(self, desired_domains):
+        """Приводим исключения к желаемому набору минимальным числом вызовов CLI; возвращает неудачные изменения"""
+        desired = {d.strip().lower() for d in desired_domains if d.strip()}
+        invalid = sorted(d for d in desired if not EXCLUSION_DOMAIN_RE.match(d))
+        if invalid:
+            raise ValueError(f"Некорректные домены: {', '.join(invalid[:10])}")
+        
+        # Разницу считаем от текущего списка: кэш мог устареть после изменений в другом клиенте
+        result, _ = self.run_read("site-exclusions list", fresh=True)
+        if not result or result.returncode != 0:
+            error_msg = result.stderr if result and result.stderr else "Ошибка получения списка исключений"
+            raise RuntimeError(error_msg)
+        
+        current = set(parse_exclusions(result.stdout))
+        to_remove = sorted(current - desired)
+        to_add = sorted(desired - current)
+        self.log(f"Исключения: удалить {len(to_remove)}, добавить {len(to_add)}")
+        
+        # Сначала удаления, затем добавления
+        failed = []
+        for action, domains in (("remove", to_remove), ("add", to_add)):
+            if domains:
+                failed += self.run_exclusion_batches(action, domains)
+        
+        # Итог проверяем по новому списку: CLI может вернуть 0, не записав домен, а другой клиент -
+        # поменять список во время синхронизации
+        result, _ = self.run_read("site-exclusions list", fresh=True)
+        if not result or result.returncode != 0:
+            self.log("Итоговый список исключений не получен, ошибки - по кодам возврата")
+            return failed
+        final = set(parse_exclusions(result.stdout))
+        differ = [f"remove {d}" for d in sorted(final - desired)] + [f"add {d}" for d in sorted(desired - final)]
+        if len(differ) != len(failed):
+            self.log(f"Исключения после синхронизации: отличий от желаемого набора {len(differ)}, "
+                     f"неудачных вызовов {len(failed)}")
+        return differ
+
+    def run_exclusion_batches(self, action, domains):
+        """site-exclusions add/remove порциями, строго по очереди: одновременные вызовы переписывают один
+        конфиг CLI и теряют изменения друг друга. Возвращает неудачные домены"""
+        
+        def run(batch):
+            time.sleep(EXCLUSIONS_BATCH_PAUSE)
+            try:
+                result = self.transport.run_sync([ADGUARD_PATH, "site-exclusions", action] + batch, timeout=60)
+                return result.returncode == 0
+            except subprocess.TimeoutExpired:
+                return False
+        
+        def run_batch(batch):
+            if run(batch):
+                return []
+            if len(batch) == 1:
+                return batch
+            # Порция не прошла целиком: повторяем по одному домену
+            return [domain for domain in batch if not run([domain])]
+        
+        batches = [domains[i:i + EXCLUSIONS_BATCH_SIZE] for i in range(0, len(domains), EXCLUSIONS_BATCH_SIZE)]
+        self.log(f"site-exclusions {action}: {len(domains)} доменов, {len(batches)} вызовов")
+        return [f"{action} {domain}" for batch in batches for domain in run_batch(batch)]
+# ==================== Конец КЛИЕНТ ====================
+
+# ==================== Начало АВТОПЕРЕКЛЮЧЕНИЕ ====================
+class FailoverController:
+    """Следит за здоровьем туннеля и переходит на следующую по скорости локацию.
+    
+    Проверка: состояние VPN (status_probe, по умолчанию status у CLI мимо кэша: tun0 может принадлежать
+    другому VPN, а в режиме SOCKS его нет) и замер до probe_target через туннель. Отключенный
+    туннель - намеренное отключение (пользователем или другим процессом): перестаем следить. После
+    threshold неудачных проверок подряд - client.switch() на первую локацию из candidates(),
+    кроме текущей и недавно не сработавших. Между переключениями - экспоненциальная пауза,
+    больше flap_limit переключений за flap_window не делаем (подавление флаппинга).
+    События: on_event(kind, info), kind - "degraded", "switching", "switched", "failed",
+    "no_candidates", "damped", "stopped"; вызывается из потока контроллера.
+    """
+
+    def __init__(self, client, candidates, get_password=None, on_event=None, status_probe=None,
+                 probe_target=FAILOVER_PROBE_TARGET, interval=FAILOVER_INTERVAL, threshold=FAILOVER_THRESHOLD,
+                 rtt_limit=FAILOVER_RTT_LIMIT, backoff_initial=FAILOVER_BACKOFF_INITIAL,
+                 backoff_max=FAILOVER_BACKOFF_MAX, flap_window=FAILOVER_FLAP_WINDOW,
+                 flap_limit=FAILOVER_FLAP_LIMIT, clock=time.monotonic):
+        self.client = client
+        self.candidates = candidates  # () -> коды локаций по возрастанию пинга
+        self.get_password = get_password or (lambda: None)
+        self.on_event = on_event or (lambda kind, info: None)
+        self.status_probe = status_probe or (lambda: client.status(fresh=True))
+        self.probe_target = probe_target
+        self.interval = interval
+        self.threshold = threshold
+        self.rtt_limit = rtt_limit
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.flap_window = flap_window
+        self.flap_limit = flap_limit
+        self.clock = clock
+        self.prober = LatencyProber(client.runtime, samples=1, timeout=FAILOVER_PROBE_TIMEOUT, ttl=0)
+        self.location = None  # Отслеживаемая локация; None - не следим (VPN отключен пользователем)
+        self.failures = 0
+        self.backoff = backoff_initial
+        self.next_attempt_at = 0.0
+        self.damped = False
+        self.switching = False  # Идет свое переключение: отключение, которое заметит монитор, - наше
+        self.failover_times = deque()  # Моменты переключений внутри flap_window
+        self.failed_at = {}  # код локации -> когда она деградировала или не подключилась
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="adguard-failover", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def track(self, location):
+        """Следить за туннелем до location (после подключения) или перестать (None)"""
+        with self._lock:
+            self.location = location
+            self.failures = 0
+
+    def notify_status(self, status):
+        """Изменение состояния, замеченное снаружи. Отключение (пользователем, другим процессом) - не
+        деградация: перестаем следить и не переподключаемся. Свое переключение сюда тоже попадает - его пропускаем"""
+        if status != "disconnected":
+            return
+        with self._lock:
+            if self.switching or self.location is None:
+                return
+            location = self.location
+            self.location = None
+            self.failures = 0
+        self.on_event("stopped", {'location': location, 'reason': "VPN отключен"})
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if not self._stop.is_set():
+                self.check_once()
+
+    def check_health(self):
+        """Замер до probe_target через туннель: (True, None) или (False, причина)"""
+        if self.probe_target:
+            rtt = self.prober.probe({'target': self.probe_target})['target']
+            if rtt is None:
+                return False, f"{self.probe_target} недоступен"
+            if rtt > self.rtt_limit:
+                return False, f"задержка до {self.probe_target} {rtt:.0f} мс"
+        return True, None
+
+    def check_once(self):
+        """Одна проверка и, если порог превышен, попытка переключения"""
+        with self._lock:
+            location = self.location
+        if location is None:
+            return
+        if self.status_probe() == "disconnected":
+            self.notify_status("disconnected")
+            return
+        healthy, reason = self.check_health()
+        now = self.clock()
+        with self._lock:
+            if self.location != location:
+                return  # Пока шел замер, пользователь отключился или подключился к другой локации
+            if healthy:
+                self.failures = 0
+                if not self.failover_times or now - self.failover_times[-1] >= self.flap_window:
+                    self.backoff = self.backoff_initial
+                return
+            self.failures += 1
+            failures = self.failures
+            due = failures >= self.threshold and now >= self.next_attempt_at
+        
+        self.on_event("degraded", {'location': location, 'reason': reason, 'failures': failures})
+        if due:
+            # Последняя проверка и switch() - под блокировкой connect/disconnect клиента:
+            # отключение, начатое пользователем во время замера, либо уже завершилось, либо ждет нас
+            with self.client.vpn_lock:
+                self.failover(location, reason, now)
+
+    def failover(self, location, reason, now):
+        """Переход с деградировавшей location на следующую кандидатку (вызывается под client.vpn_lock)"""
+        if self.client.intended_location is None or self.status_probe() == "disconnected":
+            # VPN отключили намеренно, пока шел замер: ничего не поднимаем
+            with self._lock:
+                if self.location == location:
+                    self.location = None
+                    self.failures = 0
+            return
+        
+        candidate = None
+        event = None
+        with self._lock:
+            if self.location != location:
+                return
+            while self.failover_times and now - self.failover_times[0] >= self.flap_window:
+                self.failover_times.popleft()
+            if len(self.failover_times) >= self.flap_limit:
+                if not self.damped:
+                    event = ("damped", {'location': location, 'resume_in': self.flap_window - (now - self.failover_times[0])})
+                self.damped = True
+            else:
+                self.damped = False
+                candidate = self.next_candidate(location, now)
+                if candidate is None:
+                    self.schedule_retry(now)
+                    event = ("no_candidates", {'location': location, 'retry_in': self.next_attempt_at - now})
+                else:
+                    self.failover_times.append(now)
+                    self.failed_at[location] = now  # Не возвращаемся сразу на деградировавшую локацию
+                    self.switching = True
+        if candidate is None:
+            if event is not None:
+                self.on_event(*event)
+            return
+        
+        self.on_event("switching", {'location': candidate, 'previous': location, 'reason': reason})
+        try:
+            result, downtime = self.client.switch(candidate, self.get_password())
+        except subprocess.TimeoutExpired:
+            result, downtime = None, None
+        
+        with self._lock:
+            self.switching = False
+            self.schedule_retry(now)
+            retry_in = self.next_attempt_at - now
+            switched = result is not None and result.returncode == 0
+            if switched:
+                if self.location == location:
+                    self.location = candidate
+                self.failures = 0
+            else:
+                self.failed_at[candidate] = now
+        
+        if switched:
+            self.on_event("switched", {'location': candidate, 'previous': location, 'reason': reason, 'downtime': downtime})
+            return
+        error = "таймаут" if result is None else (result.stderr or result.stdout).strip()
+        self.on_event("failed", {'location': candidate, 'error': error, 'retry_in': retry_in})
+
+    def schedule_retry(self, now):
+        """Следующая попытка не раньше чем через текущую паузу; пауза удваивается"""
+        self.next_attempt_at = now + self.backoff
+        self.backoff = min(self.backoff * 2, self.backoff_max)
+
+    def next_candidate(self, current, now):
+        """Самая быстрая локация, кроме текущей и не сработавших за последние flap_window секунд"""
+        for code in self.candidates():
+            if code == current:
+                continue
+            if code in self.failed_at and now - self.failed_at[code] < self.flap_window:
+                continue
+            return code
+        return None
+# ==================== Конец АВТОПЕРЕКЛЮЧЕНИЕ ====================
+
+# ==================== Начало ПРОФИЛИРОВАНИЕ ЗАПУСКА ====================
+class StartupProfiler:
+    """Монотонные отметки фаз запуска; при достижении final_phase печатает разбивку и пишет JSON"""
+
+    def __init__(self, started=None, enabled=True, report_path=None, final_phase="ready_to_connect"):
+        self.started = time.monotonic() if started is None else started
+        self.enabled = enabled
+        self.report_path = report_path
+        self.final_phase = final_phase
+        self.meta = {}
+        self.phases = []  # [(фаза, секунды от started)] в порядке достижения
+        self.finished = False
+        self._seen = set()
+        self._lock = threading.Lock()
+
+    def mark(self, phase):
+        """Отметить фазу (учитывается только первое достижение)"""
+        if not self.enabled:
+            return
+        now = time.monotonic() - self.started
+        with self._lock:
+            if phase in self._seen or self.finished:
+                return
+            self._seen.add(phase)
+            self.phases.append((phase, now))
+        if phase == self.final_phase:
+            self.finish()
+
+    def report(self):
+        with self._lock:
+            phases = list(self.phases)
+        rows = []
+        previous = 0.0
+        for phase, at in phases:
+            rows.append({'phase': phase, 'at_ms': round(at * 1000, 1), 'delta_ms': round((at - previous) * 1000, 1)})
+            previous = at
+        return {
+            'meta': dict(self.meta, python=sys.version.split()[0], recorded_at=time.strftime("%Y-%m-%dT%H:%M:%S")),
+            'phases': rows,
+            'total_ms': rows[-1]['at_ms'] if rows else 0.0,
+            'complete': any(row['phase'] == self.final_phase for row in rows),
+        }
+
+    def finish(self):
+        """Печать разбивки и запись отчета (один раз; при закрытии окна - с тем, что успели замерить)"""
+        if not self.enabled:
+            return
+        with self._lock:
+            if self.finished:
+                return
+            self.finished = True
+        report = self.report()
+        print("=== ПРОФИЛЬ ЗАПУСКА ===")
+        for row in report['phases']:
+            print(f"{row['phase']:<26} +{row['delta_ms']:>9.1f} мс  {row['at_ms']:>10.1f} мс")
+        if not report['complete']:
+            print(f"Фаза {self.final_phase} не достигнута")
+        if self.report_path:
+            with open(self.report_path, "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            print(f"Отчет записан в {self.report_path}")
+# ==================== Конец ПРОФИЛИРОВАНИЕ ЗАПУСКА ====================
+
+# ==================== Начало ФОНОВАЯ ПРОВЕРКА ОБНОВЛЕНИЙ ====================
+def load_update_check():
+    """Последний сохраненный результат check-update: (UpdateInfo или None, время проверки)"""
+    try:
+        with open(UPDATE_CHECK_FILE, encoding="utf-8") as f:
+            data = json.load(f)
+        return UpdateInfo(data['status'], data['text']), float(data['checked_at'])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None, 0.0
+
+def save_update_check(update, checked_at):
+    """Атомарно сохраняем результат check-update на диск"""
+    data = {'checked_at': checked_at, 'status': update.status, 'text': update.text}
+    try:
+        os.makedirs(GUI_DATA_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=GUI_DATA_DIR, prefix=".update-check-")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, UPDATE_CHECK_FILE)
+    except OSError as e:
+        print(f"Не удалось сохранить результат проверки обновлений: {e}")
+
+
+class UpdateCheckScheduler:
+    """Фоновый check-update раз в interval (± jitter), только пока приложение простаивает.
+    
+    Первая проверка - не раньше idle_delay после start() и не раньше interval после прошлой
+    сохраненной. Если is_idle() ложно или VPN подключается/отключается, проверка откладывается
+    на idle_delay. on_result(update, checked_at) вызывается из потока планировщика.
+    """
+
+    def __init__(self, client, is_idle=None, on_result=None, interval=UPDATE_CHECK_INTERVAL,
+                 jitter=UPDATE_CHECK_JITTER, idle_delay=UPDATE_CHECK_IDLE_DELAY, retry=UPDATE_CHECK_RETRY,
+                 clock=time.time, rng=None):
+        self.client = client
+        self.is_idle = is_idle or (lambda: True)
+        self.on_result = on_result or (lambda update, checked_at: None)
+        self.interval = interval
+        self.jitter = jitter
+        self.idle_delay = idle_delay
+        self.retry = retry
+        self.clock = clock  # Время стенное: сравнивается с сохраненным на диске
+        self.rng = rng or random.Random()
+        self.due_at = 0.0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def jittered(self, seconds):
+        return seconds * self.rng.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def start(self, last_checked_at=0.0):
+        now = self.clock()
+        with self._lock:
+            self.due_at = max(last_checked_at + self.jittered(self.interval), now + self.jittered(self.idle_delay))
+        self._thread = threading.Thread(target=self._run, name="adguard-update-check", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def reschedule(self, checked_at):
+        """Проверку выполнили вручную: следующая фоновая - через interval от нее"""
+        with self._lock:
+            self.due_at = checked_at + self.jittered(self.interval)
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self._lock:
+                delay = self.due_at - self.clock()
+            if delay > 0:
+                self._wake.wait(delay)
+                self._wake.clear()
+                continue
+            self.check_once()
+
+    def check_once(self):
+        """Проверка, если пора и приложение простаивает; иначе - перенос срока"""
+        now = self.clock()
+        with self._lock:
+            if now < self.due_at:
+                return
+        if not self.is_idle():
+            self._postpone(now + self.jittered(self.idle_delay))
+            return
+        
+        outcome = self.client.check_update(blocking=False, fresh=True)
+        if outcome is None:
+            # Идет connect/disconnect: проверка не должна с ним пересекаться
+            self._postpone(now + self.jittered(self.idle_delay))
+            return
+        result, update = outcome
+        checked_at = self.clock()
+        if not check_update_succeeded(result, update):
+            self.client.log("Фоновая проверка обновлений не удалась, повторим позже")
+            self._postpone(checked_at + self.jittered(self.retry))
+            return
+        self._postpone(checked_at + self.jittered(self.interval))
+        self.on_result(update, checked_at)
+
+    def _postpone(self, due_at):
+        with self._lock:
+            self.due_at = due_at
+# ==================== Конец ФОНОВАЯ ПРОВЕРКА ОБНОВЛЕНИЙ ====================
+
+# ==================== Начало HEADLESS ====================
+def location_to_dict(location):
+    return {'code': location.code, 'name': location.name, 'ping': location.ping, 'rtt': location.rtt}
+
+
+def print_result(data, as_json, text):
+    """Вывод результата: JSON для скриптов или текст для человека"""
+    if as_json:
+        print(json.dumps(data, ensure_ascii=False))
+    else:
+        print(text)
+
+
+def print_locations(locations, as_json):
+    print_result(
+        [location_to_dict(loc) for loc in locations], as_json,
+        "\n".join(f"{loc.code}\t{loc.name}\t{loc.sort_ping}" for loc in locations)
+    )
+
+
+def print_update_check(update, checked_at, as_json):
+    print_result({'status': update.status, 'text': update.text, 'checked_at': checked_at}, as_json, update.text)
+
+
+def print_cli_error(result, default):
+    if result is None:
+        print(default, file=sys.stderr)
+    else:
+        print((result.stderr or result.stdout or default).strip(), file=sys.stderr)
+
+
+def headless_main(argv):
+    """Режим без GUI: одна команда, разобранный результат в stdout, код возврата 0 при успехе"""
+    parser = argparse.ArgumentParser(prog="adguardvpn-gui --headless", description="AdGuard VPN без графического интерфейса")
+    parser.add_argument("--json", action="store_true", help="вывод в JSON")
+    parser.add_argument("--verbose", action="store_true", help="журнал выполнения команд в stderr")
+    parser.add_argument("--password-stdin", action="store_true", help="пароль sudo из первой строки stdin")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("status", help="состояние VPN")
+    commands.add_parser("account", help="информация об аккаунте")
+    locations_parser = commands.add_parser("locations", help="список локаций")
+    locations_parser.add_argument("--cached", action="store_true", help="из кэша GUI, без запуска CLI")
+    connect_parser = commands.add_parser("connect", help="подключиться к локации")
+    connect_parser.add_argument("location")
+    commands.add_parser("disconnect", help="отключиться")
+    switch_parser = commands.add_parser("switch", help="перейти на другую локацию без отдельных disconnect/connect")
+    switch_parser.add_argument("location")
+    check_update_parser = commands.add_parser("check-update", help="проверить обновления adguardvpn-cli")
+    check_update_parser.add_argument("--cached", action="store_true", help="последний сохраненный результат, без запуска CLI")
+    exclusions_parser = commands.add_parser("exclusions", help="исключения сайтов")
+    exclusions_parser.add_argument("action", choices=("list", "add", "remove", "sync"))
+    exclusions_parser.add_argument("domains", nargs="*", help="домены (для sync - весь желаемый список; '-' - из stdin)")
+    args = parser.parse_args(argv)
+    
+    # Сохраненные результаты читаем без клиента: CLI не запускается, пул и кэш команд не нужны
+    if args.command == "locations" and args.cached:
+        locations, _ = load_locations_cache()
+        print_locations(locations, args.json)
+        return 0
+    if args.command == "check-update" and args.cached:
+        update, checked_at = load_update_check()
+        if update is None:
+            print("Проверка обновлений еще не выполнялась", file=sys.stderr)
+            return 1
+        print_update_check(update, checked_at, args.json)
+        return 0
+    
+    log = (lambda text: print(text, file=sys.stderr)) if args.verbose else None
+    client = AdGuardClient(log=log)
+    password = sys.stdin.readline().rstrip("\n") if args.password_stdin else None
+    
+    if args.command == "status":
+        status = client.status()
+        if status is None:
+            print("Ошибка проверки статуса", file=sys.stderr)
+            return 1
+        print_result({'status': status}, args.json, status)
+        return 0
+    
+    if args.command == "account":
+        account_info = client.account_info()
+        if account_info is None:
+            print("Требуется авторизация", file=sys.stderr)
+            return 1
+        print_result(account_info, args.json, format_account_info(account_info))
+        return 0
+    
+    if args.command == "locations":
+        result, locations = client.list_locations()
+        if not result or result.returncode != 0:
+            print_cli_error(result, "Ошибка загрузки локаций")
+            return 1
+        save_locations_cache(locations, time.time())
+        print_locations(locations, args.json)
+        return 0
+    
+    if args.command in ("connect", "disconnect"):
+        try:
+            if args.command == "connect":
+                result = client.connect(args.location, password)
+            else:
+                result = client.disconnect(password)
+        except subprocess.TimeoutExpired:
+            print("Таймаут выполнения команды", file=sys.stderr)
+            return 1
+        if result.returncode != 0:
+            print_cli_error(result, f"Ошибка: {args.command}")
+            return 1
+        status = "connected" if args.command == "connect" else "disconnected"
+        print_result({'status': status}, args.json, status)
+        return 0
+    
+    if args.command == "switch":
+        try:
+            result, downtime = client.switch(args.location, password)
+        except subprocess.TimeoutExpired:
+            print("Таймаут переключения локации", file=sys.stderr)
+            return 1
+        if result.returncode != 0:
+            print_cli_error(result, "Ошибка переключения локации")
+            return 1
+        text = "connected" if downtime is None else f"connected (туннель недоступен {downtime:.2f} с)"
+        print_result({'status': "connected", 'location': args.location, 'downtime': downtime}, args.json, text)
+        return 0
+    
+    if args.command == "check-update":
+        result, update = client.check_update()
+        if not check_update_succeeded(result, update):
+            print_cli_error(result, "Ошибка проверки обновлений")
+            return 1
+        print_update_check(update, time.time(), args.json)
+        return 0
+    
+    # exclusions
+    domains = args.domains
+    if domains == ["-"]:
+        domains = [line.strip() for line in sys.stdin if line.strip()]
+    if args.action == "list":
+        result, domains = client.list_exclusions()
+        if not result or result.returncode != 0:
+            print_cli_error(result, "Ошибка получения списка исключений")
+            return 1
+        print_result(domains, args.json, "\n".join(domains))
+        return 0
+    if args.action == "sync":
+        try:
+            failed = client.sync_exclusions(domains)
+        except (ValueError, RuntimeError) as e:
+            print(str(e), file=sys.stderr)
+            return 1
+        print_result({'failed': failed}, args.json, "\n".join(failed))
+        return 1 if failed else 0
+    
+    failed = []
+    for domain in domains:
+        result = client.add_exclusion(domain) if args.action == "add" else client.remove_exclusion(domain)
+        if not result or result.returncode != 0:
+            failed.append(domain)
+    print_result({'failed': failed}, args.json, "\n".join(failed))
+    return 1 if failed else 0
+# ==================== Конец HEADLESS ====================
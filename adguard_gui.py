@@ -0,0 +1,2220 @@
+#!/usr/bin/env python3
+# ==================== ADGUARD VPN GUI ====================
+# ВЕРСИЯ: 1.6.1 (фиксированная структура интерфейса)
+# Окно GTK; команды adguardvpn-cli выполняет AdGuardClient из adguard_client.py
+# БЛОК ИМПОРТОВ
+import gi
+import sys
+import subprocess
+import threading
+import re
+import os
+import time
+import queue
+import socket
+import itertools
+from collections import deque, namedtuple
+from getpass import getuser
+
+from adguard_client import (
+    ADGUARD_PATH, ADGUARD_CONFIG_DIR, LOCATIONS_CACHE_TTL,
+    AdGuardClient, LocationStore, probe_vpn_interface, load_probe_endpoints, PROBE_ENDPOINTS_FILE,
+    parse_location_line, parse_locations,
+    load_locations_cache, save_locations_cache, clean_ansi_codes, parse_account_info,
+    format_account_info, parse_update_result, StartupProfiler, MetricsExporter,
+    FAILOVER_ENABLED, FailoverController, UPDATE_CHECK_INTERVAL, UpdateCheckScheduler, UpdateInfo,
+    load_update_check, save_update_check, check_update_succeeded,
+)
+
+# Принудительно используем Cairo-рендерер для GTK4 в окружениях без GL (headless/VM/SSH)
+if "GSK_RENDERER" not in os.environ:
+    os.environ["GSK_RENDERER"] = "cairo"
+
+gi.require_version('Gtk', '4.0')
+gi.require_version('Adw', '1')
+from gi.repository import Gtk, Adw, GLib, Gio, GObject
+
+try:
+    # PyGObject >= 3.50: цикл asyncio на главном контексте GLib
+    from gi.events import GLibEventLoopPolicy
+except ImportError:
+    GLibEventLoopPolicy = None
+
+# ==================== КОНФИГУРАЦИЯ ====================
+VERSION = "1.6.1"
+APP_ID = "com.example.AdGuardVPN"
+CURRENT_USER = getuser()
+LOCATIONS_BATCH_SIZE = 25  # Сколько локаций добавлять в список за одно обновление UI
+LOCATIONS_BATCH_INTERVAL = 0.1  # Не держим готовые строки дольше этого времени (сек)
+AUTH_URL_RE = re.compile(r'https?://\S+')  # Ссылка авторизации в выводе login
+STATUS_POLL_MIN = 0.5  # Начальный интервал резервного опроса статуса (сек)
+STATUS_POLL_MAX = 10.0  # Максимальный интервал опроса, пока состояние не меняется (сек)
+STATUS_EVENT_DEBOUNCE_MS = 100  # Пачку событий inotify/netlink обрабатываем одной проверкой
+STATUS_CONFIRM_INTERVAL = 60.0  # Подтверждаем состояние командой status не реже этого, даже без событий (сек)
+STATUS_SELF_EVENT_WINDOW = 1.0  # События в каталоге CLI сразу после своего status - от него самого (сек)
+LOG_CAPACITY = 2000  # Сколько последних записей журнала держим в памяти
+AUTH_PANEL_MAX_LINES = 50  # Сколько строк журнала показываем на вкладке авторизации
+# Запрашивать site-exclusions list при запуске вместе с license/status/list-locations
+STARTUP_FETCH_EXCLUSIONS = os.environ.get("ADGUARD_GUI_STARTUP_EXCLUSIONS", "0") == "1"
+# Строить все вкладки при запуске, как до ленивого построения (для сравнения --profile-startup)
+EAGER_TABS = os.environ.get("ADGUARD_GUI_EAGER_TABS", "0") == "1"
+LOGIN_TIMEOUT = 600  # Сколько login ждет подтверждения в браузере, затем процесс завершается (сек)
+
+# Идентификаторы сообщений журнала
+MSG_AUTH_CHECK = "auth_check"
+MSG_AUTH_CONFIRMED = "auth_confirmed"
+MSG_LOGIN_WAITING = "login_waiting"
+MSG_LOGIN_INPUT_SENT = "login_input_sent"
+MSG_LOGIN_OUTPUT = "login_output"
+MSG_LOGIN_URL = "login_url"
+MSG_LOGIN_OK = "login_ok"
+MSG_LOGOUT_OK = "logout_ok"
+# Сообщения, которые выводятся на вкладке авторизации (остальные только в консоль)
+AUTH_PANEL_MESSAGES = frozenset({
+    MSG_AUTH_CHECK, MSG_AUTH_CONFIRMED, MSG_LOGIN_WAITING, MSG_LOGIN_INPUT_SENT,
+    MSG_LOGIN_OUTPUT, MSG_LOGIN_URL, MSG_LOGIN_OK, MSG_LOGOUT_OK,
+})
+
+# ==================== Начало ЭЛЕМЕНТЫ СПИСКА ЛОКАЦИЙ ====================
+class LocationItem(GObject.Object):
+    """Элемент модели списка локаций для Gtk.DropDown: ссылка на запись, без копий строк"""
+    __gtype_name__ = "AdGuardLocationItem"
+
+    def __init__(self, index, location):
+        super().__init__()
+        self.index = index
+        self.location = location
+
+    @GObject.Property(type=str, default="")
+    def display(self):
+        return self.location.display
+# ==================== Конец ЭЛЕМЕНТЫ СПИСКА ЛОКАЦИЙ ====================
+
+# ==================== Начало СОСТОЯНИЕ ПРИЛОЖЕНИЯ ====================
+AppState = namedtuple("AppState", [
+    "auth",  # "unknown" | "authenticated" | "unauthenticated"
+    "auth_checking",
+    "login_busy",
+    "logout_busy",
+    "account_info",
+    "account_text",
+    "vpn_status",  # "disconnected" | "connecting" | "connected" | "disconnecting" | "switching"
+    "connected_location",  # код локации текущего туннеля (None - неизвестна или нет подключения)
+    "location_code",
+    "location_name",
+    "locations_available",
+    "locations_loading",
+    "stats_text",
+    "exclusions",  # отсортированный кортеж доменов
+    "exclusions_status",
+    "update_status_text",
+    "busy",  # frozenset имен выполняющихся операций (check_update, update, export_logs, ...)
+])
+
+INITIAL_STATE = AppState(
+    auth="unknown",
+    auth_checking=False,
+    login_busy=False,
+    logout_busy=False,
+    account_info={},
+    account_text="Нажмите 'Проверить авторизацию'",
+    vpn_status="disconnected",
+    connected_location=None,
+    location_code=None,
+    location_name=None,
+    locations_available=False,
+    locations_loading=False,
+    stats_text="Нажмите 'Проверить статус' для начала работы",
+    exclusions=(),
+    exclusions_status="Нажмите 'Показать исключения'",
+    update_status_text="Статус обновлений: Не проверен",
+    busy=frozenset(),
+)
+
+# Действия, которыми меняется состояние
+ACTION_AUTH_CHECK_STARTED = "auth_check_started"
+ACTION_AUTH_CHECKED = "auth_checked"  # authenticated, account_info, account_text
+ACTION_AUTH_CHECK_FAILED = "auth_check_failed"  # error
+ACTION_LOGIN_STARTED = "login_started"
+ACTION_LOGIN_FINISHED = "login_finished"  # success
+ACTION_LOGOUT_STARTED = "logout_started"
+ACTION_LOGOUT_FINISHED = "logout_finished"  # success
+ACTION_VPN_STATUS = "vpn_status"  # status, stats_text и location (необязательно)
+ACTION_STATS = "stats"  # text
+ACTION_LOCATION_SELECTED = "location_selected"  # code, name
+ACTION_LOCATIONS_AVAILABLE = "locations_available"  # available
+ACTION_LOCATIONS_LOADING = "locations_loading"  # loading
+ACTION_EXCLUSIONS_LOADED = "exclusions_loaded"  # domains
+ACTION_EXCLUSIONS_FAILED = "exclusions_failed"  # error
+ACTION_UPDATE_STATUS = "update_status"  # text
+ACTION_BUSY = "busy"  # name, busy
+
+VPN_STATUS_STATS = {
+    "connecting": "Устанавливаем соединение...",
+    "disconnecting": "Разрываем соединение...",
+    "switching": "Переключаем локацию...",
+}
+
+
+def reduce_state(state, action, payload):
+    """Новое состояние по действию (состояние не изменяется на месте)"""
+    if action == ACTION_AUTH_CHECK_STARTED:
+        return state._replace(auth_checking=True, account_text="Проверка авторизации...")
+    elif action == ACTION_AUTH_CHECKED:
+        authenticated = payload['authenticated']
+        return state._replace(
+            auth="authenticated" if authenticated else "unauthenticated",
+            auth_checking=False,
+            account_info=payload.get('account_info', {}),
+            account_text=payload['account_text'],
+            stats_text="Авторизация успешна!" if authenticated else "Требуется авторизация"
+        )
+    elif action == ACTION_AUTH_CHECK_FAILED:
+        return state._replace(auth_checking=False, account_text=payload['error'])
+    elif action == ACTION_LOGIN_STARTED:
+        return state._replace(login_busy=True)
+    elif action == ACTION_LOGIN_FINISHED:
+        auth = "authenticated" if payload['success'] else state.auth
+        return state._replace(login_busy=False, auth=auth)
+    elif action == ACTION_LOGOUT_STARTED:
+        return state._replace(logout_busy=True)
+    elif action == ACTION_LOGOUT_FINISHED:
+        auth = "unauthenticated" if payload['success'] else state.auth
+        return state._replace(logout_busy=False, auth=auth)
+    elif action == ACTION_VPN_STATUS:
+        status = payload['status']
+        stats_text = payload.get('stats_text') or VPN_STATUS_STATS.get(status, state.stats_text)
+        connected_location = None if status == "disconnected" else payload.get('location', state.connected_location)
+        return state._replace(vpn_status=status, stats_text=stats_text, connected_location=connected_location)
+    elif action == ACTION_STATS:
+        return state._replace(stats_text=payload['text'])
+    elif action == ACTION_LOCATION_SELECTED:
+        return state._replace(location_code=payload['code'], location_name=payload['name'])
+    elif action == ACTION_LOCATIONS_AVAILABLE:
+        return state._replace(locations_available=payload['available'])
+    elif action == ACTION_LOCATIONS_LOADING:
+        return state._replace(locations_loading=payload['loading'])
+    elif action == ACTION_EXCLUSIONS_LOADED:
+        domains = tuple(payload['domains'])
+        return state._replace(exclusions=domains, exclusions_status=f"Исключений: {len(domains)}")
+    elif action == ACTION_EXCLUSIONS_FAILED:
+        return state._replace(exclusions_status=f"Ошибка: {payload['error']}")
+    elif action == ACTION_UPDATE_STATUS:
+        return state._replace(update_status_text=payload['text'])
+    elif action == ACTION_BUSY:
+        if payload['busy']:
+            return state._replace(busy=state.busy | {payload['name']})
+        return state._replace(busy=state.busy - {payload['name']})
+    raise ValueError(f"Неизвестное действие: {action}")
+
+
+class StateStore:
+    """Единое состояние приложения; действия из любых потоков идут в главный цикл через одну очередь"""
+
+    def __init__(self, render, initial=INITIAL_STATE):
+        self.state = initial
+        self._render = render
+        self._queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._drain_scheduled = False
+        self._rendering = False
+
+    def dispatch(self, action, **payload):
+        """Применить действие: в главном потоке сразу, из рабочих потоков - через очередь"""
+        self._queue.put((action, payload))
+        if threading.current_thread() is threading.main_thread() and not self._rendering:
+            self._drain()
+            return
+        with self._lock:
+            if self._drain_scheduled:
+                return
+            self._drain_scheduled = True
+        GLib.idle_add(self._drain)
+
+    def _drain(self):
+        """Применяем все накопленные действия и отрисовываем один раз"""
+        with self._lock:
+            self._drain_scheduled = False
+        old_state = self.state
+        new_state = old_state
+        while True:
+            try:
+                action, payload = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            new_state = reduce_state(new_state, action, payload)
+        
+        if new_state != old_state:
+            self.state = new_state
+            self._rendering = True
+            try:
+                self._render(new_state)
+            finally:
+                self._rendering = False
+        return False
+# ==================== Конец СОСТОЯНИЕ ПРИЛОЖЕНИЯ ====================
+
+# ==================== Начало ЖУРНАЛ ====================
+LogRecord = namedtuple("LogRecord", "seq timestamp msg_id text")
+
+
+class LogRingBuffer:
+    """Журнал фиксированной емкости: запись из любого потока без блокировок"""
+
+    def __init__(self, capacity=LOG_CAPACITY):
+        self._records = deque(maxlen=capacity)
+        self._seq = itertools.count(1)
+
+    def append(self, msg_id, text):
+        """Добавляем запись; самые старые вытесняются при переполнении"""
+        # next() и deque.append атомарны под GIL, отдельная блокировка не нужна
+        self._records.append(LogRecord(next(self._seq), time.time(), msg_id, text))
+
+    def since(self, seq):
+        """Записи с номером больше seq (вытесненные уже недоступны)"""
+        return [record for record in list(self._records) if record.seq > seq]
+# ==================== Конец ЖУРНАЛ ====================
+
+# ==================== Начало ВСПОМОГАТЕЛЬНЫЕ ФУНКЦИИ СПИСКОВ ====================
+def sorted_list_splices(old, new):
+    """Операции (позиция, удалить, добавить), превращающие отсортированный old в new.
+    
+    Позиции даны с учетом уже примененных операций, их можно сразу передавать в splice.
+    """
+    operations = []
+    i = j = position = 0
+    while i < len(old) or j < len(new):
+        if i < len(old) and j < len(new) and old[i] == new[j]:
+            i += 1
+            j += 1
+            position += 1
+            continue
+        
+        start = position
+        n_removals = 0
+        additions = []
+        while (i < len(old) or j < len(new)) and not (i < len(old) and j < len(new) and old[i] == new[j]):
+            if j >= len(new) or (i < len(old) and old[i] < new[j]):
+                n_removals += 1
+                i += 1
+            else:
+                additions.append(new[j])
+                j += 1
+        operations.append((start, n_removals, additions))
+        position = start + len(additions)
+    return operations
+# ==================== Конец ВСПОМОГАТЕЛЬНЫЕ ФУНКЦИИ СПИСКОВ ====================
+
+# ==================== Начало МОНИТОР СТАТУСА VPN ====================
+class VpnStatusMonitor:
+    """Следит за состоянием VPN и вызывает on_change только при его изменении.
+    
+    Состояние подтверждает команда status (confirm): TUN-интерфейс в sysfs (hint) - только дешевая
+    подсказка, tun0 может принадлежать другому VPN, а в режиме SOCKS его нет. status запускается по
+    событиям - inotify на ADGUARD_CONFIG_DIR (Gio.FileMonitor), netlink-уведомления об интерфейсах,
+    изменение подсказки при резервном опросе (интервал растет от STATUS_POLL_MIN до STATUS_POLL_MAX) -
+    и не реже STATUS_CONFIRM_INTERVAL. confirm(callback) не ждет ответа: callback(состояние или None)
+    вызывается в главном потоке.
+    """
+
+    def __init__(self, on_change, confirm, hint=probe_vpn_interface):
+        self.on_change = on_change
+        self.confirm = confirm
+        self.hint = hint
+        self.state = None
+        self.last_hint = None
+        self.confirming = False
+        self.confirm_again = False  # Пока шел status, пришло событие netlink: проверяем еще раз
+        self.confirmed_at = 0.0  # time.monotonic() ответа последнего status
+        self.poll_interval = STATUS_POLL_MIN
+        self._poll_source = None
+        self._debounce_source = None
+        self._debounce_confirm = False
+        self._file_monitor = None
+        self._netlink = None
+
+    def start(self):
+        """Подписываемся на события и выполняем первую проверку"""
+        try:
+            config_dir = Gio.File.new_for_path(ADGUARD_CONFIG_DIR)
+            self._file_monitor = config_dir.monitor_directory(Gio.FileMonitorFlags.WATCH_MOVES, None)
+            self._file_monitor.connect("changed", self._on_config_changed)
+        except GLib.Error as e:
+            print(f"Мониторинг {ADGUARD_CONFIG_DIR} недоступен: {e.message}")
+        
+        try:
+            self._netlink = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, socket.NETLINK_ROUTE)
+            self._netlink.bind((0, 0x1))  # RTMGRP_LINK: появление/исчезновение и UP/DOWN интерфейсов
+            self._netlink.setblocking(False)
+            GLib.io_add_watch(self._netlink.fileno(), GLib.PRIORITY_DEFAULT, GLib.IOCondition.IN, self._on_netlink)
+        except (OSError, AttributeError) as e:
+            self._netlink = None
+            print(f"Уведомления netlink недоступны: {e}")
+        
+        self.check(confirm=True)
+
+    def schedule_check(self, confirm=False):
+        """Отложенная проверка: несколько событий подряд дают одну проверку"""
+        self._debounce_confirm = self._debounce_confirm or confirm
+        if self._debounce_source is None:
+            self._debounce_source = GLib.timeout_add(STATUS_EVENT_DEBOUNCE_MS, self._on_debounce)
+
+    def _on_debounce(self):
+        self._debounce_source = None
+        confirm, self._debounce_confirm = self._debounce_confirm, False
+        self.check(confirm)
+        return False
+
+    def _on_config_changed(self, *args):
+        # CLI пишет в свой каталог при каждом запуске, в том числе при нашем status: такие события пропускаем
+        if self.confirming or time.monotonic() - self.confirmed_at < STATUS_SELF_EVENT_WINDOW:
+            return
+        self.schedule_check(confirm=True)
+
+    def _on_netlink(self, fd, condition):
+        try:
+            while self._netlink.recv(65536):
+                pass
+        except BlockingIOError:
+            pass
+        except OSError:
+            return True
+        self.schedule_check(confirm=True)
+        return True
+
+    def _on_poll(self):
+        self._poll_source = None
+        self.check()
+        return False
+
+    def check(self, confirm=False):
+        """Смотрим подсказку; status запускаем по событию, при ее изменении и по STATUS_CONFIRM_INTERVAL"""
+        hint = self.hint()
+        if hint != self.last_hint:
+            self.last_hint = hint
+            confirm = True
+        if time.monotonic() - self.confirmed_at >= STATUS_CONFIRM_INTERVAL:
+            confirm = True
+        
+        if confirm:
+            self.request_status()
+        else:
+            self.poll_interval = min(self.poll_interval * 2, STATUS_POLL_MAX)
+        self.schedule_poll()
+
+    def request_status(self):
+        """Один status за раз: события во время выполнения дают еще одну проверку после ответа"""
+        if self.confirming:
+            self.confirm_again = True
+            return
+        self.confirming = True
+        self.confirm(self._on_status)
+
+    def _on_status(self, state):
+        """Ответ status (в главном потоке): при изменении сообщаем и сбрасываем интервал опроса"""
+        self.confirming = False
+        self.confirmed_at = time.monotonic()
+        if state is not None and state != self.state:
+            self.state = state
+            self.poll_interval = STATUS_POLL_MIN
+            self.schedule_poll()
+            self.on_change(state)
+        if self.confirm_again:
+            self.confirm_again = False
+            self.request_status()
+
+    def schedule_poll(self):
+        if self._poll_source is not None:
+            GLib.source_remove(self._poll_source)
+        self._poll_source = GLib.timeout_add(int(self.poll_interval * 1000), self._on_poll)
+# ==================== Конец МОНИТОР СТАТУСА VPN ====================
+
+# ==================== Начало ГЛАВНОЕ ОКНО ====================
+class AdGuardVPNWindow(Gtk.ApplicationWindow):
+    def __init__(self, application, profiler=None):
+        super().__init__(application=application, title=f"AdGuard VPN v{VERSION}")
+        self.init_started = time.perf_counter()
+        self.profiler = profiler or StartupProfiler(enabled=False)
+        self.profiler.meta['version'] = VERSION
+        self.profiler.meta['eager_tabs'] = EAGER_TABS
+        self.profiler.mark("window_created")
+        self.set_default_size(600, 700)
+        
+        # Устанавливаем правильную рабочую директорию и окружение
+        os.chdir(os.path.expanduser("~"))
+        os.environ['HOME'] = os.path.expanduser("~")
+        
+        print(f"=== ИНИЦИАЛИЗАЦИЯ ПРОГРАММЫ v{VERSION} ===")
+        print(f"Рабочая директория: {os.getcwd()}")
+        print(f"Пользователь: {CURRENT_USER}")
+        print(f"Конфиг AdGuard: {ADGUARD_CONFIG_DIR}")
+        print(f"Python: {sys.version}")
+        self.profiler.mark("env_setup")
+        
+        self.store = StateStore(self.render_state)
+        self.rendered_view = {}  # Последние примененные к виджетам значения
+        self.built_tabs = set()  # Построенные вкладки, кроме главной
+        self.locations = []
+        self.fast_locations = []
+        self.location_store = LocationStore()
+        self.visible_location_indices = set()
+        self.sudo_password = None
+        self.sudo_password_remembered = False
+        self.log_buffer = LogRingBuffer()
+        self.log_flush_pending = False
+        self.log_flushed_seq = 0
+        self.shown_exclusions = []  # Содержимое exclusions_model (отсортировано)
+        # Подпроцессы CLI обслуживает asyncio на главном цикле GLib: ожидание ответа не занимает потоков,
+        # результаты приходят в главный поток через GLib.idle_add. Без gi.events - цикл в отдельном потоке
+        loop = GLibEventLoopPolicy().get_event_loop() if GLibEventLoopPolicy is not None else None
+        self.client = AdGuardClient(log=self.append_auth_log, dispatch=GLib.idle_add, loop=loop)
+        self.executor = self.client.executor
+        self.transport = self.client.transport
+        self.prober = self.client.prober
+        # Задержки, коды возврата и объем вывода всех вызовов CLI - в файл для node_exporter
+        self.metrics_exporter = MetricsExporter(self.client.metrics)
+        self.metrics_exporter.start()
+        # Автопереключение при деградации туннеля (ADGUARD_GUI_FAILOVER=1)
+        self.failover = None
+        if FAILOVER_ENABLED:
+            self.failover = FailoverController(
+                self.client, candidates=self.failover_candidates, get_password=self.failover_password,
+                on_event=lambda kind, info: GLib.idle_add(self.on_failover_event, kind, info)
+            )
+            self.failover.start()
+        self.locations_fetched_at = 0.0
+        self.auth_checked = threading.Event()  # license при запуске завершился
+        self.login_future = None  # Идущий login: отменяется при закрытии окна и повторном входе
+        self.startup_locations = None  # list-locations запуска, пришедший раньше license: ждет его ответа
+        self.startup_authenticated = False
+        self.update_checked_at = 0.0  # Время последней сохраненной проверки обновлений
+        self.update_scheduler = None
+        
+        self.setup_ui()
+        self.render_state(self.store.state)
+        self.add_tick_callback(self.on_first_frame)
+        self.connect("close-request", self.on_close_request)
+        self.profiler.mark("setup_ui")
+        # Сразу показываем последний сохраненный список локаций, обновим его в фоне
+        self.show_cached_locations()
+        self.profiler.mark("cached_locations")
+        self.show_cached_update_check()
+        self.check_adguard_installed()
+        self.profiler.mark("check_adguard_installed")
+        
+        # Состояние VPN отслеживаем по событиям: status запускается, только когда есть повод
+        self.status_monitor = VpnStatusMonitor(
+            self.on_monitored_vpn_status, lambda callback: self.client.submit_status(callback, fresh=True)
+        )
+        self.status_monitor.start()
+        self.profiler.mark("status_monitor")
+        
+        # Независимые запросы запуска - одновременно, каждый результат применяется по готовности
+        self.start_startup_queries()
+        self.profiler.mark("startup_queries")
+        
+        # check-update - в фоне, когда запуск закончился и пользователь ничего не ждет (ADGUARD_GUI_UPDATE_INTERVAL=0 - выключено)
+        if UPDATE_CHECK_INTERVAL > 0:
+            self.update_scheduler = UpdateCheckScheduler(
+                self.client, is_idle=self.is_idle, on_result=self.on_scheduled_update_check
+            )
+            self.update_scheduler.start(self.update_checked_at)
+# ==================== Конец ГЛАВНОЕ ОКНО ====================
+
+# ==================== Начало НАСТРОЙКА ИНТЕРФЕЙСА ====================
+    def setup_ui(self):
+        # Главный контейнер с вкладками
+        self.notebook = Gtk.Notebook()
+        self.set_child(self.notebook)
+        
+        # Вкладка Основные функции (строится сразу, остальные - при первом открытии)
+        main_tab = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=10)
+        main_tab.set_margin_top(10)
+        main_tab.set_margin_bottom(10)
+        main_tab.set_margin_start(10)
+        main_tab.set_margin_end(10)
+        self.notebook.append_page(main_tab, Gtk.Label(label="Главная"))
+        
+        # Вкладка Авторизация (только создаем пустую вкладку)
+        auth_tab = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=10)
+        auth_tab.set_margin_top(10)
+        auth_tab.set_margin_bottom(10)
+        auth_tab.set_margin_start(10)
+        auth_tab.set_margin_end(10)
+        self.notebook.append_page(auth_tab, Gtk.Label(label="Авторизация"))
+        
+        # Вкладка Настройки
+        settings_tab = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=10)
+        settings_tab.set_margin_top(10)
+        settings_tab.set_margin_bottom(10)
+        settings_tab.set_margin_start(10)
+        settings_tab.set_margin_end(10)
+        self.notebook.append_page(settings_tab, Gtk.Label(label="Настройки"))
+        
+        # Вкладка Дополнительно
+        extra_tab = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=10)
+        extra_tab.set_margin_top(10)
+        extra_tab.set_margin_bottom(10)
+        extra_tab.set_margin_start(10)
+        extra_tab.set_margin_end(10)
+        self.notebook.append_page(extra_tab, Gtk.Label(label="Дополнительно"))
+        
+        self.tab_builders = {
+            "auth": (auth_tab, self.build_auth_tab),
+            "settings": (settings_tab, self.build_settings_tab),
+            "extra": (extra_tab, self.build_extra_tab),
+        }
+        self.build_main_tab(main_tab)
+        if EAGER_TABS:
+            for name, (tab, builder) in self.tab_builders.items():
+                builder(tab)
+                self.built_tabs.add(name)
+            self.request_log_flush()
+        self.notebook.connect("switch-page", self.on_notebook_switch_page)
+
+    def on_notebook_switch_page(self, notebook, page, page_num):
+        """Первое открытие вкладки: строим ее содержимое и применяем текущее состояние"""
+        for name, (tab, builder) in self.tab_builders.items():
+            if tab is page and name not in self.built_tabs:
+                started = time.perf_counter()
+                builder(tab)
+                self.built_tabs.add(name)
+                self.render_state(self.store.state)
+                print(f"Вкладка {name} построена за {(time.perf_counter() - started) * 1000:.1f} мс")
+                if name == "auth":
+                    # Сообщения журнала, пришедшие до открытия вкладки
+                    self.request_log_flush()
+                break
+
+    def build_main_tab(self, main_tab):
+        # ===== ГЛАВНАЯ ВКЛАДКА =====
+        # Статус VPN
+        self.status_frame = Gtk.Frame()
+        self.status_frame.set_hexpand(True)
+        main_tab.append(self.status_frame)
+        
+        status_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=5)
+        status_box.set_margin_top(15)
+        status_box.set_margin_bottom(15)
+        status_box.set_margin_start(15)
+        status_box.set_margin_end(15)
+        self.status_frame.set_child(status_box)
+        
+        self.status_icon = Gtk.Image.new_from_icon_name("network-vpn-disabled-symbolic")
+        self.status_icon.set_pixel_size(64)
+        status_box.append(self.status_icon)
+        
+        self.status_label = Gtk.Label(label="VPN отключен")
+        self.status_label.add_css_class("title-1")
+        status_box.append(self.status_label)
+        
+        self.location_label = Gtk.Label(label="Локация: не выбрана")
+        self.location_label.add_css_class("dim-label")
+        status_box.append(self.location_label)
+        
+        # Статус авторизации
+        self.auth_status_label = Gtk.Label(label="Статус авторизации: Проверка...")
+        self.auth_status_label.add_css_class("dim-label")
+        status_box.append(self.auth_status_label)
+        
+        # Кнопка обновления локаций
+        self.refresh_locations_btn = Gtk.Button(label="Обновить локации")
+        self.refresh_locations_btn.connect("clicked", self.on_refresh_locations_clicked)
+        main_tab.append(self.refresh_locations_btn)
+        
+        # Разделитель
+        main_tab.append(Gtk.Separator())
+        
+        # Выбор локации
+        location_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=5)
+        main_tab.append(location_box)
+        
+        location_label = Gtk.Label(label="Доступные локации:")
+        location_label.set_halign(Gtk.Align.START)
+        location_box.append(location_label)
+        
+        self.location_spinner = Gtk.Spinner()
+        location_box.append(self.location_spinner)
+        
+        # Поиск по всем локациям; пустой запрос показывает самые быстрые
+        self.location_search = Gtk.SearchEntry()
+        self.location_search.set_placeholder_text("Поиск: код, страна или город")
+        self.location_search.connect("search-changed", self.on_location_search_changed)
+        location_box.append(self.location_search)
+        
+        # Модель: все локации -> фильтр по индексу хранилища -> сортировка по пингу
+        self.location_model = Gio.ListStore(item_type=LocationItem)
+        self.location_filter = Gtk.CustomFilter.new(
+            lambda item: item.index in self.visible_location_indices
+        )
+        filter_model = Gtk.FilterListModel(model=self.location_model, filter=self.location_filter)
+        sorter = Gtk.CustomSorter.new(self.compare_location_items)
+        self.location_sorted_model = Gtk.SortListModel(model=filter_model, sorter=sorter)
+        
+        self.location_dropdown = Gtk.DropDown(
+            model=self.location_sorted_model,
+            expression=Gtk.PropertyExpression.new(LocationItem, None, "display")
+        )
+        self.location_dropdown.set_sensitive(False)
+        self.location_dropdown.connect("notify::selected", self.on_location_changed)
+        location_box.append(self.location_dropdown)
+        
+        # Объединенная кнопка подключения/отключения
+        self.vpn_action_btn = Gtk.Button(label="Подключить")
+        self.vpn_action_btn.add_css_class("suggested-action")
+        self.vpn_action_btn.set_hexpand(True)
+        self.vpn_action_btn.set_sensitive(False)
+        self.vpn_action_btn.connect("clicked", self.on_vpn_action_clicked)
+        main_tab.append(self.vpn_action_btn)
+        
+        # Переход на выбранную локацию без отключения (доступен при подключенном VPN)
+        self.switch_location_btn = Gtk.Button(label="Переключиться на выбранную локацию")
+        self.switch_location_btn.set_hexpand(True)
+        self.switch_location_btn.set_sensitive(False)
+        self.switch_location_btn.connect("clicked", self.on_switch_location_clicked)
+        main_tab.append(self.switch_location_btn)
+        
+        # Кнопка статуса
+        self.status_btn = Gtk.Button(label="Проверить статус")
+        self.status_btn.set_hexpand(True)
+        self.status_btn.connect("clicked", self.on_status_clicked)
+        main_tab.append(self.status_btn)
+        
+        # Разделитель
+        main_tab.append(Gtk.Separator())
+        
+        # Статус и информация
+        stats_frame = Gtk.Frame()
+        stats_frame.set_hexpand(True)
+        main_tab.append(stats_frame)
+        
+        stats_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=5)
+        stats_box.set_margin_top(10)
+        stats_box.set_margin_bottom(10)
+        stats_box.set_margin_start(10)
+        stats_box.set_margin_end(10)
+        stats_frame.set_child(stats_box)
+        
+        stats_title = Gtk.Label(label="Информация о подключении")
+        stats_title.add_css_class("heading")
+        stats_box.append(stats_title)
+        
+        self.stats_label = Gtk.Label(label="Нажмите 'Проверить статус' для начала работы")
+        self.stats_label.set_selectable(True)
+        self.stats_label.set_wrap(True)
+        stats_box.append(self.stats_label)
+
+    def build_auth_tab(self, auth_tab):
+        # ===== ВКЛАДКА АВТОРИЗАЦИИ =====
+        # Главный контейнер с фиксированной структурой
+        main_auth_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=10)
+        main_auth_box.set_margin_top(10)
+        main_auth_box.set_margin_bottom(10)
+        main_auth_box.set_margin_start(10)
+        main_auth_box.set_margin_end(10)
+        auth_tab.append(main_auth_box)
+
+        # ЗАГОЛОВОК (фиксированный вверху)
+        auth_title = Gtk.Label(label="Авторизация AdGuard VPN")
+        auth_title.add_css_class("title-2")
+        main_auth_box.append(auth_title)
+
+        # КНОПКИ (фиксированные вверху)
+        auth_buttons_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
+        auth_buttons_box.set_margin_top(10)
+        auth_buttons_box.set_margin_bottom(10)
+        main_auth_box.append(auth_buttons_box)
+
+        self.check_auth_btn = Gtk.Button(label="Проверить авторизацию")
+        self.check_auth_btn.connect("clicked", self.on_check_auth_clicked)
+        auth_buttons_box.append(self.check_auth_btn)
+
+        self.login_btn = Gtk.Button(label="Войти в AdGuard VPN")
+        self.login_btn.connect("clicked", self.on_login_clicked)
+        auth_buttons_box.append(self.login_btn)
+
+        self.logout_btn = Gtk.Button(label="Выйти из AdGuard VPN")
+        self.logout_btn.connect("clicked", self.on_logout_clicked)
+        auth_buttons_box.append(self.logout_btn)
+
+        # Ссылка авторизации (появляется, как только login ее напечатает)
+        self.auth_url_btn = Gtk.LinkButton(label="Открыть страницу авторизации")
+        self.auth_url_btn.set_visible(False)
+        main_auth_box.append(self.auth_url_btn)
+
+        # РАСШИРЯЕМЫЙ ПРОМЕЖУТОК (чтобы статус был внизу)
+        expander_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
+        expander_box.set_vexpand(True)
+        main_auth_box.append(expander_box)
+
+        # СТАТУС (внизу)
+        status_frame = Gtk.Frame()
+        status_frame.set_hexpand(True)
+        main_auth_box.append(status_frame)
+
+        status_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=5)
+        status_box.set_margin_top(15)
+        status_box.set_margin_bottom(15)
+        status_box.set_margin_start(15)
+        status_box.set_margin_end(15)
+        status_frame.set_child(status_box)
+
+        status_title = Gtk.Label(label="Статус авторизации")
+        status_title.add_css_class("heading")
+        status_box.append(status_title)
+
+        # Информация о статусе
+        self.account_info_label = Gtk.Label(label="Нажмите 'Проверить авторизацию'")
+        self.account_info_label.set_halign(Gtk.Align.START)
+        self.account_info_label.set_wrap(True)
+        self.account_info_label.set_selectable(True)
+        status_box.append(self.account_info_label)
+
+        # Версия программы (в самом низу)
+        version_auth_label = Gtk.Label(label=f"Версия программы: {VERSION}")
+        version_auth_label.add_css_class("dim-label")
+        version_auth_label.set_halign(Gtk.Align.START)
+        main_auth_box.append(version_auth_label)
+
+    def build_settings_tab(self, settings_tab):
+        # ===== ВКЛАДКА НАСТРОЕК =====
+        settings_title = Gtk.Label(label="Настройки VPN")
+        settings_title.add_css_class("title-2")
+        settings_tab.append(settings_title)
+        
+        # Исключения сайтов
+        exclusions_frame = Gtk.Frame()
+        exclusions_frame.set_hexpand(True)
+        settings_tab.append(exclusions_frame)
+        
+        exclusions_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=5)
+        exclusions_box.set_margin_top(15)
+        exclusions_box.set_margin_bottom(15)
+        exclusions_box.set_margin_start(15)
+        exclusions_box.set_margin_end(15)
+        exclusions_frame.set_child(exclusions_box)
+        
+        exclusions_title = Gtk.Label(label="Исключения сайтов")
+        exclusions_title.add_css_class("heading")
+        exclusions_box.append(exclusions_title)
+        
+        exclusions_info = Gtk.Label(label="Управление сайтами, которые будут обходить VPN")
+        exclusions_info.set_wrap(True)
+        exclusions_box.append(exclusions_info)
+        
+        exclusions_buttons_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
+        exclusions_box.append(exclusions_buttons_box)
+        
+        self.exclusions_list_btn = Gtk.Button(label="Показать исключения")
+        self.exclusions_list_btn.connect("clicked", self.on_exclusions_list_clicked)
+        exclusions_buttons_box.append(self.exclusions_list_btn)
+        
+        self.exclusions_add_btn = Gtk.Button(label="Добавить исключение")
+        self.exclusions_add_btn.connect("clicked", self.on_exclusions_add_clicked)
+        exclusions_buttons_box.append(self.exclusions_add_btn)
+        
+        self.exclusions_remove_btn = Gtk.Button(label="Удалить исключение")
+        self.exclusions_remove_btn.connect("clicked", self.on_exclusions_remove_clicked)
+        exclusions_buttons_box.append(self.exclusions_remove_btn)
+        
+        self.exclusions_sync_btn = Gtk.Button(label="Синхронизировать список")
+        self.exclusions_sync_btn.connect("clicked", self.on_exclusions_sync_clicked)
+        exclusions_buttons_box.append(self.exclusions_sync_btn)
+        
+        # Быстрый фильтр по списку исключений
+        self.exclusions_search = Gtk.SearchEntry()
+        self.exclusions_search.set_placeholder_text("Фильтр доменов")
+        self.exclusions_search.connect("search-changed", self.on_exclusions_search_changed)
+        exclusions_box.append(self.exclusions_search)
+        
+        self.exclusions_status_label = Gtk.Label(label="Нажмите 'Показать исключения'")
+        self.exclusions_status_label.add_css_class("dim-label")
+        self.exclusions_status_label.set_halign(Gtk.Align.START)
+        self.exclusions_status_label.set_wrap(True)
+        exclusions_box.append(self.exclusions_status_label)
+        
+        # Список исключений: ListView переиспользует строки, модель меняется только в отличиях
+        self.exclusions_model = Gtk.StringList()
+        self.exclusions_filter = Gtk.StringFilter(
+            expression=Gtk.PropertyExpression.new(Gtk.StringObject, None, "string"),
+            ignore_case=True,
+            match_mode=Gtk.StringFilterMatchMode.SUBSTRING
+        )
+        exclusions_filter_model = Gtk.FilterListModel(model=self.exclusions_model, filter=self.exclusions_filter)
+        exclusions_filter_model.set_incremental(True)
+        
+        exclusions_factory = Gtk.SignalListItemFactory()
+        exclusions_factory.connect("setup", self.on_exclusion_row_setup)
+        exclusions_factory.connect("bind", self.on_exclusion_row_bind)
+        
+        self.exclusions_view = Gtk.ListView(
+            model=Gtk.NoSelection(model=exclusions_filter_model),
+            factory=exclusions_factory
+        )
+        
+        exclusions_scrolled = Gtk.ScrolledWindow()
+        exclusions_scrolled.set_child(self.exclusions_view)
+        exclusions_scrolled.set_hexpand(True)
+        exclusions_scrolled.set_vexpand(True)
+        exclusions_scrolled.set_min_content_height(150)
+        exclusions_box.append(exclusions_scrolled)
+
+    def build_extra_tab(self, extra_tab):
+        # ===== ВКЛАДКА ДОПОЛНИТЕЛЬНО =====
+        extra_title = Gtk.Label(label="Дополнительные функции")
+        extra_title.add_css_class("title-2")
+        extra_tab.append(extra_title)
+        
+        # Обновления
+        update_frame = Gtk.Frame()
+        update_frame.set_hexpand(True)
+        extra_tab.append(update_frame)
+        
+        update_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=5)
+        update_box.set_margin_top(15)
+        update_box.set_margin_bottom(15)
+        update_box.set_margin_start(15)
+        update_box.set_margin_end(15)
+        update_frame.set_child(update_box)
+        
+        update_title = Gtk.Label(label="Обновления")
+        update_title.add_css_class("heading")
+        update_box.append(update_title)
+        
+        update_buttons_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
+        update_box.append(update_buttons_box)
+        
+        self.check_update_btn = Gtk.Button(label="Проверить обновления")
+        self.check_update_btn.connect("clicked", self.on_check_update_clicked)
+        update_buttons_box.append(self.check_update_btn)
+        
+        self.update_btn = Gtk.Button(label="Установить обновления")
+        self.update_btn.connect("clicked", self.on_update_clicked)
+        update_buttons_box.append(self.update_btn)
+        
+        self.update_status_label = Gtk.Label(label="Статус обновлений: Не проверен")
+        self.update_status_label.set_wrap(True)
+        update_box.append(self.update_status_label)
+        
+        # Разделитель
+        extra_tab.append(Gtk.Separator())
+        
+        # Логи
+        logs_frame = Gtk.Frame()
+        logs_frame.set_hexpand(True)
+        extra_tab.append(logs_frame)
+        
+        logs_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=5)
+        logs_box.set_margin_top(15)
+        logs_box.set_margin_bottom(15)
+        logs_box.set_margin_start(15)
+        logs_box.set_margin_end(15)
+        logs_frame.set_child(logs_box)
+        
+        logs_title = Gtk.Label(label="Логи программы")
+        logs_title.add_css_class("heading")
+        logs_box.append(logs_title)
+        
+        self.export_logs_btn = Gtk.Button(label="Экспортировать логи")
+        self.export_logs_btn.connect("clicked", self.on_export_logs_clicked)
+        logs_box.append(self.export_logs_btn)
+        
+        logs_info = Gtk.Label(label="Экспортирует все логи программы в zip-архив")
+        logs_info.set_wrap(True)
+        logs_box.append(logs_info)
+        
+        # Разделитель
+        extra_tab.append(Gtk.Separator())
+        
+        # Версия программы
+        version_label = Gtk.Label(label=f"Версия программы: {VERSION}")
+        version_label.add_css_class("dim-label")
+        extra_tab.append(version_label)
+# ==================== Конец НАСТРОЙКА ИНТЕРФЕЙСА ====================
+
+# ==================== Начало ОБРАБОТЧИКИ СОБЫТИЙ ====================
+    def on_check_auth_clicked(self, button):
+        """Проверка статуса авторизации (ТОЛЬКО проверка, без загрузки локаций)"""
+        self.append_auth_log("=== ПРОВЕРКА АВТОРИЗАЦИИ ===", MSG_AUTH_CHECK)
+        self.store.dispatch(ACTION_AUTH_CHECK_STARTED)
+        self.check_auth_status_only()
+
+    def on_login_clicked(self, button):
+        """Обработчик кнопки входа"""
+        self.append_auth_log("=== ЗАПУСК ПРОЦЕССА АВТОРИЗАЦИИ ===")
+        self.store.dispatch(ACTION_LOGIN_STARTED)
+        self.execute_login()
+
+    def on_logout_clicked(self, button):
+        """Обработчик кнопки выхода"""
+        self.append_auth_log("=== ВЫХОД ИЗ АККАУНТА ===")
+        self.store.dispatch(ACTION_LOGOUT_STARTED)
+        self.execute_logout()
+
+    def on_refresh_locations_clicked(self, button):
+        """Обновление списка локаций (отдельный блок)"""
+        self.append_auth_log("=== ОБНОВЛЕНИЕ СПИСКА ЛОКАЦИЙ ===")
+        self.store.dispatch(ACTION_LOCATIONS_LOADING, loading=True)
+        self.load_locations(refresh=True)
+
+    def on_vpn_action_clicked(self, button):
+        """Обработчик объединенной кнопки подключения/отключения"""
+        if self.vpn_status == "disconnected":
+            if not self.current_location:
+                self.show_error("Выберите локацию")
+                return
+            
+            if self.client.helper_active:
+                self.append_auth_log("Подключение через привилегированный помощник")
+                self.executor.submit(self.execute_connect)
+            elif self.sudo_password_remembered and self.sudo_password:
+                self.append_auth_log("Используем сохраненный пароль для подключения")
+                self.executor.submit(self.execute_connect)
+            else:
+                self.connect_vpn()
+        else:
+            if self.client.helper_active:
+                self.append_auth_log("Отключение через привилегированный помощник")
+                self.executor.submit(self.execute_disconnect)
+            elif self.sudo_password_remembered and self.sudo_password:
+                self.append_auth_log("Используем сохраненный пароль для отключения")
+                self.executor.submit(self.execute_disconnect)
+            else:
+                self.disconnect_vpn()
+
+    def on_status_clicked(self, button):
+        """Обработчик кнопки проверки статуса"""
+        self.check_status()
+
+    def on_location_changed(self, dropdown, param):
+        """Обработчик изменения локации"""
+        item = dropdown.get_selected_item()
+        if item is not None:
+            self.store.dispatch(ACTION_LOCATION_SELECTED, code=item.location.code, name=item.location.name)
+
+    def on_exclusions_list_clicked(self, button):
+        """Показать список исключений"""
+        self.append_auth_log("=== ПОЛУЧЕНИЕ СПИСКА ИСКЛЮЧЕНИЙ ===")
+        self.execute_exclusions_list()
+
+    def on_exclusions_add_clicked(self, button):
+        """Добавить исключение"""
+        self.show_exclusions_dialog("add")
+
+    def on_exclusions_remove_clicked(self, button):
+        """Удалить исключение"""
+        self.show_exclusions_dialog("remove")
+
+    def on_exclusions_sync_clicked(self, button):
+        """Задать желаемый список исключений целиком"""
+        self.show_exclusions_sync_dialog()
+
+    def on_check_update_clicked(self, button):
+        """Проверить обновления"""
+        self.append_auth_log("=== ПРОВЕРКА ОБНОВЛЕНИЙ ===")
+        self.store.dispatch(ACTION_BUSY, name="check_update", busy=True)
+        self.executor.submit(self.execute_check_update)
+
+    def on_update_clicked(self, button):
+        """Установить обновления"""
+        self.append_auth_log("=== УСТАНОВКА ОБНОВЛЕНИЙ ===")
+        self.store.dispatch(ACTION_BUSY, name="update", busy=True)
+        self.executor.submit(self.execute_update)
+
+    def on_export_logs_clicked(self, button):
+        """Экспорт логов"""
+        self.append_auth_log("=== ЭКСПОРТ ЛОГОВ ===")
+        self.store.dispatch(ACTION_BUSY, name="export_logs", busy=True)
+        self.executor.submit(self.execute_export_logs)
+# ==================== Конец ОБРАБОТЧИКИ СОБЫТИЙ ====================
+
+# ==================== Начало ЛОГИРОВАНИЕ ====================
+    def append_auth_log(self, text, msg_id=None):
+        """Логировать сообщение; сообщения из AUTH_PANEL_MESSAGES показываются на вкладке авторизации"""
+        self.log_buffer.append(msg_id, text)
+        
+        if msg_id in AUTH_PANEL_MESSAGES and not self.log_flush_pending:
+            # Один запрос на отрисовку на кадр, сколько бы сообщений ни пришло
+            self.log_flush_pending = True
+            GLib.idle_add(self.request_log_flush)
+        
+        # Всегда логируем в консоль для отладки
+        print(f"AUTH: {text}")
+
+    def request_log_flush(self):
+        """Перенос новых записей на экран перед следующим кадром"""
+        if "auth" not in self.built_tabs:
+            # Вкладка еще не открыта: записи остаются в буфере до ее построения
+            self.log_flush_pending = False
+            return False
+        self.account_info_label.add_tick_callback(self.flush_auth_log)
+        return False
+
+    def flush_auth_log(self, widget, frame_clock):
+        """Выводим накопленные за кадр сообщения одним обновлением метки"""
+        self.log_flush_pending = False
+        records = self.log_buffer.since(self.log_flushed_seq)
+        if records:
+            self.log_flushed_seq = records[-1].seq
+        
+        lines = [record.text for record in records if record.msg_id in AUTH_PANEL_MESSAGES]
+        if lines:
+            current_text = self.account_info_label.get_text()
+            if "Нажмите" in current_text or "Ошибка" in current_text or "Проверка" in current_text:
+                shown = lines
+            else:
+                shown = current_text.split("\n") + lines
+            self.account_info_label.set_text("\n".join(shown[-AUTH_PANEL_MAX_LINES:]))
+        return GLib.SOURCE_REMOVE
+# ==================== Конец ЛОГИРОВАНИЕ ====================
+
+# ==================== Начало АВТОРИЗАЦИЯ ====================
+    def check_auth_status_only(self, on_done=None):
+        """Проверка статуса авторизации (ТОЛЬКО проверка, без загрузки локаций) без ожидания ответа;
+        on_done(True/False) вызывается в главном потоке"""
+        self.append_auth_log("=== ПРОВЕРКА АВТОРИЗАЦИИ ===", MSG_AUTH_CHECK)
+        self.client.submit_read("license", lambda result: self.on_auth_status(result, on_done))
+
+    def on_auth_status(self, result, on_done=None):
+        """Результат license (в главном потоке)"""
+        authenticated = False
+        try:
+            if result and result.returncode == 0:
+                account_info = parse_account_info(result.stdout)
+                # Одно действие обновляет и главную вкладку, и вкладку авторизации
+                self.store.dispatch(
+                    ACTION_AUTH_CHECKED, authenticated=True,
+                    account_info=account_info, account_text=format_account_info(account_info)
+                )
+                self.append_auth_log("Авторизация AdGuard подтверждена", MSG_AUTH_CONFIRMED)
+                authenticated = True
+                
+            else:
+                self.store.dispatch(ACTION_AUTH_CHECKED, authenticated=False, account_text="Требуется авторизация")
+                
+        except Exception as e:
+            self.store.dispatch(ACTION_AUTH_CHECK_FAILED, error=f"Ошибка проверки авторизации: {str(e)}")
+        if on_done is not None:
+            on_done(authenticated)
+
+    def start_startup_queries(self):
+        """license, status, list-locations (и по настройке site-exclusions list) запускаются одновременно"""
+        self.startup_auth_check()
+        self.check_status()
+        if self.locations_cache_is_fresh():
+            self.append_auth_log("Кэш локаций свежий, загрузка при запуске пропущена")
+        else:
+            # Список запрашиваем, не дожидаясь license: покажем его, только если авторизация подтвердится
+            self.append_auth_log("=== АВТОМАТИЧЕСКАЯ ЗАГРУЗКА ЛОКАЦИЙ ПРИ ЗАПУСКЕ ===")
+            self.store.dispatch(ACTION_LOCATIONS_LOADING, loading=True)
+            self.load_locations(require_auth=True)
+        if STARTUP_FETCH_EXCLUSIONS:
+            self.execute_exclusions_list()
+
+    def startup_auth_check(self):
+        """license при запуске: результат нужен еще и загрузке локаций, которая идет параллельно"""
+        self.check_auth_status_only(self.on_startup_auth_checked)
+
+    def on_startup_auth_checked(self, authenticated):
+        self.startup_authenticated = authenticated
+        self.profiler.mark("license_probe")
+        self.auth_checked.set()
+        if self.startup_locations is not None:
+            result, self.startup_locations = self.startup_locations, None
+            self.finish_startup_locations(result)
+
+    def auth_confirmed(self):
+        """license при запуске завершился и подтвердил авторизацию"""
+        return self.auth_checked.is_set() and self.startup_authenticated
+
+    def execute_login(self):
+        """Запуск login с интерактивным вводом: подтверждения в браузере процесс ждет минутами, поток при
+        этом не занят; результат приходит в on_login_finished"""
+        if self.login_future is not None:
+            self.login_future.cancel()
+        self.append_auth_log("Ожидаем ссылку для авторизации в браузере...", MSG_LOGIN_WAITING)
+        self.append_auth_log("Отправлен ввод: b", MSG_LOGIN_INPUT_SENT)
+        
+        # Вывод login приходит построчно, пока процесс ждет подтверждения в браузере
+        self.login_future = self.transport.submit(
+            [ADGUARD_PATH, "login"], timeout=LOGIN_TIMEOUT, input_text="b\n",
+            on_line=self.on_login_output_line, callback=self.on_login_finished
+        )
+
+    def on_login_finished(self, result):
+        """Завершение login (в главном потоке): CompletedProcess или исключение"""
+        self.login_future = None
+        self.auth_url_btn.set_visible(False)
+        
+        if isinstance(result, subprocess.TimeoutExpired):
+            self.append_auth_log(f"Команда login не завершилась за {LOGIN_TIMEOUT} с и остановлена")
+        elif isinstance(result, Exception):
+            self.append_auth_log(f"Критическая ошибка при авторизации: {str(result)}")
+        elif result.returncode == 0:
+            self.store.dispatch(ACTION_LOGIN_FINISHED, success=True)
+            self.append_auth_log("Авторизация успешно завершена!", MSG_LOGIN_OK)
+            
+            # После успешного логина проверяем статус
+            self.check_auth_status_only()
+            return
+        else:
+            self.append_auth_log(f"Ошибка авторизации. Код возврата: {result.returncode}")
+        
+        self.store.dispatch(ACTION_LOGIN_FINISHED, success=False)
+
+    def execute_logout(self):
+        """Выполнение команды logout"""
+        self.client.submit_command("logout", self.on_logout_finished)
+
+    def on_logout_finished(self, result):
+        """Завершение logout (в главном потоке): CompletedProcess или исключение"""
+        if isinstance(result, Exception):
+            self.append_auth_log(f"Ошибка при выходе: {str(result)}")
+        elif result.returncode == 0:
+            self.store.dispatch(ACTION_LOGOUT_FINISHED, success=True)
+            self.append_auth_log("Выход выполнен успешно!", MSG_LOGOUT_OK)
+            
+            # После выхода проверяем статус
+            self.check_auth_status_only()
+            return
+        else:
+            self.append_auth_log("Ошибка выхода из аккаунта")
+        
+        self.store.dispatch(ACTION_LOGOUT_FINISHED, success=False)
+
+    def on_login_output_line(self, line):
+        """Строка вывода login: сразу в лог, ссылку авторизации показываем немедленно"""
+        text = clean_ansi_codes(line).strip()
+        if not text:
+            return
+        
+        self.append_auth_log(f"Вход: {text}", MSG_LOGIN_OUTPUT)
+        url_match = AUTH_URL_RE.search(text)
+        if url_match:
+            GLib.idle_add(self.show_auth_url, url_match.group(0))
+
+    def show_auth_url(self, url):
+        """Показываем ссылку авторизации на вкладке авторизации"""
+        self.auth_url_btn.set_uri(url)
+        self.auth_url_btn.set_visible(True)
+        self.append_auth_log(f"Ссылка для авторизации: {url}", MSG_LOGIN_URL)
+# ==================== Конец АВТОРИЗАЦИЯ ====================
+
+# ==================== Начало ЗАГРУЗКА ЛОКАЦИЙ ====================
+    def load_locations(self, require_auth=False, refresh=False):
+        """Загрузка списка локаций без ожидания ответа; require_auth - при запуске: применяем, только если
+        license подтвердит вход; refresh - по кнопке обновления, мимо кэша команд"""
+        self.append_auth_log("Загрузка списка локаций...")
+        
+        def done(result):
+            self.profiler.mark("list_locations")
+            if require_auth and not self.auth_checked.is_set():
+                # license еще не ответил: результат применит on_startup_auth_checked
+                self.startup_locations = result
+            elif require_auth:
+                self.finish_startup_locations(result)
+            else:
+                self.apply_locations_result(result)
+        
+        # Одновременные обновления получают результат одного запуска list-locations
+        on_line = self.location_batches(self.auth_confirmed if require_auth else None)
+        self.client.submit_read("list-locations", done, on_line=on_line, fresh=refresh)
+
+    def finish_startup_locations(self, result):
+        """Список, загруженный при запуске, применяем, только если license подтвердил вход (в главном потоке)"""
+        if not self.auth_confirmed():
+            self.append_auth_log("Авторизация не подтверждена, список локаций отброшен")
+            self.finish_loading()
+            return
+        self.apply_locations_result(result)
+
+    def apply_locations_result(self, result):
+        """Итог list-locations (в главном потоке): полный список заменяет добавленные по ходу порции"""
+        try:
+            if result and result.returncode == 0:
+                locations = parse_locations(result.stdout)
+                if locations:
+                    self.update_locations_ui(locations)
+                    self.locations_fetched_at = time.time()
+                    self.executor.submit(save_locations_cache, locations, self.locations_fetched_at)
+                    self.rerank_locations_by_probe(locations)
+                    self.append_auth_log("Список локаций загружен")
+                else:
+                    self.show_error("Не удалось распарсить список локаций")
+            else:
+                error_msg = result.stderr if result and result.stderr else (result.stdout if result else "нет ответа")
+                self.show_error(f"Ошибка загрузки локаций: {error_msg}")
+                self.append_auth_log(f"Ошибка загрузки локаций: {error_msg}")
+                
+        except Exception as e:
+            self.show_error(f"Ошибка: {str(e)}")
+            self.append_auth_log(f"Ошибка загрузки локаций: {str(e)}")
+        
+        self.finish_loading()
+
+    def show_cached_locations(self):
+        """Заполняем список локаций из снимка на диске (без запуска CLI)"""
+        locations, fetched_at = load_locations_cache()
+        if not locations:
+            return
+        
+        self.locations_fetched_at = fetched_at
+        self.update_locations_ui(locations)
+        age = int(time.time() - fetched_at)
+        print(f"Локации загружены из кэша ({len(locations)} шт., возраст {age} с)")
+
+    def locations_cache_is_fresh(self):
+        """Снимок локаций моложе LOCATIONS_CACHE_TTL"""
+        return time.time() - self.locations_fetched_at < LOCATIONS_CACHE_TTL
+
+    def rerank_locations_by_probe(self, locations):
+        """Замеряем реальную задержку до локаций и пересортировываем список, когда замер завершится"""
+        configured = load_probe_endpoints()
+        endpoints = {loc.code: configured[loc.code] for loc in locations if loc.code in configured}
+        if not configured:
+            self.append_auth_log(
+                f"Замер задержки выключен: нет адресов в {PROBE_ENDPOINTS_FILE}. Чтобы включить, "
+                f'создайте файл вида {{"JP": "tcp://host:443"}} с кодами локаций из списка'
+            )
+            return
+        if not endpoints:
+            self.append_auth_log(f"Замер задержки: ни один код из {PROBE_ENDPOINTS_FILE} не совпал с кодами локаций")
+            return
+        
+        self.append_auth_log(f"Замер задержки до {len(endpoints)} локаций...")
+        future = self.prober.submit(endpoints)
+        future.add_done_callback(lambda f: GLib.idle_add(self.apply_location_rtts, locations, len(endpoints), f))
+
+    def apply_location_rtts(self, locations, probed, future):
+        """Результат замера задержки (в главном потоке)"""
+        if future.cancelled() or future.exception() is not None:
+            self.append_auth_log(f"Замер задержки не удался: {future.exception() if not future.cancelled() else 'отменен'}")
+            return
+        
+        rtts = future.result()
+        ranked = []
+        for loc in locations:
+            rtt = rtts.get(loc.code)
+            ranked.append(loc if rtt is None else loc.with_rtt(round(rtt)))
+        
+        self.update_locations_ui(ranked)
+        measured = sum(1 for rtt in rtts.values() if rtt is not None)
+        self.append_auth_log(f"Задержка замерена для {measured} из {probed} локаций")
+
+    def finish_loading(self):
+        """Завершение процесса загрузки"""
+        self.store.dispatch(ACTION_LOCATIONS_LOADING, loading=False)
+
+    def location_batches(self, gate=None):
+        """on_line для list-locations: локации уходят в UI порциями по мере вывода; пока gate() ложно - копим.
+        Остаток последней порции не отправляем: его покажет полный список из apply_locations_result"""
+        pending = []
+        last_flush = time.monotonic()
+        first_batch = True
+        
+        def on_line(line):
+            nonlocal pending, last_flush, first_batch
+            location = parse_location_line(line)
+            if location is None:
+                return
+            pending.append(location)
+            if len(pending) < LOCATIONS_BATCH_SIZE and time.monotonic() - last_flush < LOCATIONS_BATCH_INTERVAL:
+                return
+            if gate is not None and not gate():
+                return
+            GLib.idle_add(self.add_locations_batch, pending, first_batch)
+            first_batch = False
+            pending = []
+            last_flush = time.monotonic()
+        
+        return on_line
+
+    def add_locations_batch(self, batch, reset):
+        """Добавляем порцию локаций, пока list-locations еще выполняется"""
+        if reset:
+            self.update_locations_ui(batch)
+            return
+        
+        # Дописываем только новые элементы, существующие строки модели не трогаем
+        indices = self.location_store.add(batch)
+        self.location_model.splice(
+            self.location_model.get_n_items(), 0,
+            [LocationItem(i, self.location_store.locations[i]) for i in indices]
+        )
+        self.refresh_visible_locations()
+
+    def update_locations_ui(self, all_locations):
+        """Обновляем UI с полученными локациями"""
+        selected = self.get_selected_location()
+        self.location_store.reset(all_locations)
+        self.location_model.splice(
+            0, self.location_model.get_n_items(),
+            [LocationItem(i, loc) for i, loc in enumerate(self.location_store.locations)]
+        )
+        self.refresh_visible_locations(selected)
+        
+        if self.fast_locations:
+            self.profiler.mark("locations_visible")
+            self.store.dispatch(ACTION_LOCATIONS_AVAILABLE, available=True)
+        self.store.dispatch(ACTION_STATS, text="Выберите локацию и нажмите 'Подключить'")
+
+    def refresh_visible_locations(self, selected=None):
+        """Пересчитываем видимые локации по индексу хранилища без перестройки модели"""
+        if selected is None:
+            selected = self.get_selected_location()
+        self.locations = self.location_store.locations
+        self.fast_locations = self.location_store.top_k()
+        self.visible_location_indices = self.location_store.search(self.location_search.get_text())
+        
+        self.location_filter.changed(Gtk.FilterChange.DIFFERENT)
+        self.select_location(selected)
+
+    def get_selected_location(self):
+        """Выбранная в списке локация или None"""
+        item = self.location_dropdown.get_selected_item()
+        return item.location if item is not None else None
+
+    def select_location(self, location):
+        """Выбираем локацию в списке, если она видна, иначе первую (самую быструю)"""
+        n_items = self.location_sorted_model.get_n_items()
+        if n_items == 0:
+            return
+        
+        position = 0
+        if location is not None:
+            for i in range(n_items):
+                candidate = self.location_sorted_model.get_item(i).location
+                if candidate.code == location.code and candidate.name == location.name:
+                    position = i
+                    break
+        
+        self.location_dropdown.set_selected(position)
+        chosen = self.location_sorted_model.get_item(position).location
+        self.store.dispatch(ACTION_LOCATION_SELECTED, code=chosen.code, name=chosen.name)
+
+    def on_location_search_changed(self, entry):
+        """Фильтрация списка локаций по мере ввода"""
+        self.refresh_visible_locations()
+
+    def compare_location_items(self, item_a, item_b, *args):
+        """Сортировка элементов списка по пингу, затем по названию"""
+        key_a = (item_a.location.sort_ping, item_a.location.name)
+        key_b = (item_b.location.sort_ping, item_b.location.name)
+        if key_a < key_b:
+            return Gtk.Ordering.SMALLER
+        if key_a > key_b:
+            return Gtk.Ordering.LARGER
+        return Gtk.Ordering.EQUAL
+# ==================== Конец ЗАГРУЗКА ЛОКАЦИЙ ====================
+
+# ==================== Начало УПРАВЛЕНИЕ VPN ====================
+    def connect_vpn(self):
+        """Подключение к VPN"""
+        try:
+            self.store.dispatch(ACTION_VPN_STATUS, status="connecting")
+            self.show_sudo_dialog()
+        except Exception as e:
+            self.show_error(f"Ошибка подключения: {e}")
+
+    def show_sudo_dialog(self, action=None):
+        """Диалог для ввода пароля sudo; action - "connect", "disconnect" или "switch" (по умолчанию по статусу)"""
+        if action is None:
+            action = "connect" if self.vpn_status == "connecting" else "disconnect"
+        dialog = Gtk.Window(transient_for=self, modal=True, title="Требуется пароль sudo")
+        dialog.set_default_size(350, 250)
+        
+        main_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=10)
+        main_box.set_margin_top(20)
+        main_box.set_margin_bottom(20)
+        main_box.set_margin_start(20)
+        main_box.set_margin_end(20)
+        dialog.set_child(main_box)
+        
+        action_text, button_text, button_class = {
+            "connect": ("подключения VPN", "Подключить", "suggested-action"),
+            "disconnect": ("отключения VPN", "Отключить", "destructive-action"),
+            "switch": ("переключения локации", "Переключить", "suggested-action"),
+        }[action]
+        label = Gtk.Label(label=f"Введите пароль sudo для {action_text}:")
+        label.set_wrap(True)
+        main_box.append(label)
+        
+        remember_checkbox = Gtk.CheckButton(label="Запомнить пароль для этой сессии")
+        remember_checkbox.set_active(True)
+        main_box.append(remember_checkbox)
+        
+        password_entry = Gtk.Entry()
+        password_entry.set_visibility(False)
+        password_entry.set_placeholder_text("Пароль sudo")
+        main_box.append(password_entry)
+        
+        button_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
+        main_box.append(button_box)
+        
+        cancel_btn = Gtk.Button(label="Отмена")
+        cancel_btn.connect("clicked", lambda b: dialog.destroy())
+        button_box.append(cancel_btn)
+        
+        action_btn = Gtk.Button(label=button_text)
+        action_btn.add_css_class(button_class)
+        action_btn.connect("clicked", lambda b: self.on_sudo_password_entered(
+            dialog, password_entry.get_text(), remember_checkbox.get_active(), action))
+        button_box.append(action_btn)
+        
+        password_entry.grab_focus()
+        password_entry.connect("activate", lambda e: self.on_sudo_password_entered(
+            dialog, password_entry.get_text(), remember_checkbox.get_active(), action))
+        
+        dialog.present()
+
+    def on_sudo_password_entered(self, dialog, password, remember_password, action):
+        """Обработчик ввода пароля sudo"""
+        if not password:
+            self.show_error("Пароль не введен")
+            return
+        
+        self.append_auth_log("Получен пароль sudo")
+        dialog.destroy()
+        execute = {
+            "connect": self.execute_connect,
+            "disconnect": self.execute_disconnect,
+            "switch": self.execute_switch,
+        }[action]
+        
+        if self.client.helper is not None:
+            # Пароль нужен один раз - для запуска помощника, в окне он не сохраняется
+            self.executor.submit(self.start_helper_and_run, password, remember_password, execute)
+            return
+        
+        self.sudo_password = password
+        self.sudo_password_remembered = remember_password
+        self.executor.submit(execute)
+
+    def start_helper_and_run(self, password, remember_password, action):
+        """Запуск привилегированного помощника, затем подключение/отключение через него"""
+        if self.client.start_helper(password):
+            self.append_auth_log("Привилегированный помощник запущен: повторные операции без sudo")
+        else:
+            self.append_auth_log("Помощник недоступен, выполняем через sudo")
+            self.sudo_password = password
+            self.sudo_password_remembered = remember_password
+        action()
+
+    def execute_connect(self):
+        """Выполнение команды подключения"""
+        try:
+            self.append_auth_log("Выполнение подключения к VPN...")
+            location = self.current_location
+            # Выполняем сам adguardvpn-cli под sudo и передаём пароль через stdin (-S)
+            result = self.client.connect(location, self.sudo_password)
+            
+            if not self.sudo_password_remembered:
+                self.sudo_password = None
+                self.sudo_password_remembered = False
+            
+            if result.returncode == 0:
+                self.store.dispatch(
+                    ACTION_VPN_STATUS, status="connected", location=location, stats_text="Подключение установлено"
+                )
+                self.track_failover(location)
+                self.append_auth_log("Подключение успешно установлено")
+            else:
+                error_msg = result.stderr if result.stderr else result.stdout
+                GLib.idle_add(self.show_error, f"Ошибка подключения: {error_msg}")
+                self.store.dispatch(ACTION_VPN_STATUS, status="disconnected")
+                
+        except subprocess.TimeoutExpired:
+            if not self.sudo_password_remembered:
+                self.sudo_password = None
+                self.sudo_password_remembered = False
+            GLib.idle_add(self.show_error, "Таймаут подключения")
+            self.store.dispatch(ACTION_VPN_STATUS, status="disconnected")
+        except Exception as e:
+            if not self.sudo_password_remembered:
+                self.sudo_password = None
+                self.sudo_password_remembered = False
+            GLib.idle_add(self.show_error, f"Ошибка: {str(e)}")
+            self.store.dispatch(ACTION_VPN_STATUS, status="disconnected")
+
+    def disconnect_vpn(self):
+        """Отключение VPN"""
+        try:
+            self.store.dispatch(ACTION_VPN_STATUS, status="disconnecting")
+            self.executor.submit(self.execute_disconnect)
+        except Exception as e:
+            self.show_error(f"Ошибка отключения: {e}")
+
+    def execute_disconnect(self):
+        """Выполнение команды отключения"""
+        try:
+            self.append_auth_log("=== ОТКЛЮЧЕНИЕ VPN ===")
+            # Выполняем команду отключения под sudo, пароль передаём через stdin
+            result = self.client.disconnect(self.sudo_password)
+            
+            if not self.sudo_password_remembered:
+                self.sudo_password = None
+                self.sudo_password_remembered = False
+            
+            if result.returncode == 0:
+                self.track_failover(None)
+                self.store.dispatch(ACTION_VPN_STATUS, status="disconnected", stats_text="Отключено")
+                self.append_auth_log("VPN отключен")
+            else:
+                error_msg = result.stderr if result.stderr else result.stdout
+                GLib.idle_add(self.show_error, f"Ошибка отключения: {error_msg}")
+                
+        except Exception as e:
+            if not self.sudo_password_remembered:
+                self.sudo_password = None
+                self.sudo_password_remembered = False
+            GLib.idle_add(self.show_error, f"Ошибка отключения: {str(e)}")
+            self.store.dispatch(ACTION_VPN_STATUS, status="disconnected")
+
+    def on_switch_location_clicked(self, button):
+        """Переход на выбранную локацию без отдельного отключения"""
+        if self.client.helper_active or (self.sudo_password_remembered and self.sudo_password):
+            self.executor.submit(self.execute_switch)
+        else:
+            self.show_sudo_dialog("switch")
+
+    def execute_switch(self):
+        """Переключение локации одной привилегированной операцией с замером простоя туннеля"""
+        location = self.current_location
+        self.store.dispatch(ACTION_VPN_STATUS, status="switching")
+        try:
+            self.append_auth_log(f"=== ПЕРЕКЛЮЧЕНИЕ НА ЛОКАЦИЮ {location} ===")
+            result, downtime = self.client.switch(location, self.sudo_password)
+            
+            if not self.sudo_password_remembered:
+                self.sudo_password = None
+                self.sudo_password_remembered = False
+            
+            if result.returncode == 0:
+                downtime_text = f", туннель был недоступен {downtime:.2f} с" if downtime is not None else ""
+                self.store.dispatch(
+                    ACTION_VPN_STATUS, status="connected", location=location,
+                    stats_text=f"Переключено на {location}{downtime_text}"
+                )
+                self.append_auth_log(f"Локация переключена на {location}{downtime_text}")
+                self.track_failover(location)
+                return
+            
+            error_msg = result.stderr if result.stderr else result.stdout
+            GLib.idle_add(self.show_error, f"Ошибка переключения локации: {error_msg}")
+        except subprocess.TimeoutExpired:
+            GLib.idle_add(self.show_error, "Таймаут переключения локации")
+        except Exception as e:
+            GLib.idle_add(self.show_error, f"Ошибка: {str(e)}")
+        
+        if not self.sudo_password_remembered:
+            self.sudo_password = None
+            self.sudo_password_remembered = False
+        # После неудачи туннель может быть как на старой локации, так и снят: спрашиваем CLI
+        status = self.client.status() or "disconnected"
+        self.store.dispatch(ACTION_VPN_STATUS, status=status, location=None)
+
+    def on_monitored_vpn_status(self, status):
+        """Изменение состояния VPN, замеченное монитором"""
+        if self.vpn_status in ("connecting", "disconnecting", "switching") or status == self.vpn_status:
+            return
+        
+        self.append_auth_log(f"Монитор статуса: VPN {status}")
+        if self.failover is not None:
+            self.failover.notify_status(status)
+        stats_text = "Статус: Подключено" if status == "connected" else "Статус: Отключено"
+        self.store.dispatch(ACTION_VPN_STATUS, status=status, stats_text=stats_text)
+
+    def check_status(self):
+        """Проверка статуса VPN без ожидания ответа"""
+        self.append_auth_log("=== ПРОВЕРКА СТАТУСА VPN ===")
+        self.client.submit_status(self.on_status_checked)
+
+    def on_status_checked(self, status):
+        """Результат status (в главном потоке)"""
+        try:
+            if status == "connected":
+                self.store.dispatch(ACTION_VPN_STATUS, status="connected", stats_text="Статус: Подключено")
+            elif status == "disconnected":
+                self.store.dispatch(ACTION_VPN_STATUS, status="disconnected", stats_text="Статус: Отключено")
+            else:
+                self.store.dispatch(ACTION_STATS, text="Ошибка проверки статуса")
+                
+        except Exception as e:
+            self.store.dispatch(ACTION_STATS, text=f"Ошибка: {str(e)}")
+
+    def track_failover(self, location):
+        """Автопереключение следит за туннелем до location (None - VPN отключен пользователем)"""
+        if self.failover is not None:
+            self.failover.track(location)
+
+    def failover_candidates(self):
+        """Коды самых быстрых локаций для автопереключения (вызывается из потока контроллера)"""
+        return [location.code for location in self.fast_locations]
+
+    def failover_password(self):
+        return self.sudo_password if self.sudo_password_remembered else None
+
+    def on_failover_event(self, kind, info):
+        """События автопереключения (в главном потоке)"""
+        location = info.get('location')
+        if kind == "degraded":
+            self.append_auth_log(f"Автопереключение: {location} - {info['reason']} ({info['failures']} подряд)")
+        elif kind == "switching":
+            self.append_auth_log(f"Автопереключение: {info['previous']} -> {location} ({info['reason']})")
+            self.store.dispatch(ACTION_VPN_STATUS, status="switching", stats_text=f"Автопереключение на {location}...")
+        elif kind == "switched":
+            downtime = info.get('downtime')
+            downtime_text = f", туннель был недоступен {downtime:.2f} с" if downtime is not None else ""
+            text = f"Автопереключение: {info['previous']} -> {location}{downtime_text}"
+            self.append_auth_log(text)
+            self.store.dispatch(ACTION_VPN_STATUS, status="connected", location=location, stats_text=text)
+        elif kind == "failed":
+            self.append_auth_log(f"Автопереключение на {location} не удалось: {info['error']}")
+            self.store.dispatch(ACTION_STATS, text=f"Автопереключение не удалось, повтор через {info['retry_in']:.0f} с")
+            self.check_status()
+        elif kind == "no_candidates":
+            self.store.dispatch(ACTION_STATS, text=f"Нет локаций для автопереключения, повтор через {info['retry_in']:.0f} с")
+        elif kind == "damped":
+            self.append_auth_log(f"Автопереключение приостановлено на {info['resume_in']:.0f} с: слишком много переключений")
+        elif kind == "stopped":
+            self.append_auth_log(f"Автопереключение: {location} больше не отслеживается ({info['reason']})")
+        return False
+# ==================== Конец УПРАВЛЕНИЕ VPN ====================
+
+
+# ==================== Начало НОВЫЕ ФУНКЦИИ ====================
+    def execute_exclusions_list(self):
+        """Получение списка исключений без ожидания ответа (можно вызывать из любого потока)"""
+        self.append_auth_log("Запуск команды site-exclusions list...")
+        self.client.submit_exclusions(self.on_exclusions_listed)
+
+    def on_exclusions_listed(self, result, domains):
+        """Результат site-exclusions list (в главном потоке)"""
+        try:
+            if result and result.returncode == 0:
+                self.store.dispatch(ACTION_EXCLUSIONS_LOADED, domains=domains)
+            else:
+                error_msg = result.stderr if result and result.stderr else "Ошибка получения списка исключений"
+                self.store.dispatch(ACTION_EXCLUSIONS_FAILED, error=error_msg)
+                
+        except Exception as e:
+            self.store.dispatch(ACTION_EXCLUSIONS_FAILED, error=str(e))
+
+    def show_exclusions_sync_dialog(self):
+        """Диалог с желаемым списком исключений (по одному домену в строке)"""
+        dialog = Gtk.Window(transient_for=self, modal=True, title="Синхронизация исключений")
+        dialog.set_default_size(450, 400)
+        
+        main_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=10)
+        main_box.set_margin_top(20)
+        main_box.set_margin_bottom(20)
+        main_box.set_margin_start(20)
+        main_box.set_margin_end(20)
+        dialog.set_child(main_box)
+        
+        label = Gtk.Label(label="Желаемый список исключений, по одному домену в строке. "
+                                "Будут выполнены только нужные добавления и удаления.")
+        label.set_wrap(True)
+        main_box.append(label)
+        
+        text_view = Gtk.TextView()
+        text_view.set_monospace(True)
+        text_view.get_buffer().set_text("\n".join(self.store.state.exclusions))
+        
+        scrolled = Gtk.ScrolledWindow()
+        scrolled.set_child(text_view)
+        scrolled.set_vexpand(True)
+        main_box.append(scrolled)
+        
+        button_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
+        main_box.append(button_box)
+        
+        cancel_btn = Gtk.Button(label="Отмена")
+        cancel_btn.connect("clicked", lambda b: dialog.destroy())
+        button_box.append(cancel_btn)
+        
+        def on_sync(button):
+            buffer = text_view.get_buffer()
+            text = buffer.get_text(buffer.get_start_iter(), buffer.get_end_iter(), False)
+            dialog.destroy()
+            self.store.dispatch(ACTION_BUSY, name="exclusions_sync", busy=True)
+            self.executor.submit(self.execute_exclusions_sync, text.split())
+        
+        sync_btn = Gtk.Button(label="Синхронизировать")
+        sync_btn.add_css_class("suggested-action")
+        sync_btn.connect("clicked", on_sync)
+        button_box.append(sync_btn)
+        
+        dialog.present()
+
+    def execute_exclusions_sync(self, desired_domains):
+        """Приводим исключения к желаемому набору минимальным числом вызовов CLI"""
+        try:
+            self.append_auth_log("=== СИНХРОНИЗАЦИЯ ИСКЛЮЧЕНИЙ ===")
+            try:
+                failed = self.client.sync_exclusions(desired_domains)
+            except ValueError as e:
+                GLib.idle_add(self.show_error, str(e))
+                return
+            except RuntimeError as e:
+                GLib.idle_add(self.show_error, f"Ошибка синхронизации: {e}")
+                return
+            
+            if failed:
+                GLib.idle_add(self.show_error, f"Не удалось применить {len(failed)} изменений: {', '.join(failed[:10])}")
+            self.append_auth_log(f"Синхронизация исключений завершена, ошибок: {len(failed)}")
+            
+        except Exception as e:
+            GLib.idle_add(self.show_error, f"Ошибка синхронизации исключений: {str(e)}")
+        finally:
+            self.store.dispatch(ACTION_BUSY, name="exclusions_sync", busy=False)
+        
+        # Один итоговый запрос списка вместо обновления после каждого изменения
+        self.execute_exclusions_list()
+
+    def update_exclusions_display(self, domains):
+        """Обновление отображения исключений: в модели меняются только отличающиеся строки"""
+        for position, n_removals, additions in sorted_list_splices(self.shown_exclusions, domains):
+            self.exclusions_model.splice(position, n_removals, additions)
+        self.shown_exclusions = domains
+
+    def on_exclusions_search_changed(self, entry):
+        """Фильтрация списка исключений по подстроке"""
+        self.exclusions_filter.set_search(entry.get_text())
+
+    def on_exclusion_row_setup(self, factory, list_item):
+        label = Gtk.Label()
+        label.set_halign(Gtk.Align.START)
+        label.add_css_class("monospace")
+        list_item.set_child(label)
+
+    def on_exclusion_row_bind(self, factory, list_item):
+        list_item.get_child().set_text(list_item.get_item().get_string())
+
+    def show_exclusions_dialog(self, action_type):
+        """Диалог для добавления/удаления исключений"""
+        dialog = Gtk.Window(transient_for=self, modal=True, 
+                           title="Добавить исключение" if action_type == "add" else "Удалить исключение")
+        dialog.set_default_size(400, 200)
+        
+        main_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=10)
+        main_box.set_margin_top(20)
+        main_box.set_margin_bottom(20)
+        main_box.set_margin_start(20)
+        main_box.set_margin_end(20)
+        dialog.set_child(main_box)
+        
+        label = Gtk.Label(label="Введите домен или сайт:" if action_type == "add" else "Введите домен для удаления:")
+        label.set_wrap(True)
+        main_box.append(label)
+        
+        entry = Gtk.Entry()
+        entry.set_placeholder_text("example.com")
+        main_box.append(entry)
+        
+        button_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
+        main_box.append(button_box)
+        
+        cancel_btn = Gtk.Button(label="Отмена")
+        cancel_btn.connect("clicked", lambda b: dialog.destroy())
+        button_box.append(cancel_btn)
+        
+        action_btn = Gtk.Button(label="Добавить" if action_type == "add" else "Удалить")
+        action_btn.add_css_class("suggested-action")
+        action_btn.connect("clicked", lambda b: self.on_exclusions_action_confirm(
+            dialog, entry.get_text(), action_type))
+        button_box.append(action_btn)
+        
+        entry.grab_focus()
+        entry.connect("activate", lambda e: self.on_exclusions_action_confirm(
+            dialog, entry.get_text(), action_type))
+        
+        dialog.present()
+
+    def on_exclusions_action_confirm(self, dialog, site, action_type):
+        """Подтверждение действия с исключением"""
+        if not site:
+            self.show_error("Введите домен или сайт")
+            return
+        
+        dialog.destroy()
+        
+        if action_type == "add":
+            self.executor.submit(self.execute_exclusions_add, site)
+        else:
+            self.executor.submit(self.execute_exclusions_remove, site)
+
+    def execute_exclusions_add(self, site):
+        """Добавление исключения"""
+        try:
+            self.append_auth_log(f"Добавление исключения: {site}")
+            result = self.client.add_exclusion(site)
+            
+            if result and result.returncode == 0:
+                self.append_auth_log(f"Исключение {site} добавлено")
+                # Обновляем список исключений
+                self.execute_exclusions_list()
+            else:
+                error_msg = result.stderr if result and result.stderr else "Ошибка добавления исключения"
+                self.show_error(f"Ошибка добавления: {error_msg}")
+                
+        except Exception as e:
+            self.show_error(f"Ошибка добавления исключения: {str(e)}")
+
+    def execute_exclusions_remove(self, site):
+        """Удаление исключения"""
+        try:
+            self.append_auth_log(f"Удаление исключения: {site}")
+            result = self.client.remove_exclusion(site)
+            
+            if result and result.returncode == 0:
+                self.append_auth_log(f"Исключение {site} удалено")
+                # Обновляем список исключений
+                self.execute_exclusions_list()
+            else:
+                error_msg = result.stderr if result and result.stderr else "Ошибка удаления исключения"
+                self.show_error(f"Ошибка удаления: {error_msg}")
+                
+        except Exception as e:
+            self.show_error(f"Ошибка удаления исключения: {str(e)}")
+
+    def format_update_status(self, update, checked_at=None):
+        """Текст статуса обновлений; checked_at - для сохраненного или фонового результата"""
+        if update.status == "latest":
+            status_text = "У вас новейшая версия"
+        elif update.status == "available":
+            status_text = f"Доступно обновление: {update.text}"
+        else:
+            status_text = update.text if update.text else "Неизвестный статус"
+        if checked_at:
+            status_text += f" (проверено {time.strftime('%d.%m.%Y %H:%M', time.localtime(checked_at))})"
+        return f"Статус обновлений: {status_text}"
+
+    def show_cached_update_check(self):
+        """Последний сохраненный результат check-update - сразу при запуске, без запуска CLI"""
+        update, self.update_checked_at = load_update_check()
+        if update is not None:
+            self.store.dispatch(ACTION_UPDATE_STATUS, text=self.format_update_status(update, self.update_checked_at))
+
+    def is_idle(self):
+        """Запуск закончился, VPN не переключается и никакая операция не выполняется"""
+        state = self.store.state
+        return (
+            self.auth_checked.is_set() and state.vpn_status in ("connected", "disconnected")
+            and not (state.busy or state.auth_checking or state.login_busy or state.logout_busy
+                     or state.locations_loading)
+        )
+
+    def on_scheduled_update_check(self, update, checked_at):
+        """Результат фоновой проверки обновлений (из потока планировщика)"""
+        self.update_checked_at = checked_at
+        self.append_auth_log(f"Фоновая проверка обновлений: {update.text}")
+        self.store.dispatch(ACTION_UPDATE_STATUS, text=self.format_update_status(update, checked_at))
+
+    def execute_check_update(self):
+        """Проверка обновлений"""
+        try:
+            self.append_auth_log("Проверка обновлений...")
+            # Не пересекается с connect/disconnect: при необходимости ждет их завершения
+            result, update = self.client.check_update()
+            
+            if update is not None:
+                stdout_text = update.text
+                
+                if update.status == "latest":
+                    self.append_auth_log("Обновлений не найдено - используется последняя версия")
+                elif update.status == "available":
+                    self.append_auth_log(f"Найдено обновление: {stdout_text}")
+                else:
+                    self.append_auth_log(f"Результат проверки: {stdout_text}")
+                
+                self.store.dispatch(ACTION_UPDATE_STATUS, text=self.format_update_status(update))
+                if check_update_succeeded(result, update) and self.update_scheduler is not None:
+                    self.update_scheduler.reschedule(time.time())
+            else:
+                error_msg = "Ошибка выполнения команды check-update"
+                self.store.dispatch(ACTION_UPDATE_STATUS, text=f"Ошибка: {error_msg}")
+                self.append_auth_log(f"Ошибка проверки обновлений: {error_msg}")
+                
+        except Exception as e:
+            error_text = f"Ошибка: {str(e)}"
+            self.store.dispatch(ACTION_UPDATE_STATUS, text=error_text)
+            self.append_auth_log(f"Ошибка проверки обновлений: {str(e)}")
+        
+        self.store.dispatch(ACTION_BUSY, name="check_update", busy=False)
+
+    def execute_update(self):
+        """Установка обновлений"""
+        try:
+            self.append_auth_log("Установка обновлений...")
+            result = self.client.run_command_simple("update")
+            
+            if result:
+                update = parse_update_result(result.stdout)
+                stdout_text = update.text
+                
+                if update.status in ("latest", "updated"):
+                    # Сохраненное "доступно обновление" больше не актуально
+                    save_update_check(UpdateInfo("latest", stdout_text), time.time())
+                if update.status == "latest":
+                    self.store.dispatch(ACTION_UPDATE_STATUS, text="У вас новейшая версия, обновление не требуется")
+                    self.append_auth_log("Обновление не требуется - используется последняя версия")
+                elif update.status == "updated":
+                    self.store.dispatch(ACTION_UPDATE_STATUS, text="Обновление установлено успешно!")
+                    self.append_auth_log("Обновление установлено")
+                else:
+                    # Показываем любой другой вывод
+                    display_text = stdout_text if stdout_text else "Обновление завершено"
+                    self.store.dispatch(ACTION_UPDATE_STATUS, text=display_text)
+                    self.append_auth_log(f"Результат обновления: {stdout_text}")
+            else:
+                error_msg = "Ошибка выполнения команды update"
+                self.store.dispatch(ACTION_UPDATE_STATUS, text=f"Ошибка: {error_msg}")
+                self.append_auth_log(f"Ошибка установки обновлений: {error_msg}")
+                
+        except Exception as e:
+            self.store.dispatch(ACTION_UPDATE_STATUS, text=f"Ошибка: {str(e)}")
+            self.append_auth_log(f"Ошибка установки обновлений: {str(e)}")
+        
+        self.store.dispatch(ACTION_BUSY, name="update", busy=False)
+
+    def execute_export_logs(self):
+        """Экспорт логов"""
+        try:
+            self.append_auth_log("Экспорт логов...")
+            result = self.client.run_command_simple("export-logs")
+            
+            if result and result.returncode == 0:
+                self.show_info("Экспорт логов", "Логи успешно экспортированы в zip-архив")
+                self.append_auth_log("Логи экспортированы")
+            else:
+                error_msg = result.stderr if result and result.stderr else "Ошибка экспорта логов"
+                self.show_error(f"Ошибка экспорта: {error_msg}")
+                
+        except Exception as e:
+            self.show_error(f"Ошибка экспорта логов: {str(e)}")
+        
+        self.store.dispatch(ACTION_BUSY, name="export_logs", busy=False)
+# ==================== Конец НОВЫЕ ФУНКЦИИ ====================
+
+
+# ==================== Начало УПРАВЛЕНИЕ СТАТУСОМ ====================
+    def set_vpn_status(self, status):
+        """Установка статуса VPN"""
+        self.store.dispatch(ACTION_VPN_STATUS, status=status)
+
+    @property
+    def vpn_status(self):
+        return self.store.state.vpn_status
+
+    @property
+    def is_authenticated(self):
+        return self.store.state.auth == "authenticated"
+
+    @property
+    def current_location(self):
+        return self.store.state.location_code
+
+    @property
+    def account_info(self):
+        return self.store.state.account_info
+
+    def view_model(self, state):
+        """Значения свойств виджетов, вычисленные из состояния"""
+        status = state.vpn_status
+        disconnected = status == "disconnected"
+        icons = {
+            "connected": "network-vpn-symbolic",
+            "connecting": "network-wireless-acquiring-symbolic",
+            "disconnecting": "network-wireless-disconnecting-symbolic",
+            "switching": "network-wireless-acquiring-symbolic",
+            "disconnected": "network-vpn-disabled-symbolic",
+        }
+        titles = {
+            "connected": "VPN подключен",
+            "connecting": "Подключение...",
+            "disconnecting": "Отключение...",
+            "switching": "Переключение локации...",
+            "disconnected": "VPN отключен",
+        }
+        auth_titles = {
+            "unknown": "Статус авторизации: Проверка...",
+            "authenticated": "Статус авторизации: Авторизован",
+            "unauthenticated": "Статус авторизации: Не авторизован",
+        }
+        return {
+            'status_icon': icons.get(status, icons["disconnected"]),
+            'status_title': titles.get(status, titles["disconnected"]),
+            'vpn_action_disconnect': status in ("connected", "disconnecting"),
+            'vpn_action_sensitive': status == "connected" or (
+                disconnected and bool(state.location_code) and state.auth == "authenticated"
+            ),
+            'location_dropdown_sensitive': status in ("disconnected", "connected") and state.locations_available,
+            'switch_location_sensitive': status == "connected" and bool(state.location_code)
+                and state.location_code != state.connected_location,
+            'refresh_locations_sensitive': disconnected and not state.locations_loading,
+            'location_spinner': state.locations_loading,
+            'location_text': f"Локация: {state.location_name}" if state.location_name else "Локация: не выбрана",
+            'stats_text': state.stats_text,
+            'auth_status_text': auth_titles[state.auth],
+            'account_text': state.account_text,
+            'check_auth_sensitive': not state.auth_checking,
+            'login_sensitive': state.auth != "authenticated" and not state.login_busy,
+            'logout_sensitive': state.auth == "authenticated" and not state.logout_busy,
+            'exclusions': state.exclusions,
+            'exclusions_status': state.exclusions_status,
+            'exclusions_sync_sensitive': "exclusions_sync" not in state.busy,
+            'update_status_text': state.update_status_text,
+            'check_update_sensitive': "check_update" not in state.busy,
+            'update_sensitive': "update" not in state.busy,
+            'export_logs_sensitive': "export_logs" not in state.busy,
+        }
+
+    def view_setters(self):
+        """Как применить каждое значение модели представления к виджетам"""
+        setters = {
+            'status_icon': self.status_icon.set_from_icon_name,
+            'status_title': self.status_label.set_text,
+            'vpn_action_disconnect': self.set_vpn_action_mode,
+            'vpn_action_sensitive': self.vpn_action_btn.set_sensitive,
+            'location_dropdown_sensitive': self.location_dropdown.set_sensitive,
+            'switch_location_sensitive': self.switch_location_btn.set_sensitive,
+            'refresh_locations_sensitive': self.refresh_locations_btn.set_sensitive,
+            'location_spinner': self.set_location_spinner,
+            'location_text': self.location_label.set_text,
+            'stats_text': self.stats_label.set_text,
+            'auth_status_text': self.auth_status_label.set_text,
+        }
+        # Виджеты остальных вкладок существуют только после их первого открытия
+        if "auth" in self.built_tabs:
+            setters.update({
+                'account_text': self.account_info_label.set_text,
+                'check_auth_sensitive': self.check_auth_btn.set_sensitive,
+                'login_sensitive': self.login_btn.set_sensitive,
+                'logout_sensitive': self.logout_btn.set_sensitive,
+            })
+        if "settings" in self.built_tabs:
+            setters.update({
+                'exclusions': self.update_exclusions_display,
+                'exclusions_status': self.exclusions_status_label.set_text,
+                'exclusions_sync_sensitive': self.exclusions_sync_btn.set_sensitive,
+            })
+        if "extra" in self.built_tabs:
+            setters.update({
+                'update_status_text': self.update_status_label.set_text,
+                'check_update_sensitive': self.check_update_btn.set_sensitive,
+                'update_sensitive': self.update_btn.set_sensitive,
+                'export_logs_sensitive': self.export_logs_btn.set_sensitive,
+            })
+        return setters
+
+    def render_state(self, state):
+        """Отрисовка состояния: трогаем только виджеты, чьи значения изменились"""
+        setters = self.view_setters()
+        for key, value in self.view_model(state).items():
+            setter = setters.get(key)
+            if setter is None:
+                continue  # Вкладка не построена, значение применится при ее открытии
+            if key in self.rendered_view and self.rendered_view[key] == value:
+                continue
+            setter(value)
+            self.rendered_view[key] = value
+        
+        if self.rendered_view.get('vpn_action_sensitive') and self.vpn_status == "disconnected":
+            self.profiler.mark("ready_to_connect")
+
+    def set_vpn_action_mode(self, disconnect):
+        """Вид кнопки подключения/отключения"""
+        if disconnect:
+            self.vpn_action_btn.set_label("Отключить")
+            self.vpn_action_btn.remove_css_class("suggested-action")
+            self.vpn_action_btn.add_css_class("destructive-action")
+        else:
+            self.vpn_action_btn.set_label("Подключить")
+            self.vpn_action_btn.remove_css_class("destructive-action")
+            self.vpn_action_btn.add_css_class("suggested-action")
+
+    def set_location_spinner(self, active):
+        """Индикатор загрузки локаций"""
+        if active:
+            self.location_spinner.start()
+        else:
+            self.location_spinner.stop()
+        self.location_spinner.set_visible(active)
+# ==================== Конец УПРАВЛЕНИЕ СТАТУСОМ ====================
+
+# ==================== Начало ВСПОМОГАТЕЛЬНЫЕ ФУНКЦИИ ====================
+    def on_close_request(self, window):
+        """Закрытие окна: дописываем профиль запуска и последние метрики, останавливаем помощника"""
+        self.profiler.finish()
+        self.metrics_exporter.stop()
+        self.client.stop_helper()
+        if self.login_future is not None:
+            # Процесс login завершается вместе с окном, а не ждет подтверждения до LOGIN_TIMEOUT
+            self.login_future.cancel()
+        if self.failover is not None:
+            self.failover.stop()
+        if self.update_scheduler is not None:
+            self.update_scheduler.stop()
+        return False
+
+    def on_first_frame(self, widget, frame_clock):
+        """Время от создания окна до первого кадра"""
+        print(f"Первый кадр через {(time.perf_counter() - self.init_started) * 1000:.1f} мс")
+        self.profiler.mark("first_frame")
+        return GLib.SOURCE_REMOVE
+
+    def check_adguard_installed(self):
+        """Проверка установки AdGuard VPN"""
+        if not os.path.exists(ADGUARD_PATH):
+            self.show_error(f"AdGuard VPN не найден по пути: {ADGUARD_PATH}")
+        else:
+            print(f"AdGuard VPN найден: {ADGUARD_PATH}")
+
+    def show_error(self, message):
+        """Показать ошибку"""
+        dialog = Gtk.MessageDialog(
+            transient_for=self,
+            modal=True,
+            message_type=Gtk.MessageType.ERROR,
+            buttons=Gtk.ButtonsType.OK,
+            text="Ошибка"
+        )
+        dialog.set_property("secondary-text", message)
+        dialog.connect("response", lambda d, r: d.destroy())
+        dialog.present()
+
+    def show_info(self, title, message):
+        """Показать информационное сообщение"""
+        dialog = Gtk.MessageDialog(
+            transient_for=self,
+            modal=True,
+            message_type=Gtk.MessageType.INFO,
+            buttons=Gtk.ButtonsType.OK,
+            text=title
+        )
+        dialog.set_property("secondary-text", message)
+        dialog.connect("response", lambda d, r: d.destroy())
+        dialog.present()
+# ==================== Конец ВСПОМОГАТЕЛЬНЫЕ ФУНКЦИИ ====================
+
+# ==================== Начало ПРИЛОЖЕНИЕ ====================
+class AdGuardVPNApp(Adw.Application):
+    def __init__(self, profiler=None):
+        super().__init__(application_id=APP_ID, flags=0)
+        self.profiler = profiler
+
+    def do_activate(self):
+        win = self.props.active_window
+        if not win:
+            if self.profiler:
+                self.profiler.mark("app_activate")
+            win = AdGuardVPNWindow(application=self, profiler=self.profiler)
+        win.present()
+# ==================== Конец ПРИЛОЖЕНИЕ ====================
+
+# ==================== Начало ЗАПУСК ====================
+def run_gui(argv, profiler=None):
+    app = AdGuardVPNApp(profiler)
+    return app.run(argv)
+# ==================== Конец ЗАПУСК ====================
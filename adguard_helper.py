@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# ==================== ADGUARD VPN: ПРИВИЛЕГИРОВАННЫЙ ПОМОЩНИК ====================
+# Запускается один раз за сессию GUI через sudo и выполняет connect/disconnect/переключение локации от root
+# по запросам с Unix-сокета. Сокет лежит в каталоге root (/run/adguardvpn-gui, 0755) и доступен
+# только владельцу (0600), каждый клиент дополнительно проверяется по SO_PEERCRED.
+# Помощник завершается вместе с окном GUI.
+# Запуск (это делает AdGuardClient.start_helper):
+#   sudo -S python3 adguard_helper.py --cli /path/to/adguardvpn-cli serve --socket /run/adguardvpn-gui/helper-UID.sock \
+#        --uid UID --owner-pid PID
+# Разовое переключение локации без сокета (когда помощник не запущен):
+#   sudo -S python3 adguard_helper.py --cli /path/to/adguardvpn-cli switch LOCATION  ->  ответ JSON в stdout
+# Протокол: по строке JSON на запрос и на ответ
+#   {"command": "connect", "location": "JP"}  ->  {"returncode": 0, "stdout": "...", "stderr": ""}
+#   {"command": "switch", "location": "DE"}   ->  то же и "downtime": секунды без туннеля
+#   {"command": "disconnect"} / {"command": "ping"} / {"command": "shutdown"}
+#   ошибка запроса: {"error": "..."}; таймаут CLI: {"timeout": true}
+import argparse
+import json
+import os
+import socket
+import socketserver
+import stat
+import struct
+import subprocess
+import sys
+import threading
+import time
+
+COMMAND_TIMEOUTS = {'connect': 60, 'disconnect': 30}  # Таймауты команд CLI (сек)
+OWNER_CHECK_INTERVAL = 5  # Как часто проверяем, что окно GUI еще работает (сек)
+MAX_LOCATION_LENGTH = 100
+
+
+# ==================== Начало КОМАНДЫ CLI ====================
+def valid_location(location):
+    """Локация уходит в argv одним элементом; не пропускаем пустые значения, флаги и управляющие символы"""
+    return (
+        isinstance(location, str) and 0 < len(location) <= MAX_LOCATION_LENGTH
+        and not location.startswith("-") and location.isprintable()
+    )
+
+
+def run_cli(args, timeout):
+    """Запуск adguardvpn-cli; ответ в формате протокола"""
+    try:
+        result = subprocess.run(args, capture_output=True, text=True, timeout=timeout, stdin=subprocess.DEVNULL)
+    except subprocess.TimeoutExpired:
+        return {'timeout': True}
+    except OSError as e:
+        return {'error': str(e)}
+    return {'returncode': result.returncode, 'stdout': result.stdout, 'stderr': result.stderr}
+
+
+def switch_location(cli_path, location):
+    """disconnect и сразу connect -l на новую локацию в одном процессе root, без промежуточных sudo и GUI"""
+    started = time.monotonic()
+    disconnect = run_cli([cli_path, "disconnect"], COMMAND_TIMEOUTS['disconnect'])
+    if 'returncode' not in disconnect:
+        return disconnect
+    # Ошибка disconnect (например, туннель уже упал) не мешает подключиться к новой локации
+    connect = run_cli([cli_path, "connect", "-l", location], COMMAND_TIMEOUTS['connect'])
+    downtime = round(time.monotonic() - started, 3)  # Сверху: туннель снимается в начале disconnect
+    if 'returncode' not in connect:
+        return dict(connect, downtime=downtime)
+    return {
+        'returncode': connect['returncode'],
+        'stdout': disconnect['stdout'] + connect['stdout'],
+        'stderr': disconnect['stderr'] + connect['stderr'],
+        'downtime': downtime,
+    }
+# ==================== Конец КОМАНДЫ CLI ====================
+
+
+# ==================== Начало СЕРВЕР ====================
+def peer_credentials(sock):
+    """(pid, uid, gid) процесса на другом конце Unix-сокета"""
+    return struct.unpack("3i", sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i")))
+
+
+def prepare_socket_dir(path):
+    """Каталог сокета: создаем 0755 root:root; существующий должен принадлежать root и не быть доступен
+    на запись другим - иначе пользователь подменит файл сокета ссылкой до chown"""
+    directory = os.path.dirname(os.path.abspath(path))
+    try:
+        os.mkdir(directory, 0o755)
+    except FileExistsError:
+        pass
+    info = os.lstat(directory)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != 0 or info.st_mode & 0o022:
+        raise PermissionError(f"каталог сокета {directory} должен принадлежать root и быть недоступен на запись другим")
+
+
+def remove_socket(path):
+    """Удаляем оставшийся сокет; по ссылкам не переходим, файлы других типов не трогаем"""
+    try:
+        info = os.lstat(path)
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(info.st_mode):
+        raise PermissionError(f"{path} существует и не является сокетом")
+    os.unlink(path)
+
+
+class HelperRequestHandler(socketserver.StreamRequestHandler):
+    """Запросы одного подключения: по строке JSON"""
+
+    def handle(self):
+        for raw_line in self.rfile:
+            try:
+                request = json.loads(raw_line)
+            except ValueError:
+                self.reply({'error': "некорректный JSON"})
+                continue
+            if not isinstance(request, dict):
+                self.reply({'error': "ожидается объект JSON"})
+                continue
+            self.reply(self.server.execute(request))
+
+    def reply(self, response):
+        self.wfile.write(json.dumps(response, ensure_ascii=False).encode() + b"\n")
+        self.wfile.flush()
+
+
+class HelperServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unix-сокет помощника; команды CLI выполняются строго по одной"""
+
+    daemon_threads = True
+
+    def __init__(self, path, allowed_uid, cli_path):
+        self.allowed_uid = allowed_uid
+        self.cli_path = cli_path
+        self.cli_lock = threading.Lock()  # connect, disconnect и switch не должны пересекаться
+        old_umask = os.umask(0o177)  # Сокет создается сразу с правами 0600, без окна гонки
+        try:
+            super().__init__(path, HelperRequestHandler)
+        finally:
+            os.umask(old_umask)
+        # Каталог принадлежит root, и chown все равно не переходит по ссылке
+        os.chown(path, allowed_uid, -1, follow_symlinks=False)
+
+    def verify_request(self, request, client_address):
+        _, uid, _ = peer_credentials(request)
+        return uid in (self.allowed_uid, 0)
+
+    def execute(self, request):
+        command = request.get('command')
+        if command == "ping":
+            return {'pong': True}
+        if command == "shutdown":
+            # shutdown() ждет выхода из serve_forever: вызываем не из потока обработчика ответа
+            threading.Thread(target=self.shutdown, daemon=True).start()
+            return {'stopping': True}
+        if command == "disconnect":
+            with self.cli_lock:
+                return run_cli([self.cli_path, "disconnect"], COMMAND_TIMEOUTS['disconnect'])
+        if command not in ("connect", "switch"):
+            return {'error': f"неизвестная команда: {command}"}
+
+        location = request.get('location')
+        if not valid_location(location):
+            return {'error': "некорректная локация"}
+        with self.cli_lock:
+            if command == "switch":
+                return switch_location(self.cli_path, location)
+            return run_cli([self.cli_path, "connect", "-l", location], COMMAND_TIMEOUTS['connect'])
+# ==================== Конец СЕРВЕР ====================
+
+
+# ==================== Начало ЗАПУСК ====================
+def helper_running(path):
+    """Отвечает ли на сокете уже запущенный помощник"""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(2)
+            sock.connect(path)
+            sock.sendall(b'{"command": "ping"}\n')
+            return b"pong" in sock.recv(256)
+    except OSError:
+        return False
+
+
+def watch_owner(server, owner_pid):
+    """Останавливаем помощника, когда процесс GUI завершился"""
+    while True:
+        time.sleep(OWNER_CHECK_INTERVAL)
+        try:
+            os.kill(owner_pid, 0)
+        except ProcessLookupError:
+            server.shutdown()
+            return
+        except PermissionError:
+            pass
+
+
+def detach():
+    """Уходим в фон: родитель завершается (sudo возвращает управление GUI), потомок обслуживает сокет"""
+    if os.fork():
+        print("ready", flush=True)
+        os._exit(0)
+    os.setsid()
+    devnull = os.open(os.devnull, os.O_RDWR)
+    for fd in (0, 1, 2):
+        os.dup2(devnull, fd)
+    os.close(devnull)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Привилегированный помощник AdGuard VPN GUI")
+    parser.add_argument("--cli", required=True, help="путь к adguardvpn-cli")
+    modes = parser.add_subparsers(dest="mode", required=True)
+    serve_parser = modes.add_parser("serve", help="обслуживать запросы на Unix-сокете")
+    serve_parser.add_argument("--socket", required=True, help="путь к Unix-сокету")
+    serve_parser.add_argument("--uid", type=int, required=True, help="пользователь, которому разрешены запросы")
+    serve_parser.add_argument("--owner-pid", type=int, required=True, help="процесс GUI; помощник живет, пока жив он")
+    switch_parser = modes.add_parser("switch", help="разово переключиться на другую локацию")
+    switch_parser.add_argument("location")
+    args = parser.parse_args(argv)
+
+    if os.geteuid() != 0:
+        print("Помощник должен запускаться от root", file=sys.stderr)
+        return 1
+    if args.mode == "switch":
+        if not valid_location(args.location):
+            response = {'error': "некорректная локация"}
+        else:
+            response = switch_location(args.cli, args.location)
+        print(json.dumps(response, ensure_ascii=False))
+        return response.get('returncode', 1)
+    try:
+        prepare_socket_dir(args.socket)
+    except PermissionError as e:
+        print(e, file=sys.stderr)
+        return 1
+    if helper_running(args.socket):
+        print("ready", flush=True)
+        return 0
+    try:
+        remove_socket(args.socket)  # Оставшийся от прошлой сессии
+        server = HelperServer(args.socket, args.uid, args.cli)
+    except PermissionError as e:
+        print(e, file=sys.stderr)
+        return 1
+    detach()
+    threading.Thread(target=watch_owner, args=(server, args.owner_pid), daemon=True).start()
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        try:
+            remove_socket(args.socket)
+        except PermissionError:
+            pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
+# ==================== Конец ЗАПУСК ====================
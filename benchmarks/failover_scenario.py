@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# ==================== СЦЕНАРИИ АВТОПЕРЕКЛЮЧЕНИЯ ====================
+# Прогоняет FailoverController на поддельном adguardvpn-cli и локальном TCP-ответчике:
+# отказ ответчика, пауза между переключениями, неудачные переключения (пауза растет), подавление флаппинга,
+# и отсутствие переподключения после отключения пользователем (в том числе во время замера) или другим процессом.
+# Время контроллера ручное: проверки выполняются сразу, без ожидания интервалов.
+# Запуск: python3 benchmarks/failover_scenario.py
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FAKE_CLI = os.path.join(BENCH_DIR, "fake_adguardvpn_cli.py")
+
+# Путь к CLI читается при импорте клиента: подменяем до импорта
+os.environ["ADGUARD_GUI_CLI_PATH"] = FAKE_CLI
+os.environ.update(FAKE_CLI_LOCATIONS="10", FAKE_CLI_ANSI="1", FAKE_CLI_LATENCY="0", FAKE_CLI_SEED="1")
+os.environ.pop("ADGUARD_GUI_HELPER", None)
+os.environ["ADGUARD_GUI_CACHE"] = "0"  # Сценарии меняют состояние поддельного CLI в обход клиента
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import adguard_client  # noqa: E402
+
+
+class ProbeResponder:
+    """Локальный TCP-адрес для замера; stop() имитирует недоступность через туннель"""
+
+    def __init__(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(("127.0.0.1", 0))
+        self.port = self.sock.getsockname()[1]
+        self.running = False
+
+    @property
+    def target(self):
+        return f"tcp://127.0.0.1:{self.port}"
+
+    def start(self):
+        self.sock.listen(16)
+        self.running = True
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while self.running:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            conn.close()
+
+    def stop(self):
+        # Закрытый сокет: connect получает отказ, как при недоступном адресе
+        self.running = False
+        # shutdown будит поток, ждущий в accept(): без него сокет остается слушающим до следующего подключения
+        self.sock.shutdown(socket.SHUT_RDWR)
+        self.sock.close()
+
+
+class ManualClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+def make_client():
+    client = adguard_client.AdGuardClient()
+    if os.geteuid() != 0:
+        # Поддельному CLI root не нужен: обходим sudo, как e2e_connect_flow в suite.py
+        client.run_as_root = lambda argv, password=None, timeout=30: client.transport.run_sync(argv, timeout=timeout)
+    return client
+
+
+def connected_location(state_dir):
+    try:
+        with open(os.path.join(state_dir, "connected"), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def external_disconnect():
+    """disconnect в обход клиента, как из терминала или другого GUI"""
+    subprocess.run([sys.executable, FAKE_CLI, "disconnect"], capture_output=True, check=True)
+
+
+def run_scenarios(state_dir):
+    """Список (сценарий, пройден, подробности)"""
+    client = make_client()
+    responder = ProbeResponder()
+    responder.start()
+    clock = ManualClock()
+    events = []
+    ranked = ["AA", "AB", "AC", "AD", "AE"]
+    controller = adguard_client.FailoverController(
+        client, candidates=lambda: ranked, on_event=lambda kind, info: events.append((kind, info)),
+        status_probe=client.status, probe_target=responder.target, threshold=2,
+        backoff_initial=10, backoff_max=40, flap_window=300, flap_limit=3, clock=clock
+    )
+    results = []
+
+    def check(times, step=1):
+        for _ in range(times):
+            controller.check_once()
+            clock.advance(step)
+
+    def kinds():
+        return [kind for kind, _ in events]
+
+    assert client.connect("AA").returncode == 0
+    controller.track("AA")
+
+    # 1. Здоровый туннель: ни одного события
+    check(3)
+    results.append(("здоровый туннель", not events and connected_location(state_dir) == "AA", kinds()))
+
+    # 2. Адрес замера недоступен: после порога - переход на следующую по скорости
+    events.clear()
+    responder.stop()
+    check(2)
+    ok = kinds() == ["degraded", "degraded", "switching", "switched"] and connected_location(state_dir) == "AB"
+    results.append(("недоступен адрес замера", ok, kinds()))
+
+    # 3. Адрес все еще недоступен: переключение не раньше паузы (10 с после прошлого), AA пропускаем - она деградировала
+    events.clear()
+    check(2, step=2)  # Порог достигнут, но пауза еще идет
+    waited = "switching" not in kinds()
+    clock.advance(10)
+    check(1)
+    ok = waited and kinds()[-1] == "switched" and connected_location(state_dir) == "AC"
+    results.append(("пауза между переключениями", ok, kinds()))
+
+    # 4. Переключение не удается: следующая попытка через удвоенную паузу (40 с - максимум)
+    events.clear()
+    os.environ["FAKE_CLI_FAILURE_RATE"] = "1"
+    clock.advance(40)
+    check(2)
+    failed = [info for kind, info in events if kind == "failed"]
+    os.environ.pop("FAKE_CLI_FAILURE_RATE")
+    ok = len(failed) == 1 and failed[0]['location'] == "AD" and failed[0]['retry_in'] == 40
+    results.append(("неудачное переключение", ok, [(k, i.get('location'), i.get('retry_in')) for k, i in events]))
+
+    # 5. Флаппинг: три переключения за окно уже были, четвертого нет до конца окна;
+    #    потом прежние неудачи забыты и выбирается самая быстрая AA
+    events.clear()
+    clock.advance(40)
+    check(2)
+    damped = "damped" in kinds() and "switching" not in kinds()
+    clock.advance(300)
+    check(1)
+    ok = damped and kinds()[-1] == "switched" and connected_location(state_dir) == "AA"
+    results.append(("подавление флаппинга", ok, kinds()))
+
+    # 6. Пользователь нажал "Отключить", пока шел замер: порог достигнут, но туннель не поднимаем
+    events.clear()
+    clock.advance(400)  # Пауза и окно флаппинга позади: без отключения переключение бы состоялось
+    check(1)
+    probe = controller.check_health
+    controller.check_health = lambda: (client.disconnect(), probe())[1]
+    check(3)
+    controller.check_health = probe
+    ok = (
+        "switching" not in kinds() and kinds().count("degraded") == 2
+        and connected_location(state_dir) is None and controller.location is None
+    )
+    results.append(("отключение пользователем во время замера", ok, kinds()))
+
+    # 7. Отключение другим процессом: следить перестаем, не переподключаемся
+    events.clear()
+    assert client.connect("AB").returncode == 0
+    controller.track("AB")
+    external_disconnect()
+    clock.advance(400)
+    check(3)
+    ok = kinds() == ["stopped"] and connected_location(state_dir) is None and controller.location is None
+    results.append(("отключение другим процессом", ok, kinds()))
+
+    controller.stop()
+    return results
+
+
+def main():
+    state_dir = tempfile.mkdtemp(prefix="adguard-failover-")
+    os.environ["FAKE_CLI_STATE_DIR"] = state_dir
+    try:
+        results = run_scenarios(state_dir)
+    finally:
+        shutil.rmtree(state_dir, ignore_errors=True)
+
+    for name, ok, details in results:
+        print(f"{'OK    ' if ok else 'ОШИБКА'} {name}: {details}")
+    return 0 if all(ok for _, ok, _ in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# ==================== ПОДДЕЛЬНЫЙ ADGUARDVPN-CLI ====================
+# Заменяет настоящий adguardvpn-cli для замеров: ADGUARD_GUI_CLI_PATH=benchmarks/fake_adguardvpn_cli.py
+# Настройка через переменные окружения:
+#   FAKE_CLI_LATENCY         задержка перед выводом каждой команды, сек (0)
+#   FAKE_CLI_JITTER          случайная добавка к задержке, сек (0)
+#   FAKE_CLI_LINE_DELAY      пауза между строками list-locations, сек (0)
+#   FAKE_CLI_LOCATIONS       количество локаций (60)
+#   FAKE_CLI_EXCLUSIONS      начальное количество исключений (20)
+#   FAKE_CLI_FAILURE_RATE    доля вызовов, завершающихся ошибкой, 0..1 (0)
+#   FAKE_CLI_ANSI            1 - окрашивать вывод ANSI-кодами, как настоящий CLI (1)
+#   FAKE_CLI_STATE_DIR       каталог состояния (подключение, исключения) (/tmp/fake-adguardvpn-cli)
+#   FAKE_CLI_SEED            зерно генератора для воспроизводимых прогонов
+import fcntl
+import os
+import random
+import sys
+import time
+
+LATENCY = float(os.environ.get("FAKE_CLI_LATENCY", "0"))
+JITTER = float(os.environ.get("FAKE_CLI_JITTER", "0"))
+LINE_DELAY = float(os.environ.get("FAKE_CLI_LINE_DELAY", "0"))
+LOCATIONS = int(os.environ.get("FAKE_CLI_LOCATIONS", "60"))
+EXCLUSIONS = int(os.environ.get("FAKE_CLI_EXCLUSIONS", "20"))
+FAILURE_RATE = float(os.environ.get("FAKE_CLI_FAILURE_RATE", "0"))
+ANSI = os.environ.get("FAKE_CLI_ANSI", "1") == "1"
+STATE_DIR = os.environ.get("FAKE_CLI_STATE_DIR", "/tmp/fake-adguardvpn-cli")
+
+COUNTRIES = ("Japan", "Germany", "United States", "France", "Netherlands", "Brazil", "Canada", "Singapore")
+CITIES = ("Tokyo", "Frankfurt", "New York", "Paris", "Amsterdam", "Sao Paulo", "Toronto", "Marina Bay")
+LETTERS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+
+def paint(text, code="1"):
+    """Оформление ANSI-кодами, которые приложение должно вычищать"""
+    return f"\x1b[{code}m{text}\x1b[0m" if ANSI else text
+
+
+def location_code(i):
+    return LETTERS[i // 26 % 26] + LETTERS[i % 26] + (str(i // 676) if i >= 676 else "")
+
+
+def location_rows(count):
+    """Строки в формате list-locations: код, страна, город (без цифр), пинг"""
+    rng = random.Random(count)
+    for i in range(count):
+        city = CITIES[i % len(CITIES)] + " " + LETTERS[i // len(CITIES) % 26] * 2
+        yield location_code(i), COUNTRIES[i % len(COUNTRIES)], city, rng.randint(5, 400)
+
+
+def initial_exclusions(count):
+    return [f"site{i}.example{i % 97}.com" for i in range(count)]
+
+
+def state_path(name):
+    os.makedirs(STATE_DIR, exist_ok=True)
+    return os.path.join(STATE_DIR, name)
+
+
+def read_state(name, default=""):
+    try:
+        with open(state_path(name), encoding="utf-8") as f:
+            return f.read()
+    except FileNotFoundError:
+        return default
+
+
+def write_state(name, text):
+    with open(state_path(name), "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def fail(message="simulated failure"):
+    print(paint(f"Error: {message}", "31"), file=sys.stderr)
+    return 1
+
+
+def cmd_license(args):
+    print(paint("Logged in as", "1") + " bench@example.com")
+    print("You are using the PREMIUM version")
+    print("Up to 10 devices simultaneously")
+    print("Your subscription will be renewed on 2027-01-01")
+    return 0
+
+
+def cmd_status(args):
+    location = read_state("connected").strip()
+    if location:
+        print(paint(f"Connected to {location} in TUN mode, running on tun0", "32"))
+    else:
+        print(paint("VPN is disconnected", "33"))
+    return 0
+
+
+def cmd_list_locations(args):
+    print(paint(f"{'ISO':<6}{'COUNTRY':<20}{'CITY':<30}PING ESTIMATE"))
+    for code, country, city, ping in location_rows(LOCATIONS):
+        print(f"{paint(f'{code:<6}', '1')}{country:<20}{city:<30}{ping}", flush=LINE_DELAY > 0)
+        if LINE_DELAY:
+            time.sleep(LINE_DELAY)
+    print(paint("You can connect to a location by running `adguardvpn-cli connect -l <city, country or ISO code>`", "2"))
+    return 0
+
+
+def cmd_connect(args):
+    location = args[args.index("-l") + 1] if "-l" in args else "FASTEST"
+    write_state("connected", location)
+    print(paint(f"Successfully Connected to {location}", "32"))
+    return 0
+
+
+def cmd_disconnect(args):
+    write_state("connected", "")
+    print(paint("Disconnected", "32"))
+    return 0
+
+
+def cmd_site_exclusions(args):
+    action, domains = (args[0], args[1:]) if args else ("list", [])
+    with open(state_path("exclusions.lock"), "a") as lock:
+        # Параллельные вызовы add/remove не должны терять изменения друг друга
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        stored = read_state("exclusions", None)
+        current = set(stored.split()) if stored is not None else set(initial_exclusions(EXCLUSIONS))
+        if action == "list":
+            print(paint("Site exclusions (general mode):", "1"))
+            for domain in sorted(current):
+                print(domain)
+            return 0
+        if action == "add":
+            current.update(domains)
+        elif action == "remove":
+            current.difference_update(domains)
+        else:
+            return fail(f"unknown action {action}")
+        write_state("exclusions", "\n".join(sorted(current)))
+    print(paint(f"{len(domains)} exclusions updated", "32"))
+    return 0
+
+
+def cmd_check_update(args):
+    print("You are using the latest version")
+    return 0
+
+
+def cmd_login(args):
+    print("Please open the following link in your browser:", flush=True)
+    print(paint("https://auth.example.com/device?code=BENCH", "4"), flush=True)
+    sys.stdin.readline()
+    print("Successfully logged in")
+    return 0
+
+
+def cmd_simple(message):
+    def run(args):
+        print(message)
+        return 0
+    return run
+
+
+COMMANDS = {
+    "license": cmd_license,
+    "status": cmd_status,
+    "list-locations": cmd_list_locations,
+    "connect": cmd_connect,
+    "disconnect": cmd_disconnect,
+    "site-exclusions": cmd_site_exclusions,
+    "check-update": cmd_check_update,
+    "update": cmd_check_update,
+    "login": cmd_login,
+    "logout": cmd_simple("Logged out"),
+    "export-logs": cmd_simple("Logs exported to adguardvpn-cli-logs.zip"),
+}
+
+
+def main(argv):
+    if "FAKE_CLI_SEED" in os.environ:
+        random.seed(f"{os.environ['FAKE_CLI_SEED']}:{' '.join(argv)}")
+    if LATENCY or JITTER:
+        time.sleep(LATENCY + random.uniform(0, JITTER))
+    if not argv or argv[0] not in COMMANDS:
+        return fail(f"unknown command {' '.join(argv)}")
+    if FAILURE_RATE and random.random() < FAILURE_RATE:
+        return fail()
+    return COMMANDS[argv[0]](argv[1:])
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# ==================== СРАВНЕНИЕ ПАМЯТИ: ЛОКАЦИИ ====================
+# Сравнивает память на большой синтетический список локаций:
+# прежний формат (dict на строку + готовая строка display) и записи Location.
+# Запуск: python3 benchmarks/location_memory.py [количество]
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from adguard_client import Location  # noqa: E402 (модуль клиента не импортирует GTK)
+
+
+def synthetic_rows(count):
+    """Строки в том виде, в каком их отдает парсер list-locations"""
+    return [(f"C{i % 250:03d}", f"Country{i % 250} City{i}", 20 + i % 400) for i in range(count)]
+
+
+def legacy_records(rows):
+    """Прежний формат parse_locations"""
+    return [
+        {
+            'code': code,
+            'name': name,
+            'ping': ping,
+            'display': f"{code} - {name} ({ping}ms)"
+        }
+        for code, name, ping in rows
+    ]
+
+
+def location_records(rows, location_cls):
+    return [location_cls(code, name, ping) for code, name, ping in rows]
+
+
+def measure(build, rows):
+    """Память (байт), удерживаемая результатом build(rows)"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    records = build(rows)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del records
+    return after - before
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    rows = synthetic_rows(count)
+
+    legacy = measure(legacy_records, rows)
+    compact = measure(lambda r: location_records(r, Location), rows)
+
+    print(f"Локаций: {count}")
+    print(f"dict + display:  {legacy / 1024:10.1f} КиБ ({legacy / count:6.1f} байт/локация)")
+    print(f"Location:        {compact / 1024:10.1f} КиБ ({compact / count:6.1f} байт/локация)")
+    print(f"Экономия:        {(1 - compact / legacy) * 100:9.1f} %")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
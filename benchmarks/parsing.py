@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# ==================== ПРОПУСКНАЯ СПОСОБНОСТЬ РАЗБОРА ====================
+# Проверяет парсеры adguard_client на образцах вывода CLI (benchmarks/corpus, ожидаемое - expected.json)
+# и меряет скорость разбора каждого парсера в МБ/с на образце, размноженном до заданного размера.
+# Запуск: python3 benchmarks/parsing.py [размер_МБ]
+import json
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+CORPUS_DIR = os.path.join(BENCH_DIR, "corpus")
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import adguard_client  # noqa: E402 (модуль клиента не импортирует GTK)
+
+
+def load_corpus():
+    with open(os.path.join(CORPUS_DIR, "expected.json"), encoding="utf-8") as f:
+        expected = json.load(f)
+    for name, case in expected.items():
+        with open(os.path.join(CORPUS_DIR, name), encoding="utf-8", newline="") as f:
+            yield name, f.read(), case
+
+
+def comparable(result):
+    """Результат парсера в виде, сравнимом с JSON"""
+    if hasattr(result, "_asdict"):
+        return result._asdict()
+    if isinstance(result, list):
+        return [[item.code, item.name, item.ping] if isinstance(item, adguard_client.Location) else item
+                for item in result]
+    return result
+
+
+def check_corpus():
+    """Список расхождений с expected.json"""
+    failures = []
+    for name, text, case in load_corpus():
+        actual = comparable(getattr(adguard_client, case['parser'])(text))
+        if actual != case['result']:
+            failures.append(f"{name}: {case['parser']} -> {actual!r}, ожидалось {case['result']!r}")
+    return failures
+
+
+def throughput(parser, text, size_mb):
+    """МБ/с для parser на тексте, размноженном до size_mb (лучший из трех прогонов)"""
+    data = text * max(1, int(size_mb * 1024 * 1024 / len(text.encode("utf-8"))))
+    megabytes = len(data.encode("utf-8")) / (1024 * 1024)
+    best = min(timed(parser, data) for _ in range(3))
+    return megabytes / best
+
+
+def timed(parser, data):
+    started = time.perf_counter()
+    parser(data)
+    return time.perf_counter() - started
+
+
+def main():
+    size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 4
+    failures = check_corpus()
+    for failure in failures:
+        print(f"ОШИБКА {failure}")
+    if failures:
+        return 1
+    print("Образцы вывода разобраны верно")
+
+    print(f"{'образец':<30}{'парсер':<22}{'МБ/с':>10}")
+    for name, text, case in load_corpus():
+        parser = getattr(adguard_client, case['parser'])
+        print(f"{name:<30}{case['parser']:<22}{throughput(parser, text, size_mb):>10.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# ==================== СЦЕНАРИИ ЗАМЕРА ЗАДЕРЖКИ ====================
+# Прогоняет LatencyProber на локальных TCP/UDP-ответчиках с заданными задержками и потерями:
+# порядок по RTT, медиана при потерях, таймауты, недоступные и некорректные адреса, кэш,
+# чтение файла адресов (без файла замер выключен).
+# Задержку TCP на loopback не задать (соединение принимает ядро): медленный TCP-адрес - сокет
+# с заполненной очередью accept, ядро отбрасывает SYN, и клиент повторяет его примерно через 1 с.
+# Запуск: python3 benchmarks/prober_scenario.py
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import adguard_client  # noqa: E402
+
+
+class UdpResponder:
+    """Отвечает на датаграммы через delay секунд; каждую lose_every-ю датаграмму теряет (0 - без потерь)"""
+
+    def __init__(self, delay=0.0, lose_every=0, silent=False):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.delay = delay
+        self.lose_every = lose_every
+        self.silent = silent
+        self.received = 0
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    @property
+    def target(self):
+        return f"udp://127.0.0.1:{self.sock.getsockname()[1]}"
+
+    def _serve(self):
+        while True:
+            data, address = self.sock.recvfrom(512)
+            self.received += 1
+            if self.silent or (self.lose_every and self.received % self.lose_every == 0):
+                continue
+            threading.Timer(self.delay, self.sock.sendto, (data, address)).start()
+
+
+class TcpResponder:
+    """Принимает соединения сразу; backlog_full=True - очередь accept заполнена, новые SYN отбрасываются;
+    release_after - через сколько секунд освободить очередь (первый повтор SYN тогда пройдет)"""
+
+    def __init__(self, backlog_full=False, release_after=None):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.fillers = []
+        if backlog_full:
+            self.sock.listen(0)
+            # Очередь длиной backlog + 1: занимаем ее соединениями, которые никто не примет
+            for _ in range(2):
+                filler = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                filler.setblocking(False)
+                filler.connect_ex(self.sock.getsockname())
+                self.fillers.append(filler)
+            time.sleep(0.1)
+            if release_after is not None:
+                threading.Timer(release_after, self._release).start()
+        else:
+            self.sock.listen(64)
+            threading.Thread(target=self._accept, daemon=True).start()
+
+    @property
+    def target(self):
+        return f"tcp://127.0.0.1:{self.sock.getsockname()[1]}"
+
+    def _release(self):
+        for filler in self.fillers:
+            filler.close()
+        self.sock.settimeout(0.5)
+        try:
+            while True:
+                self.sock.accept()[0].close()
+        except OSError:
+            pass
+        self.sock.settimeout(None)
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while True:
+            conn, _ = self.sock.accept()
+            conn.close()
+
+
+def closed_port_target():
+    """Адрес, на котором никто не слушает: соединение сразу отклоняется"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return f"tcp://127.0.0.1:{sock.getsockname()[1]}"
+
+
+def timed_probe(prober, endpoints):
+    started = time.monotonic()
+    result = prober.probe(endpoints)
+    return result, time.monotonic() - started
+
+
+def run_scenarios():
+    """Список (сценарий, пройден, подробности)"""
+    runtime = adguard_client.AsyncioRuntime()
+    results = []
+
+    # 1. Порядок по RTT: TCP без задержки < UDP 20 мс < UDP 80 мс < TCP с повтором SYN (~1 с).
+    #    Один замер на адрес: после первого соединения очередь медленного адреса уже свободна
+    endpoints = {
+        'udp80': UdpResponder(delay=0.08).target,
+        'tcp_slow': TcpResponder(backlog_full=True, release_after=0.5).target,
+        'udp20': UdpResponder(delay=0.02).target,
+        'tcp': TcpResponder().target,
+    }
+    prober = adguard_client.LatencyProber(runtime, samples=1, timeout=2.0, ttl=300)
+    rtts, _ = timed_probe(prober, endpoints)
+    ranked = sorted((code for code in rtts if rtts[code] is not None), key=rtts.get)
+    ok = (
+        ranked == ['tcp', 'udp20', 'udp80', 'tcp_slow']
+        and 15 <= rtts['udp20'] < 60 and 75 <= rtts['udp80'] < 150 and rtts['tcp_slow'] >= 900
+    )
+    results.append(("порядок по задержке", ok, {code: rtt and round(rtt, 1) for code, rtt in rtts.items()}))
+
+    # 2. Кэш: повторный замер тех же адресов не ждет ответчиков
+    cached, elapsed = timed_probe(prober, endpoints)
+    results.append(("кэш замеров", cached == rtts and elapsed < 0.05, f"{elapsed * 1000:.1f} мс"))
+
+    # 3. Потери: каждая вторая датаграмма теряется - медиана по дошедшим ответам, а не None
+    lossy = adguard_client.LatencyProber(runtime, samples=4, timeout=0.3, ttl=0)
+    rtts, _ = timed_probe(lossy, {'lossy': UdpResponder(delay=0.04, lose_every=2).target})
+    ok = rtts['lossy'] is not None and 35 <= rtts['lossy'] < 100
+    results.append(("потери пакетов", ok, rtts))
+
+    # 4. Таймауты: молчащий UDP и TCP без ответа на SYN дают None; адреса замеряются параллельно,
+    #    поэтому общее время - около samples * timeout, а не сумма по адресам
+    quick = adguard_client.LatencyProber(runtime, samples=2, timeout=0.3, ttl=0)
+    silent = {f'silent{i}': UdpResponder(silent=True).target for i in range(8)}
+    silent['tcp_slow'] = TcpResponder(backlog_full=True).target
+    rtts, elapsed = timed_probe(quick, silent)
+    ok = all(rtt is None for rtt in rtts.values()) and 0.55 <= elapsed < 1.2
+    results.append(("таймауты", ok, f"{len(rtts)} адресов за {elapsed:.2f} с"))
+
+    # 5. Недоступные и некорректные адреса: None без ожидания таймаута
+    rtts, elapsed = timed_probe(quick, {'closed': closed_port_target(), 'bad': "tcp://127.0.0.1:port"})
+    ok = rtts == {'closed': None, 'bad': None} and elapsed < 0.2
+    results.append(("недоступные адреса", ok, f"{rtts}, {elapsed * 1000:.1f} мс"))
+
+    # 6. Файл адресов: без файла или с некорректным содержимым замер выключен (пустой словарь)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "probe_endpoints.json")
+        original = adguard_client.PROBE_ENDPOINTS_FILE
+        adguard_client.PROBE_ENDPOINTS_FILE = path
+        try:
+            loaded = {'нет файла': adguard_client.load_probe_endpoints()}
+            for name, content in (("адреса", json.dumps({'JP': "tcp://192.0.2.1:443", 'DE': "udp://[2001:db8::1]:53"})),
+                                  ("не JSON", "{"), ("список", json.dumps(["tcp://192.0.2.1:443"]))):
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(content)
+                loaded[name] = adguard_client.load_probe_endpoints()
+        finally:
+            adguard_client.PROBE_ENDPOINTS_FILE = original
+    ok = loaded == {
+        'нет файла': {}, 'адреса': {'JP': "tcp://192.0.2.1:443", 'DE': "udp://[2001:db8::1]:53"},
+        'не JSON': {}, 'список': {},
+    }
+    results.append(("файл адресов", ok, {name: len(endpoints) for name, endpoints in loaded.items()}))
+
+    return results
+
+
+def main():
+    results = run_scenarios()
+    for name, ok, details in results:
+        print(f"{'OK    ' if ok else 'ОШИБКА'} {name}: {details}")
+    return 0 if all(ok for _, ok, _ in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# ==================== ЗАМЕР ЛЕНИВЫХ ВКЛАДОК ====================
+# Сравнивает запуск GUI с ленивым построением вкладок и со всеми вкладками сразу (ADGUARD_GUI_EAGER_TABS=1,
+# как до ленивого построения) по отчетам --profile-startup: setup_ui, first_frame, ready_to_connect.
+# Нужны GTK 4, libadwaita и дисплей; CLI - поддельный, HOME - временный каталог.
+# Запуск: python3 benchmarks/startup_tabs.py [--runs 5]
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FAKE_CLI = os.path.join(BENCH_DIR, "fake_adguardvpn_cli.py")
+LAUNCHER = os.path.join(os.path.dirname(BENCH_DIR), "test.py")
+PHASES = ("setup_ui", "first_frame", "ready_to_connect")
+RUN_TIMEOUT = 30  # Сколько ждем отчета от одного запуска (сек)
+
+
+def run_once(eager, report_path):
+    """Один запуск GUI до записи отчета; фазы {имя: мс от старта процесса}"""
+    home = tempfile.mkdtemp(prefix="adguard-startup-")
+    env = dict(
+        os.environ, HOME=home, ADGUARD_GUI_CLI_PATH=FAKE_CLI, ADGUARD_GUI_EAGER_TABS="1" if eager else "0",
+        FAKE_CLI_STATE_DIR=home, FAKE_CLI_LOCATIONS="60", FAKE_CLI_LATENCY="0"
+    )
+    env.pop("ADGUARD_GUI_HELPER", None)
+    process = subprocess.Popen(
+        [sys.executable, LAUNCHER, "--profile-startup", "--profile-report", report_path],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+    )
+    try:
+        deadline = time.monotonic() + RUN_TIMEOUT
+        while not os.path.exists(report_path):
+            if process.poll() is not None:
+                raise RuntimeError(f"GUI завершился без отчета: {process.stderr.read().strip()[-500:]}")
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"нет отчета за {RUN_TIMEOUT} с")
+            time.sleep(0.05)
+        time.sleep(0.1)  # Отчет пишется одним json.dump, даем ему закончиться
+        with open(report_path, encoding="utf-8") as f:
+            report = json.load(f)
+    finally:
+        process.terminate()
+        try:
+            process.wait(5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+        shutil.rmtree(home, ignore_errors=True)
+    return {row['phase']: row['at_ms'] for row in report['phases']}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ленивые вкладки против построения всех вкладок при запуске")
+    parser.add_argument("--runs", type=int, default=5, help="запусков на режим")
+    args = parser.parse_args()
+    
+    report_dir = tempfile.mkdtemp(prefix="adguard-startup-reports-")
+    results = {}
+    try:
+        for mode, eager in (("все вкладки", True), ("ленивые", False)):
+            runs = []
+            for i in range(args.runs):
+                runs.append(run_once(eager, os.path.join(report_dir, f"{int(eager)}-{i}.json")))
+            results[mode] = {
+                phase: statistics.median(run[phase] for run in runs) for phase in PHASES
+                if all(phase in run for run in runs)
+            }
+    except RuntimeError as e:
+        print(f"ОШИБКА: {e}", file=sys.stderr)
+        return 1
+    finally:
+        shutil.rmtree(report_dir, ignore_errors=True)
+    
+    print(f"{'фаза (медиана, мс)':<22}" + "".join(f"{mode:>14}" for mode in results))
+    for phase in PHASES:
+        print(f"{phase:<22}" + "".join(f"{results[mode].get(phase, float('nan')):>14.1f}" for mode in results))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# ==================== НАБОР ЗАМЕРОВ ====================
+# Разбор вывода CLI и сквозные сценарии (загрузка локаций, подключение, исключения)
+# на поддельном adguardvpn-cli, с сохраненными эталонами и порогами регрессии.
+# Запуск:
+#   python3 benchmarks/suite.py                      - сравнить с benchmarks/baselines.json
+#   python3 benchmarks/suite.py --update-baselines   - записать текущие результаты как эталон
+#   python3 benchmarks/suite.py --only parse         - только замеры, в имени которых есть "parse"
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FAKE_CLI = os.path.join(BENCH_DIR, "fake_adguardvpn_cli.py")
+BASELINES_FILE = os.path.join(BENCH_DIR, "baselines.json")
+DEFAULT_THRESHOLD = 0.25  # Допустимое замедление медианы относительно эталона (25%)
+E2E_THRESHOLD = 0.5  # Для сквозных сценариев: запуск процессов шумнее чистого разбора
+
+# Путь к CLI читается при импорте клиента: подменяем до импорта
+os.environ["ADGUARD_GUI_CLI_PATH"] = FAKE_CLI
+os.environ.setdefault("FAKE_CLI_SEED", "1")
+os.environ["ADGUARD_GUI_CACHE"] = "0"  # Замеряем запуски CLI, а не попадания в кэш команд
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import adguard_client  # noqa: E402
+
+SCENARIO_ENV = {
+    "FAKE_CLI_LOCATIONS": "5000",
+    "FAKE_CLI_EXCLUSIONS": "100000",
+    "FAKE_CLI_ANSI": "1",
+    "FAKE_CLI_LATENCY": "0",
+}
+
+
+# ==================== Начало ДАННЫЕ ====================
+def fake_output(ctx, *args):
+    """Вывод поддельного CLI для заданной команды (для замеров разбора), один запуск на команду"""
+    if args not in ctx:
+        result = subprocess.run([sys.executable, FAKE_CLI] + list(args), capture_output=True, text=True, check=True)
+        ctx[args] = result.stdout
+    return ctx[args]
+# ==================== Конец ДАННЫЕ ====================
+
+
+# ==================== Начало ЗАМЕРЫ ====================
+def bench_parse_locations(ctx):
+    output = fake_output(ctx, "list-locations")
+    return lambda: adguard_client.parse_locations(output)
+
+
+def bench_parse_account_info(ctx):
+    output = fake_output(ctx, "license")
+    return lambda: adguard_client.parse_account_info(output)
+
+
+def bench_parse_status(ctx):
+    output = fake_output(ctx, "status")
+    return lambda: adguard_client.parse_status(output)
+
+
+def bench_clean_ansi_codes(ctx):
+    output = fake_output(ctx, "list-locations")
+    return lambda: adguard_client.clean_ansi_codes(output)
+
+
+def bench_parse_exclusions(ctx):
+    output = fake_output(ctx, "site-exclusions", "list")
+    return lambda: adguard_client.parse_exclusions(output)
+
+
+def bench_load_locations(ctx):
+    client = ctx["client"]
+
+    def run():
+        result, locations = client.list_locations()
+        assert result.returncode == 0 and len(locations) == int(SCENARIO_ENV["FAKE_CLI_LOCATIONS"])
+    return run
+
+
+def bench_connect_flow(ctx):
+    client = ctx["client"]
+
+    def run():
+        # Под root клиент вызывает CLI напрямую, иначе - через sudo: для замера обходим sudo
+        if os.geteuid() == 0:
+            assert client.connect("AB").returncode == 0
+            assert client.status() == "connected"
+            assert client.disconnect().returncode == 0
+        else:
+            assert client.transport.run_sync([adguard_client.ADGUARD_PATH, "connect", "-l", "AB"]).returncode == 0
+            assert client.status() == "connected"
+            assert client.transport.run_sync([adguard_client.ADGUARD_PATH, "disconnect"]).returncode == 0
+    return run
+
+
+def bench_exclusions_flow(ctx):
+    client = ctx["client"]
+
+    def run():
+        result, domains = client.list_exclusions()
+        assert result.returncode == 0
+        # Синхронизация: убрать 100 доменов и добавить 100 новых, затем вернуть исходный набор
+        desired = domains[100:] + [f"bench{i}.example.org" for i in range(100)]
+        assert client.sync_exclusions(desired) == []
+        assert client.sync_exclusions(domains) == []
+    return run
+
+
+BENCHMARKS = (
+    ("parse_locations", bench_parse_locations, 50),
+    ("parse_account_info", bench_parse_account_info, 2000),
+    ("parse_status", bench_parse_status, 2000),
+    ("clean_ansi_codes", bench_clean_ansi_codes, 50),
+    ("parse_exclusions", bench_parse_exclusions, 5),
+    ("e2e_load_locations", bench_load_locations, 5),
+    ("e2e_connect_flow", bench_connect_flow, 5),
+    ("e2e_exclusions_flow", bench_exclusions_flow, 3),
+)
+# ==================== Конец ЗАМЕРЫ ====================
+
+
+def measure(func, repeats):
+    """Медиана и минимум времени одного вызова (сек)"""
+    func()  # Прогрев
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples), min(samples)
+
+
+def load_baselines():
+    try:
+        with open(BASELINES_FILE, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'benchmarks': {}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Замеры AdGuard VPN GUI на поддельном CLI")
+    parser.add_argument("--update-baselines", action="store_true", help="сохранить результаты как эталон")
+    parser.add_argument("--only", help="подстрока имени замера")
+    parser.add_argument("--threshold", type=float, help="порог регрессии для всех замеров (доля)")
+    args = parser.parse_args()
+
+    state_dir = tempfile.mkdtemp(prefix="adguard-bench-")
+    os.environ.update(SCENARIO_ENV, FAKE_CLI_STATE_DIR=state_dir)
+    ctx = {'client': adguard_client.AdGuardClient()}
+    baselines = load_baselines()
+    results = {}
+    regressions = []
+
+    try:
+        print(f"{'замер':<22}{'медиана':>12}{'минимум':>12}{'эталон':>12}{'изменение':>12}")
+        for name, factory, repeats in BENCHMARKS:
+            if args.only and args.only not in name:
+                continue
+            median, best = measure(factory(ctx), repeats)
+            results[name] = {'median_ms': round(median * 1000, 4), 'min_ms': round(best * 1000, 4)}
+
+            baseline = baselines['benchmarks'].get(name)
+            if baseline:
+                threshold = args.threshold if args.threshold is not None else baseline['threshold']
+                change = median * 1000 / baseline['median_ms'] - 1
+                mark = "  РЕГРЕССИЯ" if change > threshold else ""
+                if mark:
+                    regressions.append(name)
+                print(f"{name:<22}{median * 1000:>10.2f}мс{best * 1000:>10.2f}мс"
+                      f"{baseline['median_ms']:>10.2f}мс{change * 100:>+11.1f}%{mark}")
+            else:
+                print(f"{name:<22}{median * 1000:>10.2f}мс{best * 1000:>10.2f}мс{'-':>12}{'-':>12}")
+    finally:
+        shutil.rmtree(state_dir, ignore_errors=True)
+
+    if args.update_baselines:
+        for name, result in results.items():
+            previous = baselines['benchmarks'].get(name, {})
+            default = E2E_THRESHOLD if name.startswith("e2e_") else DEFAULT_THRESHOLD
+            baselines['benchmarks'][name] = dict(result, threshold=previous.get('threshold', default))
+        baselines['scenario'] = SCENARIO_ENV
+        baselines['python'] = sys.version.split()[0]
+        with open(BASELINES_FILE, "w", encoding="utf-8") as f:
+            json.dump(baselines, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        print(f"Эталоны записаны в {BASELINES_FILE}")
+        return 0
+
+    if regressions:
+        print(f"Регрессии: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
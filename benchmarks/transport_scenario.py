@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# ==================== СЦЕНАРИИ ТРАНСПОРТА CLI ====================
+# Прогоняет AsyncCliTransport на обычных процессах (sh, sleep): десятки одновременных вызовов без
+# потока на вызов, таймаут, cancel() убивает процесс, построчный вывод, stdin, потомок, держащий pipe,
+# синхронная обертка и запрет ждать результат в потоке цикла.
+# Запуск: python3 benchmarks/transport_scenario.py
+import os
+import subprocess
+import sys
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import adguard_client  # noqa: E402
+
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    # Зомби еще не собран циклом: считаем завершенным
+    with open(f"/proc/{pid}/stat") as f:
+        return f.read().split(") ", 1)[1][0] != "Z"
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return predicate()
+
+
+def scenario_concurrency(transport):
+    threads_before = threading.active_count()
+    peak = [threads_before]
+    futures = [transport.submit(["sh", "-c", f"sleep 0.3; echo {i}"]) for i in range(40)]
+    while not all(f.done() for f in futures):
+        peak[0] = max(peak[0], threading.active_count())
+        time.sleep(0.01)
+    outputs = sorted(int(f.result().stdout) for f in futures)
+    extra = peak[0] - threads_before
+    return outputs == list(range(40)) and extra <= 1, f"40 вызовов, лишних потоков: {extra}"
+
+
+def scenario_timeout(transport):
+    started = time.monotonic()
+    try:
+        transport.run_sync(["sleep", "30"], timeout=0.3)
+    except subprocess.TimeoutExpired:
+        elapsed = time.monotonic() - started
+        return elapsed < 1.0, f"TimeoutExpired через {elapsed:.2f} с"
+    return False, "таймаут не сработал"
+
+
+def scenario_cancel(transport):
+    lines = []
+    future = transport.submit(["sh", "-c", "echo $$; exec sleep 30"], on_line=lines.append)
+    if not wait_for(lambda: lines):
+        return False, "процесс не запустился"
+    pid = int(lines[0])
+    future.cancel()
+    killed = wait_for(lambda: not pid_alive(pid))
+    return killed and future.cancelled(), f"pid {pid} {'убит' if killed else 'жив'} после cancel()"
+
+
+def scenario_streaming(transport):
+    stamps = []
+    started = time.monotonic()
+    result = transport.run_sync(
+        ["sh", "-c", "echo a; sleep 0.3; echo b; printf c"],
+        on_line=lambda line: stamps.append((line, time.monotonic() - started))
+    )
+    first = stamps[0][1] if stamps else None
+    ok = [line for line, _ in stamps] == ["a\n", "b\n", "c"] and first is not None and first < 0.25
+    return ok and result.stdout == "a\nb\nc", f"первая строка через {first:.2f} с, строк: {len(stamps)}"
+
+
+def scenario_stdin(transport):
+    result = transport.run_sync(["sh", "-c", "read a; read b; echo $b$a; echo err >&2; exit 3"], input_text="1\n2\n")
+    ok = (result.stdout, result.stderr, result.returncode) == ("21\n", "err\n", 3)
+    return ok, f"stdout={result.stdout!r} stderr={result.stderr!r} код {result.returncode}"
+
+
+def scenario_grandchild(transport):
+    # Потомок держит stdout открытым после выхода процесса (как браузер, запущенный login)
+    started = time.monotonic()
+    result = transport.run_sync(["sh", "-c", "echo done; sleep 30 & exit 0"], timeout=10)
+    elapsed = time.monotonic() - started
+    ok = result.stdout == "done\n" and elapsed < adguard_client.STREAM_DRAIN_TIMEOUT + 1
+    return ok, f"вернулся через {elapsed:.2f} с"
+
+
+def scenario_loop_thread(transport):
+    async def call_sync_in_loop():
+        try:
+            transport.run_sync(["true"])
+        except RuntimeError:
+            return True
+        return False
+
+    refused = transport.runtime.submit(call_sync_in_loop()).result(5)
+    return refused, "run_sync в потоке цикла отклонен" if refused else "run_sync в потоке цикла не отклонен"
+
+
+def scenario_callback(transport):
+    results = []
+    done = threading.Event()
+    transport.submit(["sh", "-c", "exit 7"], callback=lambda r: (results.append(r), done.set()))
+    transport.submit(["/nonexistent/cli"], callback=lambda r: (results.append(r), done.set()))
+    wait_for(lambda: len(results) == 2)
+    kinds = sorted(type(r).__name__ for r in results)
+    return kinds == ["CompletedProcess", "FileNotFoundError"], f"callback получил {kinds}"
+
+
+SCENARIOS = [
+    ("одновременные вызовы", scenario_concurrency),
+    ("таймаут", scenario_timeout),
+    ("отмена", scenario_cancel),
+    ("построчный вывод", scenario_streaming),
+    ("stdin и stderr", scenario_stdin),
+    ("потомок держит pipe", scenario_grandchild),
+    ("ожидание в потоке цикла", scenario_loop_thread),
+    ("callback", scenario_callback),
+]
+
+
+def main():
+    runtime = adguard_client.AsyncioRuntime()
+    transport = adguard_client.AsyncCliTransport(runtime)
+    runtime.loop  # Поток цикла запускаем до замера числа потоков
+    failed = 0
+    for name, scenario in SCENARIOS:
+        ok, details = scenario(transport)
+        failed += not ok
+        print(f"{'OK' if ok else 'FAIL':6} {name}: {details}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()